@@ -1,46 +1,163 @@
 import cv2
 import numpy as np
-import re
+import math
 import os
 
+from app_logging import get_logger, configure_logging
+from tracing import Tracer
+from expression_parser import (
+    ExpressionError, BinaryOp, Number, ParsedLine, parse_line, tokenize, unknown_characters, evaluate, answer_value
+)
+from numeric import answers_equal
+from geometry import correct_geometry
+from layout import align_answers
+from glyph_recognizer import GlyphRecognizer
+from memory_budget import MemoryBudget, MemoryLimitError
+from pages import DOCUMENT_EXTENSIONS, PageError, is_document, iter_pages
+from ocr_confidence import REVIEW_THRESHOLD, LinesForLog, lines_from_data, text_line, vote_lines
+from grading_result import (
+    GradingResult, ProblemRecord, PROVENANCE_OCR, PROVENANCE_MOCK,
+    STATUS_CORRECT, STATUS_WRONG, STATUS_UNANSWERED, STATUS_INVALID, STATUS_REVIEW
+)
+
+logger = get_logger('ocr')
+
 # 尝试导入OCR相关库
 try:
     import pytesseract
     TESSERACT_AVAILABLE = True
 except ImportError:
     TESSERACT_AVAILABLE = False
-    print("警告: pytesseract未安装，OCR功能将使用模拟模式")
+    logger.warning("pytesseract未安装，OCR功能将使用模拟模式")
+
+# 识别引擎状态
+ENGINE_READY = 'ready'  # 可用
+ENGINE_NO_MODULE = 'missing_module'  # 未安装pytesseract
+ENGINE_NO_BINARY = 'missing_binary'  # 找不到tesseract程序
+ENGINE_FAILING = 'failing'  # 连续多次整轮识别出错，暂停使用
+
+# 连续整轮识别出错达到该次数后，不再执行多配置识别
+MAX_ENGINE_FAILURES = 3
+
+# 识别后端
+BACKEND_TESSERACT = 'tesseract'  # Tesseract多配置识别并投票
+BACKEND_GLYPH = 'glyph'  # 连通域切分 + 手写字符分类器（纯NumPy）
+BACKENDS = (BACKEND_TESSERACT, BACKEND_GLYPH)
+
+# 文件大小限制：多页文档逐页解码，可以比单张图片大得多
+MAX_IMAGE_SIZE = 50 * 1024 * 1024
+MAX_DOCUMENT_SIZE = 500 * 1024 * 1024
+
+# 受内存上限限制时允许的最小放大倍数，再小识别效果太差，直接报错
+MIN_SCALE_FACTOR = 0.5
+
+
+class OCREngineError(Exception):
+    """严格模式下识别引擎不可用或没有识别结果"""
 
 class OCRGrader:
-    def __init__(self):
-        self.tesseract_available = TESSERACT_AVAILABLE
+    # 多种OCR配置依次尝试
+    OCR_CONFIGS = [
+        # 配置1: 专门针对数字和数学符号
+        r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789.+-*/=?×÷()[]{}',
+        # 配置2: 包含字母的配置
+        r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789.+-*/=?×÷()[]{}ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz ',
+        # 配置3: 单行文本
+        r'--oem 3 --psm 7',
+        # 配置4: 块文本
+        r'--oem 3 --psm 8',
+        # 配置5: 默认配置
+        r'--oem 3 --psm 6'
+    ]
+
+    # OCR易混淆字符的替换表（均为单字符映射）
+    TEXT_REPLACEMENTS = {
+        '×': '*', '÷': '/', 'x': '*', 'X': '*',
+        '一': '-', '十': '+', '＋': '+', '－': '-',
+        '＊': '*', '／': '/', '＝': '=',
+        '０': '0', '１': '1', '２': '2', '３': '3', '４': '4',
+        '５': '5', '６': '6', '７': '7', '８': '8', '９': '9',
+        'O': '0', 'I': '1', 'l': '1', 'S': '5', 'G': '6',
+        'o': '0', 'i': '1'
+    }
+    NORMALIZE_TABLE = str.maketrans(TEXT_REPLACEMENTS)
+
+    # 宽松解析最多跳过的无法识别字符数及其占整行字符的比例，超过时只尝试抢救 "a op b =" 形式的题目
+    MAX_SKIPPED_CHARS = 2
+    MAX_SKIPPED_RATIO = 0.2
+
+    def __init__(self, debug_image_path="test_img/preprocessed_image.jpg", trace=False, deskew=True, strict=False,
+                 low_memory=False, memory_limit=None, backend=BACKEND_TESSERACT, recognizer=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的识别后端: {backend}")
+        self.debug_image_path = debug_image_path  # 保存预处理图片的路径，为None时不保存
+        self.tracer = Tracer(enabled=trace)  # 阶段耗时追踪，默认关闭
+        self.deskew = deskew  # 是否校正拍照带来的倾斜和透视变形
+        self.strict = strict  # 严格模式：识别引擎不可用时抛出OCREngineError，不使用模拟文本
+        self.backend = backend  # 识别后端（BACKEND_*）
+        # 手写字符识别器，为None时使用共享的默认分类器
+        self.recognizer = recognizer or GlyphRecognizer()
+        self.low_memory = low_memory  # 低内存预处理：复用缓冲区，中间结果用完即释放
+        self.memory = MemoryBudget(memory_limit)  # 预处理缓冲区记账，memory_limit为单个工作线程的上限（字节）
+        self.last_peak_memory = None  # 最近一次预处理的缓冲区峰值（字节）
+        self.last_geometry = None  # 最近一次预处理的几何校正结果
+        self.last_provenance = None  # 最近一次识别文本的来源（PROVENANCE_*）
+        self.last_fallback_reason = None  # 最近一次使用模拟文本的原因
+        self.consecutive_failures = 0  # 连续整轮识别失败的次数
+        # 运行计数，便于在批量批改中发现回退到模拟文本的情况
+        self.metrics = {
+            'gradings': 0,  # 批改次数
+            'ocr_results': 0,  # 使用真实识别结果的次数
+            'mock_fallbacks': 0,  # 回退到模拟文本的次数
+            'failed_sweeps': 0,  # 所有配置都执行出错的次数
+            'skipped_sweeps': 0,  # 引擎不可用而跳过识别的次数
+            'errors': 0,  # 批改出错的次数
+            'peak_memory': 0  # 预处理缓冲区的最大峰值（字节）
+        }
+        self.engine_status = self.check_engine()
         
-        if self.tesseract_available:
-            try:
-                # 尝试不同的可能路径
-                possible_paths = [
-                    r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-                    r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-                    r'C:\Users\{}\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', '')),
-                    'tesseract'  # 如果在PATH中
-                ]
-                
-                for path in possible_paths:
-                    if os.path.exists(path) or path == 'tesseract':
-                        pytesseract.pytesseract.tesseract_cmd = path
-                        # 测试是否可用
-                        test_result = pytesseract.get_tesseract_version()
-                        print(f"Tesseract版本: {test_result}")
-                        print(f"Tesseract路径: {path}")
-                        break
-                else:
-                    raise Exception("未找到Tesseract安装路径")
-                    
-            except Exception as e:
-                print(f"Tesseract初始化失败: {e}")
-                self.tesseract_available = False
+        logger.info("OCR功能状态: %s", '可用' if self.tesseract_available else f'不可用（{self.engine_status}）')
+    
+    @property
+    def tesseract_available(self):
+        """当前识别后端是否可用（名称沿用Tesseract时期）"""
+        return self.engine_status == ENGINE_READY
+    
+    def check_engine(self):
+        """检测识别后端是否可用，返回引擎状态（ENGINE_*）；手写字符识别只依赖NumPy，总是可用"""
+        if self.backend == BACKEND_GLYPH:
+            return ENGINE_READY
+        if not TESSERACT_AVAILABLE:
+            return ENGINE_NO_MODULE
         
-        print(f"OCR功能状态: {'可用' if self.tesseract_available else '不可用（使用模拟模式）'}")
+        try:
+            # 尝试不同的可能路径
+            possible_paths = [
+                r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+                r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+                r'C:\Users\{}\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'.format(os.getenv('USERNAME', '')),
+                'tesseract'  # 如果在PATH中
+            ]
+            
+            for path in possible_paths:
+                if os.path.exists(path) or path == 'tesseract':
+                    pytesseract.pytesseract.tesseract_cmd = path
+                    # 测试是否可用
+                    test_result = pytesseract.get_tesseract_version()
+                    logger.info("Tesseract版本: %s", test_result)
+                    logger.info("Tesseract路径: %s", path)
+                    return ENGINE_READY
+            raise Exception("未找到Tesseract安装路径")
+                
+        except Exception as e:
+            logger.warning("Tesseract初始化失败: %s", e)
+            return ENGINE_NO_BINARY
+    
+    def reset_engine(self):
+        """重新检测识别引擎（例如安装Tesseract后），清除连续失败计数"""
+        self.consecutive_failures = 0
+        self.engine_status = self.check_engine()
+        return self.engine_status
     
     def validate_image_path(self, image_path):
         """验证图片路径和格式"""
@@ -54,58 +171,94 @@ class OCRGrader:
             if file_size == 0:
                 raise Exception("图片文件为空")
             
-            if file_size > 50 * 1024 * 1024:  # 50MB限制
-                raise Exception("图片文件过大（超过50MB）")
+            max_size = MAX_DOCUMENT_SIZE if is_document(image_path) else MAX_IMAGE_SIZE
+            if file_size > max_size:
+                raise Exception(f"图片文件过大（超过{max_size // (1024 * 1024)}MB）")
             
             # 检查文件扩展名
-            valid_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.tif']
+            valid_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif'] + list(DOCUMENT_EXTENSIONS)
             file_ext = os.path.splitext(image_path)[1].lower()
             if file_ext not in valid_extensions:
-                print(f"警告: 不常见的图片格式 {file_ext}，但仍尝试处理")
+                logger.warning("不常见的图片格式 %s，但仍尝试处理", file_ext)
             
-            print(f"图片验证通过: {image_path} (大小: {file_size} bytes)")
+            logger.debug("图片验证通过: %s (大小: %d bytes)", image_path, file_size)
             return True
             
         except Exception as e:
-            print(f"图片验证失败: {e}")
+            logger.error("图片验证失败: %s", e)
             raise
     
-    def preprocess_image(self, image_path):
-        """改进的图片预处理方法"""
+    def load_image(self, image_path, grayscale=False):
+        """验证并读取图片文件，grayscale为True时直接解码为灰度图"""
+        # 验证图片
+        self.validate_image_path(image_path)
+        
+        # 读取图片
+        logger.debug("正在读取图片: %s", image_path)
+        with self.tracer.span('imread'):
+            flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+            image = cv2.imread(image_path, flags)
+        
+        if image is None:
+            # 尝试使用不同的方法读取图片
+            logger.debug("cv2.imread失败，尝试其他方法...")
+            try:
+                # 使用numpy读取
+                with open(image_path, 'rb') as f:
+                    file_bytes = np.asarray(bytearray(f.read()), dtype=np.uint8)
+                    image = cv2.imdecode(file_bytes, flags)
+            except Exception as e2:
+                logger.warning("numpy方法也失败: %s", e2)
+                raise Exception(f"无法读取图片文件: {image_path}，可能是格式不支持或文件损坏")
+        
+        if image is None:
+            raise Exception(f"图片解码失败: {image_path}")
+        return image
+    
+    def preprocess_image(self, image):
+        """改进的图片预处理方法 - image可以是图片路径，也可以是已解码的图片（如文档中的一页）
+
+        low_memory 模式下直接按灰度解码，各步骤通过 dst= 在两块缓冲区之间交替写入，
+        中间结果用完即释放；memory_limit 限制本次任务的缓冲区总量，放大倍数会相应降低。
+        本次的缓冲区峰值记录在 last_peak_memory。
+        """
+        budget = self.memory
+        budget.reset()
+        low = self.low_memory
         try:
-            # 验证图片
-            self.validate_image_path(image_path)
-            
-            # 读取图片
-            print(f"正在读取图片: {image_path}")
-            image = cv2.imread(image_path)
-            
-            if image is None:
-                # 尝试使用不同的方法读取图片
-                print("cv2.imread失败，尝试其他方法...")
-                try:
-                    # 使用numpy读取
-                    with open(image_path, 'rb') as f:
-                        file_bytes = np.asarray(bytearray(f.read()), dtype=np.uint8)
-                        image = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-                except Exception as e2:
-                    print(f"numpy方法也失败: {e2}")
-                    raise Exception(f"无法读取图片文件: {image_path}，可能是格式不支持或文件损坏")
-            
-            if image is None:
-                raise Exception(f"图片解码失败: {image_path}")
-                
-            print(f"原始图片尺寸: {image.shape}")
+            if not isinstance(image, np.ndarray):
+                image = self.load_image(image, grayscale=low)
+            budget.track('source', image)
+            logger.debug("原始图片尺寸: %s", image.shape)
             
             # 检查图片是否为空或过小
             if image.shape[0] < 10 or image.shape[1] < 10:
                 raise Exception("图片尺寸过小，无法处理")
             
             # 转换为灰度图
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image
+            with self.tracer.span('grayscale'):
+                if len(image.shape) == 3:
+                    gray = budget.track('gray', cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+                    if low:
+                        image = None
+                        budget.release('source')
+                else:
+                    gray = image
+            
+            # 0. 几何校正 - 在二值化之前把倾斜或透视变形的照片拉正
+            if self.deskew:
+                with self.tracer.span('geometry') as span:
+                    corrected, correction = correct_geometry(gray)
+                    span.set(method=correction.method)
+                if corrected is not gray:
+                    if low:
+                        image = None
+                        budget.release('source')
+                        budget.release('gray')
+                    gray = budget.track('geometry', corrected)
+                self.last_geometry = correction
+                if correction.applied:
+                    logger.info("几何校正: %s", correction.to_dict())
             
             # 1. 图像放大 - 提高识别精度
             scale_factor = 2.0  # 适度放大
@@ -120,126 +273,208 @@ class OCRGrader:
                 new_width = int(width * scale_factor)
                 new_height = int(height * scale_factor)
             
-            gray = cv2.resize(gray, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-            print(f"缩放后尺寸: {gray.shape}")
+            # 有内存上限时，按剩余额度限制放大倍数
+            limit_factor = self.memory_scale_limit(width, height)
+            if limit_factor is not None and limit_factor < scale_factor:
+                if limit_factor < MIN_SCALE_FACTOR:
+                    raise MemoryLimitError(
+                        f"内存上限 {budget.limit / 2**20:.1f}MB 不足以处理 {width}x{height} 的图片"
+                    )
+                logger.warning("受内存上限限制，放大倍数从 %.2f 降为 %.2f", scale_factor, limit_factor)
+                scale_factor = limit_factor
+                new_width = int(width * scale_factor)
+                new_height = int(height * scale_factor)
+            
+            with self.tracer.span('resize', width=new_width, height=new_height):
+                if low:
+                    front = budget.empty('front', (new_height, new_width))
+                    cv2.resize(gray, (new_width, new_height), dst=front, interpolation=cv2.INTER_CUBIC)
+                    # 原图到此不再需要
+                    image = gray = None
+                    for name in ('source', 'gray', 'geometry'):
+                        budget.release(name)
+                    back = budget.empty('back', (new_height, new_width))
+                else:
+                    gray = budget.track('resized', cv2.resize(gray, (new_width, new_height),
+                                                              interpolation=cv2.INTER_CUBIC))
+            logger.debug("缩放后尺寸: %s", (new_height, new_width))
             
             # 2. 去噪
-            try:
-                denoised = cv2.bilateralFilter(gray, 9, 75, 75)
-            except:
-                # 如果双边滤波失败，使用高斯滤波
-                denoised = cv2.GaussianBlur(gray, (5, 5), 0)
+            with self.tracer.span('denoise') as span:
+                source = front if low else gray
+                try:
+                    denoised = cv2.bilateralFilter(source, 9, 75, 75, dst=back if low else None)
+                    span.set(method='bilateralFilter')
+                except:
+                    # 如果双边滤波失败，使用高斯滤波
+                    denoised = cv2.GaussianBlur(source, (5, 5), 0, dst=back if low else None)
+                    span.set(method='GaussianBlur')
+                if not low:
+                    budget.track('denoised', denoised)
             
             # 3. 对比度增强
-            try:
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-                enhanced = clahe.apply(denoised)
-            except:
-                # 如果CLAHE失败，使用简单的直方图均衡化
-                enhanced = cv2.equalizeHist(denoised)
+            with self.tracer.span('contrast') as span:
+                try:
+                    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+                    enhanced = clahe.apply(denoised, dst=front if low else None)
+                    span.set(method='CLAHE')
+                except:
+                    # 如果CLAHE失败，使用简单的直方图均衡化
+                    enhanced = cv2.equalizeHist(denoised, dst=front if low else None)
+                    span.set(method='equalizeHist')
+                if not low:
+                    budget.track('enhanced', enhanced)
             
             # 4. 二值化
-            binary = cv2.adaptiveThreshold(enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                         cv2.THRESH_BINARY, 11, 2)
+            with self.tracer.span('adaptive_threshold'):
+                binary = cv2.adaptiveThreshold(enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+                                             cv2.THRESH_BINARY, 11, 2, dst=back if low else None)
+                if not low:
+                    budget.track('binary', binary)
             
             # 5. 形态学操作 - 轻微的噪点清理
-            kernel = np.ones((2, 2), np.uint8)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+            with self.tracer.span('morphology'):
+                kernel = np.ones((2, 2), np.uint8)
+                binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel, dst=front if low else None)
+                if not low:
+                    budget.track('closed', binary)
+            if low:
+                budget.release('back')
             
             # 保存预处理后的图片以便调试
-            try:
-                debug_path = "test_img/preprocessed_image.jpg"
-                cv2.imwrite(debug_path, binary)
-                print(f"已保存预处理图片到: {debug_path}")
-            except Exception as e:
-                print(f"保存预处理图片失败: {e}")
+            if self.debug_image_path:
+                try:
+                    with self.tracer.span('save_debug_image'):
+                        cv2.imwrite(self.debug_image_path, binary)
+                    logger.debug("已保存预处理图片到: %s", self.debug_image_path)
+                except Exception as e:
+                    logger.warning("保存预处理图片失败: %s", e)
             
-            print(f"预处理完成，最终尺寸: {binary.shape}")
+            logger.debug("预处理完成，最终尺寸: %s", binary.shape)
             return binary
             
         except Exception as e:
-            print(f"图片预处理失败: {e}")
+            logger.error("图片预处理失败: %s", e)
             raise
+        finally:
+            self.last_peak_memory = budget.peak
+            self.metrics['peak_memory'] = max(self.metrics['peak_memory'], budget.peak)
+    
+    def memory_scale_limit(self, width, height):
+        """内存上限允许的最大放大倍数，不限制时为None
+
+        low_memory 模式下放大后同时存活的是两块交替使用的缓冲区，且第一块分配时原图还在；
+        普通模式下放大、去噪、增强、二值化、形态学的结果一直存活到预处理结束。
+        """
+        available = self.memory.available()
+        if available is None:
+            return None
+        if self.low_memory:
+            pixels = min(available, self.memory.limit / 2)
+        else:
+            pixels = available / 5
+        return math.sqrt(max(pixels, 0) / (width * height))
     
     def extract_text(self, image):
-        """改进的OCR文本提取方法"""
+        """OCR文本提取，返回投票后的整段文本"""
+        return "\n".join(line.text for line in self.extract_lines(image))
+    
+    def extract_lines(self, image):
+        """用所有配置识别，按行投票，返回带置信度的OCRLine列表"""
+        if self.backend == BACKEND_GLYPH:
+            return self.extract_glyph_lines(image)
         if not self.tesseract_available:
-            print("Tesseract不可用，使用模拟文本")
-            return self.mock_extract_text()
+            # 引擎不可用时直接跳过，不在每张图片上重复尝试全部配置
+            self.metrics['skipped_sweeps'] += 1
+            return self.fallback_lines(f"Tesseract不可用（{self.engine_status}）")
         
         try:
-            print("开始OCR文本提取...")
-            
-            # 多种OCR配置尝试
-            configs = [
-                # 配置1: 专门针对数字和数学符号
-                r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789+-*/=?×÷()[]{}',
-                # 配置2: 包含字母的配置
-                r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789+-*/=?×÷()[]{}ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz ',
-                # 配置3: 单行文本
-                r'--oem 3 --psm 7',
-                # 配置4: 块文本
-                r'--oem 3 --psm 8',
-                # 配置5: 默认配置
-                r'--oem 3 --psm 6'
-            ]
-            
-            best_text = ""
-            max_score = 0
+            logger.debug("开始OCR文本提取...")
             
-            for i, config in enumerate(configs, 1):
+            candidates = []
+            errors = 0
+            for i, config in enumerate(self.OCR_CONFIGS, 1):
                 try:
-                    print(f"尝试配置{i}: {config}")
-                    text = pytesseract.image_to_string(image, config=config, lang='eng')
-                    
-                    # 评估识别结果质量
-                    score = self.evaluate_ocr_result(text)
-                    print(f"配置{i}识别结果 (评分:{score}): {repr(text[:100])}")
-                    
-                    if score > max_score:
-                        max_score = score
-                        best_text = text
-                        
+                    logger.debug("尝试配置%d: %s", i, config)
+                    with self.tracer.span('tesseract', config=i) as span:
+                        data = pytesseract.image_to_data(
+                            image, config=config, lang='eng', output_type=pytesseract.Output.DICT)
+                        lines = lines_from_data(data)
+                        span.set(lines=len(lines))
+                    logger.debug("配置%d识别出%d行: %r", i, len(lines), LinesForLog(lines, limit=5))
+                    candidates.append(lines)
+                except pytesseract.TesseractNotFoundError as e:
+                    # 程序本身不存在，其余配置也不可能成功
+                    logger.error("找不到Tesseract程序: %s", e)
+                    self.engine_status = ENGINE_NO_BINARY
+                    return self.fallback_lines("找不到Tesseract程序")
                 except Exception as e:
-                    print(f"配置{i}识别失败: {e}")
-                    continue
+                    logger.warning("配置%d识别失败: %s", i, e)
+                    errors += 1
+                    candidates.append([])
             
-            if not best_text.strip():
-                print("所有OCR配置都失败或无结果，使用模拟文本")
-                return self.mock_extract_text()
-                
-            print(f"最终选择的OCR结果 (评分:{max_score}): {repr(best_text[:200])}")
-            return best_text
+            if errors == len(self.OCR_CONFIGS):
+                self.record_engine_failure()
+                return self.fallback_lines("所有OCR配置都执行失败")
+            self.consecutive_failures = 0
+            
+            with self.tracer.span('vote'):
+                voted = vote_lines(candidates, self.normalize_text)
+            
+            if not voted:
+                return self.fallback_lines("所有OCR配置都没有识别出文字")
+            
+            logger.debug("投票结果: %r", LinesForLog(voted))
+            self.last_provenance = PROVENANCE_OCR
+            self.last_fallback_reason = None
+            return voted
             
+        except OCREngineError:
+            raise
         except Exception as e:
-            print(f"OCR文本提取失败: {e}")
-            return self.mock_extract_text()
+            logger.error("OCR文本提取失败: %s", e)
+            return self.fallback_lines(f"OCR文本提取失败: {e}")
     
-    def evaluate_ocr_result(self, text):
-        """评估OCR识别结果的质量"""
-        if not text.strip():
-            return 0
-        
-        score = 0
-        
-        # 包含数字得分
-        if re.search(r'\d', text):
-            score += 10
-        
-        # 包含数学运算符得分
-        if re.search(r'[+\-*/×÷=]', text):
-            score += 10
-        
-        # 包含等号得分
-        if '=' in text:
-            score += 5
+    def extract_glyph_lines(self, image):
+        """用手写字符识别后端识别，返回带置信度的OCRLine列表"""
+        try:
+            with self.tracer.span('glyph') as span:
+                lines = self.recognizer.recognize(image)
+                span.set(lines=len(lines))
+        except Exception as e:
+            logger.error("手写字符识别失败: %s", e)
+            return self.fallback_lines(f"手写字符识别失败: {e}")
         
-        # 长度适中得分
-        length = len(text.strip())
-        if 10 <= length <= 200:
-            score += 5
+        if not lines:
+            return self.fallback_lines("手写字符识别没有识别出文字")
         
-        return score
+        logger.debug("手写字符识别结果: %r", LinesForLog(lines))
+        self.last_provenance = PROVENANCE_OCR
+        self.last_fallback_reason = None
+        return lines
+    
+    def record_engine_failure(self):
+        """记录一次整轮识别失败，连续失败过多时把引擎标记为不可用"""
+        self.metrics['failed_sweeps'] += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= MAX_ENGINE_FAILURES:
+            logger.error("识别引擎连续%d次执行失败，暂停使用，调用reset_engine()可重新检测",
+                         self.consecutive_failures)
+            self.engine_status = ENGINE_FAILING
+    
+    def fallback_lines(self, reason):
+        """无法得到真实识别结果：严格模式下抛出异常，否则返回标记为模拟来源的文本"""
+        self.metrics['mock_fallbacks'] += 1
+        if self.strict:
+            raise OCREngineError(reason)
+        logger.warning("%s，使用模拟文本", reason)
+        self.last_provenance = PROVENANCE_MOCK
+        self.last_fallback_reason = reason
+        return self.mock_extract_lines()
+    
+    def mock_extract_lines(self):
+        """模拟文本按行拆分，没有置信度"""
+        return [text_line(text) for text in self.mock_extract_text().split('\n')]
     
     def mock_extract_text(self):
         """模拟OCR文本提取 - 基于上传的图片内容"""
@@ -250,106 +485,133 @@ class OCRGrader:
 20 + 15 = ???"""
     
     def parse_problems_and_answers(self, text):
-        """改进的题目和答案解析方法"""
-        lines = [line.strip() for line in text.strip().split('\n') if line.strip()]
+        """题目和答案解析 - 每行交给表达式解析器，支持多步运算和括号
+
+        返回的题目为表达式树（expression_parser中的节点），答案为int、Decimal或Fraction。
+        """
+        problems, answers, _, _ = self.parse_lines([text_line(line) for line in text.split('\n')])
+        return problems, answers
+    
+    def parse_lines(self, lines):
+        """解析OCRLine列表，额外返回每道题目和每个答案所在的行（含置信度和位置）"""
+        lines = [line for line in lines if line.text.strip()]
         problems = []
         answers = []
+        problem_lines = []
+        answer_lines = []
         
-        print(f"开始解析 {len(lines)} 行文本")
+        logger.debug("开始解析 %d 行文本", len(lines))
         
-        for line_num, line in enumerate(lines, 1):
-            print(f"解析第{line_num}行: {repr(line)}")
+        for line_num, ocr_line in enumerate(lines, 1):
+            logger.debug("解析第%d行: %r", line_num, ocr_line.text)
             
             # 清理和标准化文本
-            line = self.normalize_text(line)
-            print(f"标准化后: {repr(line)}")
-            
-            # 尝试多种解析模式
-            parsed = False
-            
-            # 模式1: 完整表达式 "12 + 8 = 20"
-            complete_match = re.search(r'(\d+)\s*([+\-*/×÷])\s*(\d+)\s*=\s*(\d+)', line)
-            if complete_match:
-                a, op, b, ans = complete_match.groups()
-                op = self.normalize_operator(op)
-                problems.append((int(a), op, int(b)))
-                answers.append(int(ans))
-                print(f"找到完整表达式: {a} {op} {b} = {ans}")
-                parsed = True
-                continue
+            line = self.normalize_text(ocr_line.text)
+            logger.debug("标准化后: %r", line)
             
-            # 模式2: 题目部分 "12 + 8 = ?"
-            problem_match = re.search(r'(\d+)\s*([+\-*/×÷])\s*(\d+)\s*=\s*[\?？]+', line)
-            if problem_match:
-                a, op, b = problem_match.groups()
-                op = self.normalize_operator(op)
-                problems.append((int(a), op, int(b)))
-                print(f"找到题目: {a} {op} {b}")
-                parsed = True
-                continue
-                
-            # 模式3: 题目部分 "12 + 8 ="
-            problem_match2 = re.search(r'(\d+)\s*([+\-*/×÷])\s*(\d+)\s*=\s*$', line)
-            if problem_match2:
-                a, op, b = problem_match2.groups()
-                op = self.normalize_operator(op)
-                problems.append((int(a), op, int(b)))
-                print(f"找到题目(无答案): {a} {op} {b}")
-                parsed = True
+            parsed = self.parse_line(line)
+            if parsed is None:
+                logger.debug("第%d行无法解析", line_num)
                 continue
             
-            # 模式4: 单独的数字答案
-            number_match = re.search(r'^(\d+)$', line)
-            if number_match:
-                answers.append(int(line))
-                print(f"找到答案: {line}")
-                parsed = True
-                continue
-                
-            # 模式5: 包含多个数字的行，尝试提取
-            numbers = re.findall(r'\d+', line)
-            operators = re.findall(r'[+\-*/×÷]', line)
-            if len(numbers) >= 2 and len(operators) >= 1:
+            if parsed.expression is not None:
+                problems.append(parsed.expression)
+                problem_lines.append(ocr_line)
+                logger.debug("找到题目: %s", parsed.expression)
+            if parsed.answer is not None:
                 try:
-                    a, b = int(numbers[0]), int(numbers[1])
-                    op = self.normalize_operator(operators[0])
-                    problems.append((a, op, b))
-                    print(f"从复杂行提取题目: {a} {op} {b}")
-                    
-                    # 如果有第三个数字，可能是答案
-                    if len(numbers) >= 3:
-                        answers.append(int(numbers[2]))
-                        print(f"同时提取答案: {numbers[2]}")
-                    parsed = True
-                except:
-                    pass
-            
-            if not parsed:
-                print(f"第{line_num}行无法解析")
+                    answers.append(answer_value(parsed.answer))
+                    answer_lines.append(ocr_line)
+                    logger.debug("找到答案: %s", parsed.answer)
+                except ZeroDivisionError:
+                    logger.debug("第%d行的答案无法计算: %s", line_num, parsed.answer)
         
-        print(f"解析完成: {len(problems)}道题目, {len(answers)}个答案")
-        return problems, answers
+        logger.debug("解析完成: %d道题目, %d个答案", len(problems), len(answers))
+        return problems, answers, problem_lines, answer_lines
     
-    def normalize_text(self, text):
-        """标准化文本"""
-        # 替换相似字符
-        replacements = {
-            '×': '*', '÷': '/', 'x': '*', 'X': '*',
-            '一': '-', '十': '+', '＋': '+', '－': '-',
-            '＊': '*', '／': '/', '＝': '=',
-            '０': '0', '１': '1', '２': '2', '３': '3', '４': '4',
-            '５': '5', '６': '6', '７': '7', '８': '8', '９': '9',
-            'O': '0', 'I': '1', 'l': '1', 'S': '5', 'G': '6',
-            'o': '0', 'i': '1'
-        }
-        
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        
-        # 清理多余空格
-        text = ' '.join(text.split())
+    @staticmethod
+    def problem_confidence(problem_confidence, answer_confidence):
+        """一道题的置信度取题目行和答案行中较低的一个，都没有时为None"""
+        known = [c for c in (problem_confidence, answer_confidence) if c is not None]
+        return min(known) if known else None
+    
+    def build_records(self, problems, answers, problem_lines, answer_lines, expected_answers):
+        """按版面位置把题目和答案配对并判分，返回ProblemRecord列表"""
+        assignment = align_answers(problem_lines, answer_lines)
+        records = []
+        for i, problem in enumerate(problems):
+            expected = expected_answers[i]
+            j = assignment[i]
+            answer_line = answer_lines[j] if j is not None else None
+            detected = answers[j] if j is not None else None
+            confidence = self.problem_confidence(
+                problem_lines[i].confidence,
+                answer_line.confidence if answer_line is not None else None
+            )
+            
+            if confidence is not None and confidence < REVIEW_THRESHOLD:
+                status = STATUS_REVIEW  # 识别没有把握的题目不自动判分
+            elif detected is None:
+                status = STATUS_UNANSWERED
+            elif expected is None:
+                status = STATUS_INVALID
+            elif answers_equal(detected, expected):
+                status = STATUS_CORRECT
+            else:
+                status = STATUS_WRONG
+            
+            records.append(ProblemRecord(
+                i + 1, problem, detected, expected, status, confidence,
+                bbox=problem_lines[i].bbox,
+                answer_bbox=answer_line.bbox if answer_line is not None else None
+            ))
+        return records
+    
+    def parse_line(self, line):
+        """解析一行：先严格解析，失败后忽略少量噪声字符重试，最后按词法单元抢救出一道题
+
+        宽松解析只在跳过的字符很少时采用，并且结果必须含有运算符或等号，
+        不会把 "第1题"、"Page 2" 这类标题行当作单独的答案。
+        """
+        try:
+            return parse_line(line)
+        except ExpressionError as e:
+            logger.debug("表达式解析失败: %s", e)
         
-        return text
+        skipped = unknown_characters(line)
+        if skipped <= self.MAX_SKIPPED_CHARS and skipped <= self.MAX_SKIPPED_RATIO * len(line.replace(' ', '')):
+            try:
+                parsed = parse_line(line, strict=False)
+                if parsed.kind != 'answer':
+                    return parsed
+                logger.debug("宽松解析只得到答案，忽略: %r", line)
+            except ExpressionError as e:
+                logger.debug("宽松解析失败: %s", e)
+        return self.salvage_line(line)
+    
+    def salvage_line(self, line):
+        """从无法整体解析的行中提取第一个 "数字 运算符 数字 =" ，等号后紧跟的数字视为答案"""
+        try:
+            tokens = [token for token in tokenize(line, strict=False) if token.kind in ('num', 'op', 'eq', 'q')]
+        except ExpressionError as e:
+            logger.debug("无法提取题目: %s", e)
+            return None
+        for i in range(len(tokens) - 3):
+            a, op, b, eq = tokens[i:i + 4]
+            if a.kind == 'num' and op.kind == 'op' and b.kind == 'num' and eq.kind == 'eq':
+                expression = BinaryOp(op.value, Number(a.value), Number(b.value))
+                following = tokens[i + 4] if i + 4 < len(tokens) else None
+                if following is not None and following.kind == 'num':
+                    answer = Number(following.value)
+                    logger.debug("从复杂行提取题目: %s = %s", expression, answer)
+                    return ParsedLine('complete', expression, answer)
+                logger.debug("从复杂行提取题目: %s", expression)
+                return ParsedLine('question', expression, None)
+        return None
+    
+    def normalize_text(self, text):
+        """标准化文本：一次translate替换相似字符，再清理多余空格"""
+        return ' '.join(text.translate(self.NORMALIZE_TABLE).split())
     
     def normalize_operator(self, op):
         """标准化运算符"""
@@ -357,100 +619,115 @@ class OCRGrader:
         return op_map.get(op, op)
     
     def calculate_expected_answers(self, problems):
-        """根据题目计算预期答案"""
+        """根据题目计算预期答案 - 精确计算，除不尽时得到分数
+
+        题目可以是表达式树，也可以是旧格式的 (a, op, b) 三元组。
+        """
         expected_answers = []
-        for a, op, b in problems:
+        for problem in problems:
             try:
-                if op == '+':
-                    result = a + b
-                elif op == '-':
-                    result = a - b
-                elif op == '*':
-                    result = a * b
-                elif op == '/':
-                    if b != 0:
-                        result = a // b  # 使用整数除法
-                    else:
-                        result = None  # 除以零的情况
-                else:
-                    result = None
-                expected_answers.append(result)
+                if isinstance(problem, tuple):
+                    a, op, b = problem
+                    problem = BinaryOp(self.normalize_operator(op), Number(a), Number(b))
+                expected_answers.append(evaluate(problem))
+            except ZeroDivisionError:
+                expected_answers.append(None)  # 除以零的情况
             except Exception as e:
-                print(f"计算 {a} {op} {b} 时出错: {e}")
+                logger.warning("计算 %s 时出错: %s", problem, e)
                 expected_answers.append(None)
         return expected_answers
     
-    def grade_homework(self, image_path):
-        """批改手写作业 - 增强错误处理"""
+    def grade_homework(self, image_path, page=None):
+        """批改手写作业 - 增强错误处理
+
+        image_path 也可以是已解码的图片；page 为其在多页文档中的页码，会记录到结果中。
+        """
         try:
-            print(f"=== 开始批改图片: {image_path} ===")
+            if page is None:
+                logger.info("开始批改图片: %s", image_path)
+            else:
+                logger.info("开始批改第%d页", page)
+            self.tracer.reset()
+            self.last_geometry = None
+            self.last_provenance = None
+            self.last_fallback_reason = None
+            self.last_peak_memory = None
+            self.metrics['gradings'] += 1
             
             # 验证并预处理图片
-            processed_image = self.preprocess_image(image_path)
+            with self.tracer.span('preprocess') as span:
+                processed_image = self.preprocess_image(image_path)
+                span.set(peak_memory=self.last_peak_memory)
             
-            # 提取文本
-            text = self.extract_text(processed_image)
-            print(f"提取的原始文本: {repr(text)}")
+            # 提取文本（按行投票，带置信度）
+            with self.tracer.span('extract_text'):
+                lines = self.extract_lines(processed_image)
+            logger.debug("提取的原始文本: %r", LinesForLog(lines, with_confidence=False))
             
             # 解析题目和答案
-            problems, detected_answers = self.parse_problems_and_answers(text)
-            print(f"解析出 {len(problems)} 道题目和 {len(detected_answers)} 个答案")
-            
-            # 计算预期答案
-            expected_answers = self.calculate_expected_answers(problems)
-            
-            # 准备输出结果
-            detected_problems_list = []
-            for a, op, b in problems:
-                detected_problems_list.append(f"{a} {op} {b} = ?")
-            detected_problems_str = "\n".join(detected_problems_list) if detected_problems_list else "未检测到题目"
-            
-            detected_answers_str = "\n".join(str(ans) for ans in detected_answers) if detected_answers else "未检测到答案"
-            
-            # 准备批改结果
-            grading_results = []
-            
-            if not problems:
-                grading_results.append("未检测到有效的数学题目")
-            else:
-                # 确保题目和答案数量匹配
-                max_len = max(len(problems), len(detected_answers))
-                
-                for i in range(len(problems)):
-                    expected = expected_answers[i] if i < len(expected_answers) else None
-                    
-                    if i >= len(detected_answers):
-                        # 未作答的题目
-                        grading_results.append(f"第{i+1}题: 未作答，正确答案是 {expected}")
-                    else:
-                        actual = detected_answers[i]
-                        if expected is None:
-                            grading_results.append(f"第{i+1}题: 题目有误，无法计算")
-                        elif expected == actual:
-                            grading_results.append(f"第{i+1}题: ✓ 正确！")
-                        else:
-                            grading_results.append(f"第{i+1}题: ✗ 错误，正确答案是 {expected}")
-            
-            grading_results_str = "\n".join(grading_results) if grading_results else "批改过程出现问题"
-            
-            result = {
-                "detected_problems": detected_problems_str,
-                "detected_answers": detected_answers_str,
-                "grading_results": grading_results_str
-            }
-            
-            print("=== 批改完成 ===")
+            with self.tracer.span('parse'):
+                problems, answers, problem_lines, answer_lines = self.parse_lines(lines)
+            logger.info("解析出 %d 道题目和 %d 个答案", len(problems), len(answers))
+            
+            # 计算预期答案并判分
+            with self.tracer.span('calculate'):
+                expected_answers = self.calculate_expected_answers(problems)
+                records = self.build_records(problems, answers, problem_lines, answer_lines, expected_answers)
+            
+            result = GradingResult(
+                records, answers,
+                engine_status=self.engine_status,
+                provenance=self.last_provenance,
+                fallback_reason=self.last_fallback_reason,
+                geometry=self.last_geometry.to_dict() if self.last_geometry is not None else None,
+                page=page,
+                peak_memory=self.last_peak_memory,
+                lines=[line.text for line in lines]
+            )
+            if self.last_provenance == PROVENANCE_OCR:
+                self.metrics['ocr_results'] += 1
+            if self.tracer.enabled:
+                result.trace = self.tracer.to_dict()
+            
+            logger.info("批改完成: %s", image_path if page is None else f"第{page}页")
             return result
             
+        except OCREngineError:
+            self.metrics['errors'] += 1
+            raise
         except Exception as e:
-            error_msg = f"批改过程出错: {e}"
-            print(error_msg)
+            self.metrics['errors'] += 1
+            logger.error("批改过程出错: %s", e)
             # 返回错误信息，但确保结构完整
-            return {
-                "detected_problems": f"处理失败: {str(e)}",
-                "detected_answers": "无法识别",
-                "grading_results": f"批改失败: {str(e)}"
-            }
+            result = GradingResult.failed(e, self.engine_status)
+            result.page = page
+            result.peak_memory = self.last_peak_memory
+            return result
+    
+    def grade_document(self, path):
+        """逐页批改多页TIFF或PDF（普通图片视为一页），返回每页GradingResult的生成器
+
+        每次只解码并批改一页，整班作业扫描成一个文件时内存占用也不会随页数增长。
+        某一页解码失败时该页返回失败结果，之后的页面无法继续读取时停止。
+        """
+        self.validate_image_path(path)
+        logger.info("开始逐页批改文档: %s", path)
+        pages = iter_pages(path)
+        number = 0
+        while True:
+            try:
+                page = next(pages)
+            except StopIteration:
+                break
+            except PageError as e:
+                logger.error("文档读取失败: %s", e)
+                self.metrics['errors'] += 1
+                result = GradingResult.failed(e, self.engine_status)
+                result.page = number + 1
+                yield result
+                break
+            number = page.number
+            yield self.grade_homework(page.image, page=page.number)
 
 # 测试函数
 def test_ocr_functionality():
@@ -467,14 +744,15 @@ def test_ocr_functionality():
         result = grader.grade_homework(test_image)
         print("\n=== OCR测试结果 ===")
         print("检测到的题目:")
-        print(result["detected_problems"])
+        print(result.detected_problems)
         print("\n检测到的答案:")
-        print(result["detected_answers"])
+        print(result.detected_answers)
         print("\n批改结果:")
-        print(result["grading_results"])
+        print(result.grading_results)
         print("===================")
     except Exception as e:
         print(f"测试失败: {e}")
 
 if __name__ == "__main__":
+    configure_logging()
     test_ocr_functionality()
@@ -1,9 +1,150 @@
 import requests
 import json
+import re
 import time
 from PyQt6.QtCore import QThread, pyqtSignal, QObject
 from PyQt6.QtWidgets import QMessageBox
 
+from app_logging import get_logger
+
+logger = get_logger('ai')
+
+
+def estimate_tokens(text):
+    """粗略估算文本的token数：中文约每字1个token，其他字符约每4个字符1个token"""
+    if not text:
+        return 0
+    cjk_count = len(re.findall(r'[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]', text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def truncate_to_tokens(text, budget):
+    """截断文本，使估算的token数不超过budget（估算值随长度单调不减，可以二分）"""
+    if estimate_tokens(text) <= budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+class ChatSession:
+    """多轮对话会话 - 维护滚动的对话历史，并把上下文控制在token预算内"""
+
+    SYSTEM_PROMPT = """你是一个专业的数学教师和AI助手，专门帮助学生学习数学。请用简单易懂的语言回答学生的数学问题。
+
+请遵循以下要求：
+1. 回答要清晰、简洁、易于理解
+2. 如果是计算题，请提供详细的解题步骤
+3. 如果是概念问题，请用简单的例子说明
+4. 鼓励学生思考，给出解题思路
+5. 用中文回答
+6. 学生的追问与之前的对话相关时，请结合上下文回答
+
+题目类型：{problem_type}
+难度等级：{difficulty}"""
+
+    # 每条消息的固定开销（角色标记等）
+    MESSAGE_OVERHEAD = 4
+
+    def __init__(self, problem_type, difficulty, context_budget=3000, max_tokens=1000,
+                 summary_budget=300):
+        self.problem_type = problem_type
+        self.difficulty = difficulty
+        self.context_budget = context_budget  # 发送的上下文（提示）token上限
+        self.max_tokens = max_tokens  # 每次回答的token上限
+        self.summary_budget = summary_budget  # 被移出历史的旧对话摘要的token上限
+        self.history = []  # [{"role": ..., "content": ...}, ...]
+        self.summary = ""  # 已移出历史的旧对话摘要
+        self.usage_log = []  # 每次调用的token用量
+
+    def system_message(self):
+        """生成系统提示词（包含旧对话摘要）"""
+        content = self.SYSTEM_PROMPT.format(problem_type=self.problem_type, difficulty=self.difficulty)
+        if self.summary:
+            content += f"\n\n之前的对话要点：\n{self.summary}"
+        return {"role": "system", "content": content}
+
+    def message_tokens(self, message):
+        """估算单条消息的token数"""
+        return estimate_tokens(message["content"]) + self.MESSAGE_OVERHEAD
+
+    def summarize_turn(self, question, answer):
+        """把一轮旧对话压缩成一行要点"""
+        question = " ".join(question.split())[:60]
+        answer = " ".join(answer.split())[:80]
+        return f"- 问：{question} 答：{answer}"
+
+    def add_to_summary(self, question, answer):
+        """把移出的旧对话并入摘要，超出摘要预算时丢弃最早的要点，只剩一条仍超出时截断它"""
+        lines = self.summary.split("\n") if self.summary else []
+        lines.append(self.summarize_turn(question, answer))
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+        self.summary = truncate_to_tokens("\n".join(lines), self.summary_budget)
+
+    def context_tokens(self, question):
+        """估算带上当前历史和摘要发送question时的上下文token数"""
+        return (self.message_tokens(self.system_message()) + self.message_tokens({"content": question})
+                + sum(self.message_tokens(m) for m in self.history))
+
+    def trim_history(self, question):
+        """移出最早的对话轮次，直到上下文不超过预算
+
+        历史清空后仍超出预算时依次缩短摘要和问题本身，返回（可能被截断的）问题。
+        只有系统提示词本身就超出预算时才会超出。
+        """
+        while self.history and self.context_tokens(question) > self.context_budget:
+            # 历史总是成对的 (user, assistant)
+            removed_question = self.history.pop(0)
+            removed_answer = self.history.pop(0) if self.history else {"content": ""}
+            self.add_to_summary(removed_question["content"], removed_answer["content"])
+
+        # 分段估算时取整方式不同，截断后再核对一次
+        excess = self.context_tokens(question) - self.context_budget
+        while excess > 0 and self.summary:
+            self.summary = truncate_to_tokens(self.summary, estimate_tokens(self.summary) - excess)
+            excess = self.context_tokens(question) - self.context_budget
+        while excess > 0 and question:
+            question = truncate_to_tokens(question, estimate_tokens(question) - excess)
+            excess = self.context_tokens(question) - self.context_budget
+        return question
+
+    def build_messages(self, question):
+        """构建本次请求要发送的消息列表，估算的token数不超过 context_budget
+
+        最后一条是（可能被截断的）问题，记录这一轮时应使用它而不是原始问题。
+        """
+        question = self.trim_history(question)
+        return [self.system_message()] + self.history + [{"role": "user", "content": question}]
+
+    def record(self, question, answer, usage):
+        """记录一轮完成的对话及其token用量"""
+        self.history.append({"role": "user", "content": question})
+        self.history.append({"role": "assistant", "content": answer})
+        self.usage_log.append(usage)
+
+    def total_usage(self):
+        """汇总整个会话的token用量"""
+        prompt_tokens = sum(u.get('prompt_tokens', 0) for u in self.usage_log)
+        completion_tokens = sum(u.get('completion_tokens', 0) for u in self.usage_log)
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'calls': len(self.usage_log)
+        }
+
+    def reset(self):
+        """清空会话历史"""
+        self.history = []
+        self.summary = ""
+        self.usage_log = []
+
 class AIAssistant(QObject):
     """AI智能助手 - DeepSeek API调用"""
     
@@ -52,11 +193,52 @@ class AIAssistant(QObject):
             user_question=user_question
         )
     
+    def start_session(self, problem_type, difficulty, context_budget=3000, max_tokens=1000):
+        """开始一个新的多轮辅导会话"""
+        return ChatSession(problem_type, difficulty, context_budget=context_budget, max_tokens=max_tokens)
+
+    def ask(self, session, question):
+        """在会话中提问，返回 (success, response, usage)"""
+        messages = session.build_messages(question)
+        success, response, usage = self.call_deepseek_chat(messages, max_tokens=session.max_tokens)
+        if success:
+            # 历史中保存实际发送的问题
+            session.record(messages[-1]["content"], response, usage)
+        return success, response, usage
+
     def call_deepseek_api(self, prompt, max_tokens=1000):
-        """调用DeepSeek API"""
+        """调用DeepSeek API（单轮）"""
+        success, response, _ = self.call_deepseek_chat(
+            [{"role": "user", "content": prompt}],
+            max_tokens=max_tokens
+        )
+        return success, response
+
+    def parse_usage(self, result, messages, response_text):
+        """读取API返回的token用量，缺失时用估算值代替"""
+        usage = result.get('usage') or {}
+        prompt_tokens = usage.get('prompt_tokens')
+        completion_tokens = usage.get('completion_tokens')
+        estimated = prompt_tokens is None or completion_tokens is None
+        if prompt_tokens is None:
+            prompt_tokens = sum(estimate_tokens(m["content"]) + ChatSession.MESSAGE_OVERHEAD for m in messages)
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(response_text)
+
+        finish_reason = result['choices'][0].get('finish_reason') if result.get('choices') else None
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'estimated': estimated,
+            'truncated': finish_reason == 'length'
+        }
+
+    def call_deepseek_chat(self, messages, max_tokens=1000):
+        """调用DeepSeek API（多轮消息），返回 (success, response, usage)"""
         is_valid, message = self.validate_api_key()
         if not is_valid:
-            return False, message
+            return False, message, {}
         
         headers = {
             "Content-Type": "application/json",
@@ -65,12 +247,7 @@ class AIAssistant(QObject):
         
         data = {
             "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+            "messages": messages,
             "max_tokens": max_tokens,
             "temperature": 0.7,
             "stream": False
@@ -78,7 +255,7 @@ class AIAssistant(QObject):
         
         for attempt in range(self.max_retries):
             try:
-                print(f"正在调用DeepSeek API (尝试 {attempt + 1}/{self.max_retries})...")
+                logger.debug("正在调用DeepSeek API (尝试 %d/%d)...", attempt + 1, self.max_retries)
                 
                 response = requests.post(
                     self.base_url,
@@ -91,22 +268,22 @@ class AIAssistant(QObject):
                     result = response.json()
                     if 'choices' in result and len(result['choices']) > 0:
                         ai_response = result['choices'][0]['message']['content']
-                        return True, ai_response
+                        return True, ai_response, self.parse_usage(result, messages, ai_response)
                     else:
-                        return False, "API返回数据格式错误"
+                        return False, "API返回数据格式错误", {}
                         
                 elif response.status_code == 401:
-                    return False, "API密钥无效，请检查密钥是否正确"
+                    return False, "API密钥无效，请检查密钥是否正确", {}
                     
                 elif response.status_code == 429:
-                    return False, "请求过于频繁，请稍后再试"
+                    return False, "请求过于频繁，请稍后再试", {}
                     
                 elif response.status_code == 500:
                     if attempt < self.max_retries - 1:
-                        print(f"服务器错误，{self.retry_delay}秒后重试...")
+                        logger.warning("服务器错误，%s秒后重试...", self.retry_delay)
                         time.sleep(self.retry_delay)
                         continue
-                    return False, "服务器内部错误，请稍后再试"
+                    return False, "服务器内部错误，请稍后再试", {}
                     
                 else:
                     error_msg = f"API调用失败，状态码: {response.status_code}"
@@ -116,22 +293,22 @@ class AIAssistant(QObject):
                             error_msg += f"，错误信息: {error_detail['error']}"
                     except:
                         pass
-                    return False, error_msg
+                    return False, error_msg, {}
                     
             except requests.exceptions.Timeout:
                 if attempt < self.max_retries - 1:
-                    print(f"请求超时，{self.retry_delay}秒后重试...")
+                    logger.warning("请求超时，%s秒后重试...", self.retry_delay)
                     time.sleep(self.retry_delay)
                     continue
-                return False, "请求超时，请检查网络连接"
+                return False, "请求超时，请检查网络连接", {}
                 
             except requests.exceptions.ConnectionError:
-                return False, "网络连接错误，请检查网络设置"
+                return False, "网络连接错误，请检查网络设置", {}
                 
             except Exception as e:
-                return False, f"未知错误: {str(e)}"
+                return False, f"未知错误: {str(e)}", {}
         
-        return False, "多次重试后仍然失败"
+        return False, "多次重试后仍然失败", {}
 
 
 class AIWorker(QThread):
@@ -140,32 +317,41 @@ class AIWorker(QThread):
     # 定义信号
     response_ready = pyqtSignal(bool, str)  # success, response
     progress_update = pyqtSignal(str)  # status message
+    usage_ready = pyqtSignal(dict)  # token usage of this call
     
-    def __init__(self, ai_assistant, problem_type, difficulty, user_question):
+    def __init__(self, ai_assistant, problem_type, difficulty, user_question, session=None):
         super().__init__()
         self.ai_assistant = ai_assistant
         self.problem_type = problem_type
         self.difficulty = difficulty
         self.user_question = user_question
+        self.session = session  # 多轮会话，为None时按单轮提问
     
     def run(self):
         """在后台线程中执行AI调用"""
         try:
-            # 更新进度
-            self.progress_update.emit("正在生成AI提示词...")
-            
-            # 生成提示词
-            prompt = self.ai_assistant.generate_math_prompt(
-                self.problem_type, 
-                self.difficulty, 
-                self.user_question
-            )
-            
-            # 更新进度
-            self.progress_update.emit("正在调用DeepSeek API...")
-            
-            # 调用API
-            success, response = self.ai_assistant.call_deepseek_api(prompt)
+            if self.session is not None:
+                # 多轮会话：带上历史上下文
+                self.progress_update.emit("正在调用DeepSeek API...")
+                success, response, usage = self.ai_assistant.ask(self.session, self.user_question)
+                if usage:
+                    self.usage_ready.emit(usage)
+            else:
+                # 更新进度
+                self.progress_update.emit("正在生成AI提示词...")
+
+                # 生成提示词
+                prompt = self.ai_assistant.generate_math_prompt(
+                    self.problem_type,
+                    self.difficulty,
+                    self.user_question
+                )
+
+                # 更新进度
+                self.progress_update.emit("正在调用DeepSeek API...")
+
+                # 调用API
+                success, response = self.ai_assistant.call_deepseek_api(prompt)
             
             # 发送结果
             if success:
@@ -0,0 +1,157 @@
+import numpy as np
+
+from numeric import answers_equal, format_number, normalize, parse_number
+
+# 每道题的批改状态
+STATUS_CORRECT = 0  # 正确
+STATUS_WRONG = 1  # 错误
+STATUS_INVALID = 2  # 答案格式错误
+STATUS_MISSING = 3  # 未作答
+
+# 无法解析的答案在整数数组中的占位值
+INVALID_ANSWER = np.iinfo(np.int64).min
+# 能解析但不是整数的答案（如 3.5），按错误处理
+NON_INTEGER_ANSWER = INVALID_ANSWER + 1
+# 能放进数组的答案范围（两个占位值除外）
+MIN_ANSWER = NON_INTEGER_ANSWER + 1
+MAX_ANSWER = np.iinfo(np.int64).max
+
+
+def answer_lines(answer_text, count):
+    """把答题文本切成count行（多的丢弃，少的补空行）"""
+    lines = [line.strip() for line in answer_text.strip().split('\n')[:count]]
+    return lines + [''] * (count - len(lines))
+
+
+def parse_answers(answer_text, count):
+    """一次性把答题文本（每行一个答案）解析为长度为count的整数数组
+
+    返回 (answers, present)：answers为int64数组，无法解析的位置为INVALID_ANSWER，非整数答案为NON_INTEGER_ANSWER；
+    present标记该行是否有填写内容。
+    """
+    lines = answer_lines(answer_text, count)
+    present = np.fromiter((line != '' for line in lines), dtype=bool, count=count)
+
+    try:
+        # 快速路径：全部都是合法整数时由numpy一次完成转换
+        answers = np.array(lines, dtype=np.int64) if present.all() else None
+    except (ValueError, OverflowError):
+        answers = None
+
+    if answers is None:
+        answers = np.fromiter((_parse_int(line) for line in lines), dtype=np.int64, count=count)
+    return answers, present
+
+
+def _parse_int(text):
+    """解析单个答案，无法解析或超出int64范围时返回占位值；"6.0"、"12/2" 这类整数值的写法也接受"""
+    try:
+        value = int(text)
+    except (ValueError, OverflowError):
+        try:
+            value = normalize(parse_number(text))
+        except (ValueError, OverflowError):
+            return INVALID_ANSWER
+        if type(value) is not int:
+            return NON_INTEGER_ANSWER
+    return value if MIN_ANSWER <= value <= MAX_ANSWER else INVALID_ANSWER
+
+
+class CheckResult:
+    """计时练习批改结果 - 保存每道题的状态，报告文本按需生成"""
+
+    def __init__(self, answer_key, user_answers, statuses):
+        self.answer_key = answer_key  # 标准答案数组（有非整数答案时为列表）
+        self.user_answers = user_answers  # 用户答案数组（有非整数答案时为列表，无效答案为None）
+        self.statuses = statuses  # 每道题的状态（STATUS_*）
+
+    @property
+    def total(self):
+        return len(self.statuses)
+
+    @property
+    def correct_count(self):
+        return int(np.count_nonzero(self.statuses == STATUS_CORRECT))
+
+    @property
+    def score(self):
+        return self.correct_count * 10
+
+    @property
+    def accuracy(self):
+        return self.correct_count / self.total * 100 if self.total else 0.0
+
+    def items(self):
+        """逐题返回 (序号, 状态, 用户答案, 标准答案)，无效答案为None"""
+        exact = not isinstance(self.user_answers, np.ndarray)
+        for i in range(self.total):
+            status = int(self.statuses[i])
+            if status > STATUS_WRONG:
+                user_answer = None
+            elif exact:
+                user_answer = self.user_answers[i]
+            else:
+                user_answer = int(self.user_answers[i])
+                if user_answer == NON_INTEGER_ANSWER:
+                    user_answer = None
+            expected = self.answer_key[i]
+            yield i + 1, status, user_answer, expected if exact else int(expected)
+
+    def render_report(self, time_str=None):
+        """生成批改报告文本"""
+        lines = ["批改结果：", ""]
+        for number, status, user_answer, expected in self.items():
+            expected = format_number(expected)
+            if status == STATUS_CORRECT:
+                lines.append(f"第{number}题：✓ 正确")
+            elif status == STATUS_WRONG:
+                lines.append(f"第{number}题：✗ 错误，正确答案是 {expected}")
+            elif status == STATUS_INVALID:
+                lines.append(f"第{number}题：✗ 答案格式错误，正确答案是 {expected}")
+            else:
+                lines.append(f"第{number}题：✗ 未作答，正确答案是 {expected}")
+
+        lines.append("")
+        lines.append(f"总分：{self.score}分 ({self.correct_count}/{self.total}题正确)")
+        if time_str is not None:
+            lines.append(f"用时：{time_str}")
+        return "\n".join(lines)
+
+
+def check_answers(answer_text, answer_key):
+    """批改计时练习：解析全部答案后与标准答案数组整体比较
+
+    标准答案中有小数或分数时改为逐题精确比较（见 check_exact_answers）。
+    """
+    if not all(type(value) is int for value in answer_key):
+        return check_exact_answers(answer_text, answer_key)
+    key = np.asarray(answer_key, dtype=np.int64)
+    answers, present = parse_answers(answer_text, len(key))
+
+    statuses = np.full(len(key), STATUS_WRONG, dtype=np.uint8)
+    statuses[answers == key] = STATUS_CORRECT
+    statuses[answers == INVALID_ANSWER] = STATUS_INVALID
+    statuses[~present] = STATUS_MISSING
+    return CheckResult(key, answers, statuses)
+
+
+def check_exact_answers(answer_text, answer_key):
+    """逐题用 answers_equal 比较，答案可以是整数、小数或分数（0.5 与 1/2 相同）
+
+    结果中的 answer_key 和 user_answers 为列表，保留原来的数字类型。
+    """
+    count = len(answer_key)
+    user_answers = [None] * count
+    statuses = np.full(count, STATUS_WRONG, dtype=np.uint8)
+    for i, line in enumerate(answer_lines(answer_text, count)):
+        if not line:
+            statuses[i] = STATUS_MISSING
+            continue
+        try:
+            user_answers[i] = parse_number(line)
+        except (ValueError, OverflowError):
+            statuses[i] = STATUS_INVALID
+            continue
+        if answers_equal(user_answers[i], answer_key[i]):
+            statuses[i] = STATUS_CORRECT
+    return CheckResult(list(answer_key), user_answers, statuses)
@@ -0,0 +1,76 @@
+import logging
+import os
+import sys
+
+# 所有日志记录器的根名称，子系统为 mathpop.ocr / mathpop.ai / mathpop.storage / mathpop.ui
+ROOT_LOGGER_NAME = 'mathpop'
+SUBSYSTEMS = ('ocr', 'ai', 'storage', 'ui')
+
+# 日志级别配置的环境变量，例如 "INFO" 或 "WARNING,ocr=DEBUG"
+LOG_LEVEL_ENV = 'MATHPOP_LOG_LEVEL'
+LEVEL_NAMES = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+
+def get_logger(subsystem):
+    """获取子系统的日志记录器"""
+    return logging.getLogger(f'{ROOT_LOGGER_NAME}.{subsystem}')
+
+
+def parse_level_spec(spec):
+    """解析级别配置 "INFO,ocr=DEBUG"，返回 (默认级别, {子系统: 级别}, 错误信息列表)
+
+    无效的级别名和未知的子系统不生效，只记入错误信息；默认级别无效时保持 INFO。
+    """
+    default_level = logging.INFO
+    subsystem_levels = {}
+    errors = []
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '=' in part:
+            name, level = (item.strip() for item in part.split('=', 1))
+            if name not in SUBSYSTEMS:
+                errors.append(f"未知的子系统 {name!r}（可用：{', '.join(SUBSYSTEMS)}）")
+            elif level.upper() not in LEVEL_NAMES:
+                errors.append(f"无效的日志级别 {level!r}")
+            else:
+                subsystem_levels[name] = getattr(logging, level.upper())
+        elif part.upper() in LEVEL_NAMES:
+            default_level = getattr(logging, part.upper())
+        else:
+            errors.append(f"无效的日志级别 {part!r}")
+    return default_level, subsystem_levels, errors
+
+
+def configure_logging(level=None, stream=None, fmt=LOG_FORMAT):
+    """配置应用日志：level可以是级别名称或 "INFO,ocr=DEBUG" 形式，未指定时读取环境变量
+
+    配置中无效的部分被忽略，并在配置完成后输出一条警告。
+    """
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, 'INFO')
+    if isinstance(level, str):
+        default_level, subsystem_levels, errors = parse_level_spec(level)
+    else:
+        default_level, subsystem_levels, errors = level, {}, []
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    root.setLevel(default_level)
+    for subsystem, subsystem_level in subsystem_levels.items():
+        get_logger(subsystem).setLevel(subsystem_level)
+
+    # 重复调用时只保留一个处理器
+    for handler in list(root.handlers):
+        if getattr(handler, '_mathpop_handler', False):
+            root.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(fmt))
+    handler._mathpop_handler = True
+    root.addHandler(handler)
+    root.propagate = False
+    for error in errors:
+        root.warning("日志级别配置 %r 中有%s，已忽略", level, error)
+    return root
@@ -0,0 +1,37 @@
+import pytest
+
+from bench_ocr import SAMPLE_TEXT
+
+LINES = [line for line in SAMPLE_TEXT.split('\n') if line.strip()]
+
+
+def legacy_normalize_text(text, replacements):
+    """旧实现：逐个字符调用str.replace，每行30次扫描"""
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    return ' '.join(text.split())
+
+
+@pytest.mark.benchmark(group='normalize_text')
+def test_normalize_text_legacy(benchmark, ocr_grader):
+    replacements = ocr_grader.TEXT_REPLACEMENTS
+
+    def run():
+        for line in LINES:
+            legacy_normalize_text(line, replacements)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group='normalize_text')
+def test_normalize_text_translate(benchmark, ocr_grader):
+    def run():
+        for line in LINES:
+            ocr_grader.normalize_text(line)
+
+    benchmark(run)
+
+
+def test_normalize_text_matches_legacy(ocr_grader):
+    for line in LINES:
+        assert ocr_grader.normalize_text(line) == legacy_normalize_text(line, ocr_grader.TEXT_REPLACEMENTS)
@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import EXAMPLE_IMAGE
+
+SAMPLE_TEXT = "\n".join([
+    "9 + 3 = 12",
+    "10 - 4 = 6",
+    "7 × 9 = 63",
+    "6 ÷ 3 = ?",
+    "20 + 15 =",
+    "35",
+    "l2 x 4 = 48",
+    "garbage line",
+] * 25)
+
+
+def test_preprocess_image(benchmark, ocr_grader):
+    binary = benchmark(ocr_grader.preprocess_image, EXAMPLE_IMAGE)
+    assert binary.ndim == 2
+
+
+def test_preprocess_image_low_memory(benchmark):
+    """低内存预处理：复用缓冲区，记录缓冲区峰值"""
+    OCR = pytest.importorskip('OCR')
+    grader = OCR.OCRGrader(debug_image_path=None, low_memory=True)
+    binary = benchmark(grader.preprocess_image, EXAMPLE_IMAGE)
+    assert binary.ndim == 2
+    benchmark.extra_info['peak_memory'] = grader.last_peak_memory
+
+
+@pytest.mark.parametrize('config_index', range(5))
+def test_extract_text_per_config(benchmark, ocr_grader, config_index):
+    """单个Tesseract配置的识别耗时"""
+    if not ocr_grader.tesseract_available:
+        pytest.skip('Tesseract不可用')
+    import pytesseract
+
+    binary = ocr_grader.preprocess_image(EXAMPLE_IMAGE)
+    config = ocr_grader.OCR_CONFIGS[config_index]
+    benchmark.pedantic(pytesseract.image_to_data, args=(binary,),
+                       kwargs={'config': config, 'lang': 'eng',
+                               'output_type': pytesseract.Output.DICT}, rounds=3)
+
+
+def test_extract_text_all_configs(benchmark, ocr_grader):
+    """完整的多配置识别流程（Tesseract不可用时为模拟文本）"""
+    binary = ocr_grader.preprocess_image(EXAMPLE_IMAGE)
+    benchmark.pedantic(ocr_grader.extract_text, args=(binary,), rounds=3)
+
+
+def test_parse_problems_and_answers(benchmark, ocr_grader):
+    """解析200行OCR文本"""
+    problems, answers = benchmark(ocr_grader.parse_problems_and_answers, SAMPLE_TEXT)
+    assert problems and answers
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from answer_checker import check_answers
+from problem_generator import generate_problem, generate_operands
+from problem_sampler import ProblemSampler
+
+
+@pytest.mark.parametrize('difficulty', ['easy', 'medium', 'hard'])
+def test_generate_problem_throughput(benchmark, difficulty):
+    """生成1000道题"""
+    def run():
+        for _ in range(1000):
+            generate_problem(difficulty)
+
+    benchmark(run)
+
+
+def test_generate_operands_throughput(benchmark):
+    """生成1000组题目数据（不格式化文本）"""
+    def run():
+        for _ in range(1000):
+            generate_operands('medium')
+
+    benchmark(run)
+
+
+def test_sampler_draw_throughput(benchmark):
+    """不放回地抽1000道题（困难难度，题目空间约1.6万道）"""
+    sampler = ProblemSampler('hard')
+
+    def run():
+        for _ in range(1000):
+            sampler.draw()
+
+    benchmark(run)
+
+
+@pytest.mark.parametrize('count', [10, 500])
+def test_check_timed_answers(benchmark, count):
+    """批改计时练习（约1/5答错、1/20格式错误）"""
+    rng = random.Random(count)
+    answer_key = [rng.randint(0, 1000) for _ in range(count)]
+    lines = []
+    for answer in answer_key:
+        roll = rng.random()
+        if roll < 0.05:
+            lines.append('abc')
+        elif roll < 0.25:
+            lines.append(str(answer + 1))
+        else:
+            lines.append(str(answer))
+    answer_text = '\n'.join(lines)
+
+    result = benchmark(check_answers, answer_text, answer_key)
+    assert result.total == count
@@ -0,0 +1,48 @@
+import random
+
+import numpy as np
+import pytest
+
+PAGES = 4
+PROBLEMS_PER_PAGE = 6
+
+
+def make_pages():
+    """用不同字体合成带答案的作业页，返回 (页面列表, 题目总数)"""
+    from glyph_recognizer import GLYPH_FONTS, render_text
+    from problem_generator import generate_operands
+    from numeric import format_number
+
+    rng = random.Random(0)  # 固定种子让每次的页面相同
+    pages = []
+    for index in range(PAGES):
+        font = GLYPH_FONTS[index % len(GLYPH_FONTS)]
+        page = np.full((1100, 1400), 255, np.uint8)
+        for row in range(PROBLEMS_PER_PAGE):
+            a, op, b, answer = generate_operands('medium', rng=rng)
+            text = f'{format_number(a)} {op} {format_number(b)} = {format_number(answer)}'
+            mask, _ = render_text(text, font, 1.5, 2)
+            height, width = mask.shape
+            page[60 + row * 170:60 + row * 170 + height, 80:80 + width][mask >= 128] = 0
+        pages.append(page)
+    return pages
+
+
+@pytest.mark.parametrize('backend', ['tesseract', 'glyph'])
+def test_recognizer_accuracy_and_throughput(benchmark, backend):
+    """两种识别后端在合成作业上的批改正确率和每秒页数（页面上的答案都是对的）"""
+    OCR = pytest.importorskip('OCR')
+    grader = OCR.OCRGrader(debug_image_path=None, backend=backend)
+    if not grader.tesseract_available:
+        pytest.skip('Tesseract不可用')
+    pages = make_pages()
+    if backend == 'glyph':
+        grader.extract_lines(grader.preprocess_image(pages[0]))  # 训练分类器不计入耗时
+
+    def run():
+        return [grader.grade_homework(page) for page in pages]
+
+    results = benchmark.pedantic(run, rounds=3)
+    correct = sum(result.correct_count for result in results if result.is_real)
+    benchmark.extra_info['accuracy'] = correct / (PAGES * PROBLEMS_PER_PAGE)
+    benchmark.extra_info['pages_per_second'] = PAGES / benchmark.stats.stats.mean
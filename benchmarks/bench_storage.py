@@ -0,0 +1,31 @@
+import pytest
+
+import user_storage
+
+
+def make_user_data(user_count):
+    """构造指定用户数的用户数据，每个用户带几条成绩记录"""
+    user_data = {}
+    for i in range(user_count):
+        user_data[f'user{i}'] = {
+            'password': '123456',
+            'scores': {
+                'basic_practice': [{
+                    'score': 30, 'correct': 3, 'total': 3, 'accuracy': 100.0,
+                    'time': '00:15', 'timestamp': '2025-06-05 01:04:10'
+                }],
+                'timed_practice': [{'score': 80, 'time': '02:11', 'correct': 8, 'total': 10}]
+            }
+        }
+    return user_data
+
+
+@pytest.mark.parametrize('user_count', [10, 1000, 100000])
+def test_save_user_data(benchmark, tmp_path, user_count):
+    user_data = make_user_data(user_count)
+    path = str(tmp_path / 'user_data.json')
+    if user_count >= 100000:
+        benchmark.pedantic(user_storage.save_user_data, args=(path, user_data), rounds=3)
+    else:
+        benchmark(user_storage.save_user_data, path, user_data)
+    assert len(user_storage.load_user_data(path)) == user_count
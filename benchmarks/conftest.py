@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# 让基准测试可以直接导入项目根目录下的模块
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# 手写批改基准使用的示例图片
+EXAMPLE_IMAGE = os.path.join(ROOT_DIR, 'test_img', 'test_example.jpg')
+
+
+def pytest_collect_file(file_path, parent):
+    """只有传入 --benchmark-only 时才收集 bench_*.py，普通测试运行不受影响"""
+    if not (file_path.name.startswith('bench_') and file_path.suffix == '.py'):
+        return None
+    if parent.session.isinitpath(file_path):
+        return None  # 命令行直接指定的文件由pytest默认收集
+    if not parent.config.getoption('benchmark_only', default=False):
+        return None
+    return pytest.Module.from_parent(parent, path=file_path)
+
+
+@pytest.fixture(scope='session')
+def ocr_grader():
+    """不保存调试图片的OCR批改器"""
+    OCR = pytest.importorskip('OCR')
+    return OCR.OCRGrader(debug_image_path=None)
@@ -0,0 +1,227 @@
+import base64
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+
+from app_logging import get_logger
+
+logger = get_logger('storage')
+
+
+class ConversationStore:
+    """AI对话记录存储 - 每个用户一个固定容量的环形缓冲区，回答压缩保存，并建立全文索引
+
+    记录以追加方式写入独立的JSONL文件，不会改写用户成绩数据。文件中的过期记录
+    超过一定数量后会整体压缩重写一次，因此追加的均摊开销是O(1)。
+    """
+
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[一-鿿]+')
+
+    def __init__(self, path='ai_conversations.jsonl', capacity=50, compact_factor=2):
+        self.path = path
+        self.capacity = capacity  # 每个用户保留的对话条数
+        self.compact_factor = compact_factor  # 文件行数超过 存活记录数×该系数 时压缩
+        self.buffers = {}  # username -> [record or None] * capacity
+        self.next_seq = {}  # username -> 下一条记录的序号
+        self.index = {}  # token -> {(username, seq), ...}
+        self.file_lines = 0
+        self.load()
+
+    @classmethod
+    def tokenize(cls, text):
+        """切分索引词：英文单词和数字整体作为词，中文按单字和相邻两字切分"""
+        tokens = set()
+        for chunk in cls.TOKEN_PATTERN.findall(text.lower()):
+            if chunk[0] < '一':
+                tokens.add(chunk)
+                continue
+            tokens.update(chunk)
+            tokens.update(chunk[i:i + 2] for i in range(len(chunk) - 1))
+        return tokens
+
+    @staticmethod
+    def compress(text):
+        """压缩回答正文"""
+        return zlib.compress(text.encode('utf-8'))
+
+    @staticmethod
+    def decompress(data):
+        """解压回答正文"""
+        return zlib.decompress(data).decode('utf-8')
+
+    def load(self):
+        """从文件重放全部记录，旧记录会被环形缓冲区自然淘汰"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    self.file_lines += 1
+                    try:
+                        entry = json.loads(line)
+                        entry['answer_z'] = base64.b64decode(entry['answer_z'])
+                        entry['tokens'] = self.tokenize(
+                            entry['question'] + "\n" + self.decompress(entry['answer_z']))
+                    except (ValueError, KeyError, zlib.error):
+                        continue  # 跳过写了一半的损坏行
+                    self.insert(entry)
+        except Exception as e:
+            logger.error("加载AI对话记录失败: %s", e)
+
+    def insert(self, entry):
+        """把记录放入用户的环形缓冲区并更新索引"""
+        username = entry['user']
+        buffer = self.buffers.get(username)
+        if buffer is None:
+            buffer = self.buffers[username] = [None] * self.capacity
+            self.next_seq[username] = 0
+
+        seq = self.next_seq[username]
+        entry['seq'] = seq
+        slot = seq % self.capacity
+
+        evicted = buffer[slot]
+        if evicted is not None:
+            self.unindex(username, evicted)
+
+        buffer[slot] = entry
+        self.next_seq[username] = seq + 1
+        for token in entry['tokens']:
+            self.index.setdefault(token, set()).add((username, seq))
+
+    def unindex(self, username, entry):
+        """从索引中移除被淘汰的记录"""
+        key = (username, entry['seq'])
+        for token in entry['tokens']:
+            postings = self.index.get(token)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self.index[token]
+
+    def append(self, username, question, answer, problem_type='', difficulty='', timestamp=None):
+        """追加一条对话记录"""
+        entry = {
+            'user': username,
+            'timestamp': timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'question': question,
+            'answer_z': self.compress(answer),
+            'problem_type': problem_type,
+            'difficulty': difficulty,
+            'tokens': self.tokenize(question + "\n" + answer)
+        }
+        self.insert(entry)
+
+        self.write_line(entry)
+        if self.file_lines > self.compact_factor * max(self.live_count(), self.capacity):
+            self.compact()
+        return self.to_record(entry)
+
+    def write_line(self, entry):
+        """以追加方式写入一条记录"""
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(self.serialize(entry) + "\n")
+            self.file_lines += 1
+        except Exception as e:
+            logger.error("保存AI对话记录失败: %s", e)
+
+    def serialize(self, entry):
+        """把记录序列化为一行JSON"""
+        data = {key: value for key, value in entry.items() if key not in ('seq', 'tokens', 'answer_z')}
+        data['answer_z'] = base64.b64encode(entry['answer_z']).decode('ascii')
+        return json.dumps(data, ensure_ascii=False)
+
+    def compact(self):
+        """只保留环形缓冲区中仍然存活的记录，重写文件"""
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for username in self.buffers:
+                    for entry in self.iter_entries(username):
+                        f.write(self.serialize(entry) + "\n")
+            os.replace(tmp_path, self.path)
+            self.file_lines = self.live_count()
+        except Exception as e:
+            logger.error("压缩AI对话记录失败: %s", e)
+
+    def live_count(self):
+        """所有用户当前保留的记录总数"""
+        return sum(min(seq, self.capacity) for seq in self.next_seq.values())
+
+    def iter_entries(self, username):
+        """按时间顺序遍历用户的记录"""
+        buffer = self.buffers.get(username)
+        if buffer is None:
+            return
+        end = self.next_seq[username]
+        for seq in range(max(0, end - self.capacity), end):
+            yield buffer[seq % self.capacity]
+
+    def to_record(self, entry):
+        """转换为对外的对话记录（解压回答）"""
+        return {
+            'timestamp': entry['timestamp'],
+            'question': entry['question'],
+            'answer': self.decompress(entry['answer_z']),
+            'problem_type': entry.get('problem_type', ''),
+            'difficulty': entry.get('difficulty', '')
+        }
+
+    def count(self, username):
+        """用户当前保留的对话条数"""
+        return min(self.next_seq.get(username, 0), self.capacity)
+
+    def recent(self, username, limit=None):
+        """获取用户最近的对话记录（按时间从旧到新）"""
+        entries = list(self.iter_entries(username))
+        if limit is not None:
+            entries = entries[-limit:] if limit > 0 else []
+        return [self.to_record(entry) for entry in entries]
+
+    def search(self, username, query, limit=20):
+        """在用户的问题和回答中全文搜索，结果按时间从新到旧"""
+        tokens = self.tokenize(query)
+        if not tokens or username not in self.buffers:
+            return []
+
+        # 中文查询词有两个字以上时用双字词匹配，减少单字带来的误匹配
+        bigrams = {t for t in tokens if len(t) == 2 and t[0] >= '一'}
+        if bigrams:
+            tokens = {t for t in tokens if not (len(t) == 1 and t >= '一')}
+
+        postings = sorted((self.index.get(t, set()) for t in tokens), key=len)
+        matches = set(postings[0])
+        for other in postings[1:]:
+            matches &= other
+            if not matches:
+                return []
+
+        buffer = self.buffers[username]
+        seqs = sorted((seq for user, seq in matches if user == username), reverse=True)
+        return [self.to_record(buffer[seq % self.capacity]) for seq in seqs[:limit]]
+
+    def migrate_from_user_data(self, user_data):
+        """把旧版保存在user_data中的对话记录迁移到本存储，返回是否有数据被迁移"""
+        migrated = False
+        for username, info in user_data.items():
+            conversations = info.pop('ai_conversations', None) if isinstance(info, dict) else None
+            if conversations is None:
+                continue
+            migrated = True
+            for conversation in conversations:
+                self.append(
+                    username,
+                    conversation.get('question', ''),
+                    conversation.get('answer', ''),
+                    conversation.get('problem_type', ''),
+                    conversation.get('difficulty', ''),
+                    conversation.get('timestamp')
+                )
+        return migrated
@@ -0,0 +1,285 @@
+import operator
+import re
+from collections import namedtuple
+from decimal import Decimal
+from fractions import Fraction
+
+from numeric import normalize
+
+
+class ExpressionError(ValueError):
+    """表达式无法解析"""
+
+
+# 运算符: (优先级, 计算函数)
+BINARY_OPERATORS = {
+    '+': (1, operator.add),
+    '-': (1, operator.sub),
+    '*': (2, operator.mul),
+    '/': (2, operator.truediv),
+}
+OPERATOR_ALIASES = {'×': '*', '÷': '/'}
+
+# 括号配对，OCR白名单允许 ()[]{} 三种
+BRACKET_PAIRS = {'(': ')', '[': ']', '{': '}'}
+
+# 数字和括号本身的优先级，高于所有运算符
+ATOM_PRECEDENCE = 3
+
+# 输入上限，超出时抛出ExpressionError：单个数字的位数、括号和正负号的嵌套层数、一行的词法单元数
+# （解析和计算都是递归的，过深的嵌套或过长的算式会触发RecursionError）
+MAX_LITERAL_DIGITS = 30
+MAX_DEPTH = 50
+MAX_TOKENS = 200
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<num>\d+(?:\.\d+)?)
+  | (?P<op>[+\-*/×÷])
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<eq>[=＝])
+  | (?P<q>[?？])
+""", re.VERBOSE)
+
+Token = namedtuple('Token', 'kind value')
+
+# 一行的解析结果：kind 为 'complete'（有答案）、'question'（未作答）或 'answer'（单独的答案）
+ParsedLine = namedtuple('ParsedLine', 'kind expression answer')
+
+
+class Number:
+    """数字节点，value为int或Decimal（保留书写的小数位数）"""
+    __slots__ = ('value',)
+    precedence = ATOM_PRECEDENCE
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self):
+        return Fraction(self.value)
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return f'Number({self.value!r})'
+
+    def __eq__(self, other):
+        return isinstance(other, Number) and self.value == other.value
+
+    def __hash__(self):
+        return hash(('num', self.value))
+
+
+class Negate:
+    """取负节点，如 -3 或 -(2 + 1)"""
+    __slots__ = ('operand',)
+    precedence = ATOM_PRECEDENCE
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self):
+        return -self.operand.evaluate()
+
+    def __str__(self):
+        inner = str(self.operand)
+        if self.operand.precedence < ATOM_PRECEDENCE:
+            inner = f'({inner})'
+        return f'-{inner}'
+
+    def __repr__(self):
+        return f'Negate({self.operand!r})'
+
+    def __eq__(self, other):
+        return isinstance(other, Negate) and self.operand == other.operand
+
+    def __hash__(self):
+        return hash(('neg', self.operand))
+
+
+class BinaryOp:
+    """二元运算节点"""
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    @property
+    def precedence(self):
+        return BINARY_OPERATORS[self.op][0]
+
+    def evaluate(self):
+        """精确计算（分数），除数为0时抛出ZeroDivisionError"""
+        return BINARY_OPERATORS[self.op][1](self.left.evaluate(), self.right.evaluate())
+
+    def __str__(self):
+        left = str(self.left)
+        if self.left.precedence < self.precedence:
+            left = f'({left})'
+        right = str(self.right)
+        # 右侧同级的减法和除法也需要括号，如 8 - (3 - 1)
+        if (self.right.precedence < self.precedence
+                or (self.right.precedence == self.precedence and self.op in '-/')):
+            right = f'({right})'
+        return f'{left} {self.op} {right}'
+
+    def __repr__(self):
+        return f'BinaryOp({self.op!r}, {self.left!r}, {self.right!r})'
+
+    def __eq__(self, other):
+        return (isinstance(other, BinaryOp) and self.op == other.op
+                and self.left == other.left and self.right == other.right)
+
+    def __hash__(self):
+        return hash((self.op, self.left, self.right))
+
+
+def scan(text):
+    """逐个产生 (位置, 匹配)，跳过空白；无法识别的字符匹配为None"""
+    pos = 0
+    length = len(text)
+    while pos < length:
+        if text[pos].isspace():
+            pos += 1
+            continue
+        match = TOKEN_PATTERN.match(text, pos)
+        yield pos, match
+        pos = match.end() if match is not None else pos + 1
+
+
+def tokenize(text, strict=True):
+    """切分词法单元；strict=False 时跳过无法识别的字符（用于OCR噪声）"""
+    tokens = []
+    for pos, match in scan(text):
+        if match is None:
+            if strict:
+                raise ExpressionError(f"无法识别的字符: {text[pos]!r}")
+            continue
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'num':
+            if len(value) > MAX_LITERAL_DIGITS:
+                raise ExpressionError(f"数字过长: {len(value)} 位")
+            value = Decimal(value) if '.' in value else int(value)
+        elif kind == 'op':
+            value = OPERATOR_ALIASES.get(value, value)
+        tokens.append(Token(kind, value))
+        if len(tokens) > MAX_TOKENS:
+            raise ExpressionError("表达式过长")
+    return tokens
+
+
+def unknown_characters(text):
+    """tokenize(strict=False) 会跳过的字符数"""
+    return sum(1 for _, match in scan(text) if match is None)
+
+
+class Parser:
+    """优先级爬升（precedence climbing）表达式解析器"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def advance(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        """解析全部词法单元，必须恰好构成一个表达式"""
+        if not self.tokens:
+            raise ExpressionError("空表达式")
+        node = self.parse_expression(1)
+        if self.pos != len(self.tokens):
+            raise ExpressionError(f"多余的内容: {self.peek().value!r}")
+        return node
+
+    def parse_expression(self, min_precedence):
+        left = self.parse_primary()
+        while True:
+            token = self.peek()
+            if token is None or token.kind != 'op':
+                return left
+            precedence = BINARY_OPERATORS[token.value][0]
+            if precedence < min_precedence:
+                return left
+            self.advance()
+            # 左结合：右侧只接受更高优先级的运算
+            right = self.parse_expression(precedence + 1)
+            left = BinaryOp(token.value, left, right)
+
+    def parse_primary(self):
+        token = self.advance()
+        if token is None:
+            raise ExpressionError("表达式不完整")
+        if token.kind == 'num':
+            return Number(token.value)
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ExpressionError("括号或正负号嵌套过深")
+        try:
+            if token.kind == 'op' and token.value == '-':
+                return Negate(self.parse_primary())
+            if token.kind == 'op' and token.value == '+':
+                return self.parse_primary()
+            if token.kind == 'open':
+                node = self.parse_expression(1)
+                closing = self.advance()
+                if closing is None or closing.kind != 'close' or closing.value != BRACKET_PAIRS[token.value]:
+                    raise ExpressionError("括号不匹配")
+                return node
+            raise ExpressionError(f"意外的符号: {token.value!r}")
+        finally:
+            self.depth -= 1
+
+
+def parse_expression(text, strict=True):
+    """把文本解析为表达式树"""
+    return Parser(tokenize(text, strict)).parse()
+
+
+def parse_line(text, strict=True):
+    """解析一行作业：返回ParsedLine，无法解析时抛出ExpressionError
+
+    支持 "3 + 4 × 2 = 11"、"(3 + 4) × 2 = ?"、"12 + 8 =" 以及单独的答案 "20"。
+    """
+    tokens = tokenize(text, strict)
+    eq_index = next((i for i, token in enumerate(tokens) if token.kind == 'eq'), None)
+
+    if eq_index is None:
+        expression = Parser(tokens).parse()
+        if isinstance(expression, (Number, Negate)):
+            return ParsedLine('answer', None, expression)
+        return ParsedLine('question', expression, None)
+
+    left, right = tokens[:eq_index], tokens[eq_index + 1:]
+    if not left:
+        # "= 12"：只识别到了答案部分
+        return ParsedLine('answer', None, Parser(right).parse())
+
+    expression = Parser(left).parse()
+    if all(token.kind == 'q' for token in right):
+        return ParsedLine('question', expression, None)
+    return ParsedLine('complete', expression, Parser(right).parse())
+
+
+def evaluate(node):
+    """精确计算表达式的值，整数结果返回int，其余返回Fraction"""
+    return normalize(node.evaluate())
+
+
+def answer_value(node):
+    """答案的值：单个数字保留书写形式（小数位数用于容差判断），其余精确计算"""
+    if isinstance(node, Number):
+        return node.value
+    if isinstance(node, Negate) and isinstance(node.operand, Number):
+        return -node.operand.value
+    return evaluate(node)
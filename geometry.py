@@ -0,0 +1,168 @@
+import cv2
+import numpy as np
+
+# 在缩小到该尺寸（长边像素）的副本上做检测，检测结果再换算回原图
+DETECT_MAX_SIDE = 800
+
+# 小于该角度（度）的倾斜不做旋转，避免无意义的插值
+MIN_SKEW_ANGLE = 0.5
+MAX_SKEW_ANGLE = 45.0
+
+# 纸张轮廓至少占画面的比例，才认为拍到了整页纸
+MIN_PAGE_AREA_RATIO = 0.3
+
+
+class GeometryCorrection:
+    """几何校正结果：method 为 'none'、'rotate' 或 'perspective'"""
+
+    def __init__(self, method='none', angle=0.0, quad=None, size=None):
+        self.method = method
+        self.angle = angle  # 旋转校正的角度（度，逆时针为正）
+        self.quad = quad  # 透视校正时原图中纸张的四个角点（左上、右上、右下、左下）
+        self.size = size  # 校正后的 (宽, 高)
+
+    @property
+    def applied(self):
+        return self.method != 'none'
+
+    def to_dict(self):
+        return {
+            'method': self.method,
+            'angle': round(self.angle, 2),
+            'quad': None if self.quad is None else [[round(float(x)), round(float(y))] for x, y in self.quad],
+            'size': self.size
+        }
+
+    def __repr__(self):
+        return f'GeometryCorrection({self.to_dict()!r})'
+
+
+def downsample(gray, max_side=DETECT_MAX_SIDE):
+    """缩小图片用于检测，返回 (小图, 缩放比例)"""
+    height, width = gray.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale == 1.0:
+        return gray, scale
+    small = cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def order_corners(points):
+    """把四个角点排成 左上、右上、右下、左下"""
+    points = np.asarray(points, dtype=np.float32).reshape(4, 2)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+
+def find_page_quad(small):
+    """在小图上寻找纸张的四边形轮廓，找不到或纸张已经铺满画面时返回None"""
+    height, width = small.shape[:2]
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    edges = cv2.Canny(blurred, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    contour = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(contour) < MIN_PAGE_AREA_RATIO * width * height:
+        return None
+    approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+    if len(approx) != 4 or not cv2.isContourConvex(approx):
+        return None
+
+    quad = order_corners(approx)
+    # 四个角都贴着画面边缘时说明本来就是平整的扫描件
+    image_corners = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], np.float32)
+    if np.all(np.abs(quad - image_corners) <= 0.02 * max(width, height)):
+        return None
+    return quad
+
+
+def estimate_skew(small):
+    """用文字行轮廓的最小外接矩形估计倾斜角（度），文字行太少时返回None"""
+    height, width = small.shape[:2]
+    _, binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # 横向闭运算把同一行的字符连成条带
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 30), 3))
+    bands = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(bands, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    angles = []
+    weights = []
+    for contour in contours:
+        _, (w, h), angle = cv2.minAreaRect(contour)
+        length, thickness = max(w, h), min(w, h)
+        if length < width / 8 or length < 3 * thickness:
+            continue  # 不是细长的文字行
+        # 统一成长边相对水平方向的角度
+        if w < h:
+            angle -= 90
+        angle = (angle + 90) % 180 - 90
+        if abs(angle) <= MAX_SKEW_ANGLE:
+            angles.append(angle)
+            weights.append(length)
+    if len(angles) < 2:
+        return None
+
+    # 按长度加权的中位数，少量误检的条带不会带偏结果
+    order = np.argsort(angles)
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    median_index = order[np.searchsorted(cumulative, cumulative[-1] / 2)]
+    return angles[median_index]
+
+
+def warp_perspective(gray, quad):
+    """把纸张四边形拉正为矩形"""
+    top_left, top_right, bottom_right, bottom_left = quad
+    width = round(max(np.linalg.norm(top_right - top_left), np.linalg.norm(bottom_right - bottom_left)))
+    height = round(max(np.linalg.norm(bottom_left - top_left), np.linalg.norm(bottom_right - top_right)))
+    target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], np.float32)
+    matrix = cv2.getPerspectiveTransform(quad, target)
+    warped = cv2.warpPerspective(gray, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                                 borderMode=cv2.BORDER_REPLICATE)
+    return warped, (width, height)
+
+
+def rotate(gray, angle):
+    """旋转图片并扩展画布，避免四角被裁掉；空白处用边缘像素填充"""
+    height, width = gray.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(height * sin + width * cos)
+    new_height = int(height * cos + width * sin)
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    rotated = cv2.warpAffine(gray, matrix, (new_width, new_height), flags=cv2.INTER_LINEAR,
+                             borderMode=cv2.BORDER_REPLICATE)
+    return rotated, (new_width, new_height)
+
+
+def correct_geometry(gray, max_side=DETECT_MAX_SIDE):
+    """检测并校正手机拍照带来的透视变形或倾斜，原图只做一次变换
+
+    先在缩小的副本上找纸张四边形，找到则做透视校正；否则用文字行估计倾斜角并旋转。
+    返回 (校正后的灰度图, GeometryCorrection)。
+    """
+    small, scale = downsample(gray, max_side)
+
+    quad = find_page_quad(small)
+    if quad is not None:
+        quad = quad / scale
+        warped, size = warp_perspective(gray, quad)
+        return warped, GeometryCorrection('perspective', quad=quad, size=size)
+
+    angle = estimate_skew(small)
+    if angle is not None and abs(angle) >= MIN_SKEW_ANGLE:
+        # 图像坐标y轴向下，文字行的角度为正表示顺时针倾斜，按同样角度逆时针转回
+        rotated, size = rotate(gray, angle)
+        return rotated, GeometryCorrection('rotate', angle=angle, size=size)
+
+    height, width = gray.shape[:2]
+    return gray, GeometryCorrection(size=(width, height))
@@ -0,0 +1,393 @@
+import threading
+
+import cv2
+import numpy as np
+
+from app_logging import get_logger
+from ocr_confidence import COLUMN_GAP, OCRLine
+
+logger = get_logger('ocr')
+
+# 可识别的字符：数字、运算符、括号和问号（小数点按位置规则判断，不参与分类）
+GLYPH_LABELS = '0123456789+-×÷*/=()?'
+
+# MNIST式的归一化：字符按长边缩放到20像素，居中放在28x28的画布上
+GLYPH_SIZE = 28
+GLYPH_BOX = 20
+
+# 训练用的Hershey字体，包括两种手写体
+GLYPH_FONTS = (
+    cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_COMPLEX,
+    cv2.FONT_HERSHEY_TRIPLEX, cv2.FONT_HERSHEY_PLAIN,
+    cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, cv2.FONT_HERSHEY_SCRIPT_COMPLEX,
+)
+
+# Hershey字体之外常见的写法，坐标以字高为单位：折线为点列表，椭圆为 ('ellipse', 中心, 半轴)
+STROKE_VARIANTS = {
+    '1': [[[(0.1, 0.25), (0.4, 0.0), (0.4, 1.0)]],
+          [[(0.1, 0.25), (0.4, 0.0), (0.4, 1.0)], [(0.1, 1.0), (0.7, 1.0)]]],
+    '4': [[[(0.45, 0.0), (0.05, 0.7), (0.65, 0.7)], [(0.45, 0.35), (0.45, 1.0)]]],
+    '7': [[[(0.05, 0.0), (0.6, 0.0), (0.2, 1.0)], [(0.15, 0.5), (0.55, 0.5)]]],
+    '9': [[('ellipse', (0.3, 0.28), (0.26, 0.27)), [(0.56, 0.28), (0.5, 1.0)]]],
+    '6': [[('ellipse', (0.32, 0.7), (0.27, 0.29)), [(0.55, 0.05), (0.3, 0.12), (0.1, 0.38), (0.05, 0.7)]],
+          [('ellipse', (0.32, 0.68), (0.27, 0.31)), [(0.58, 0.18), (0.45, 0.02), (0.25, 0.04), (0.1, 0.25), (0.05, 0.68)]]],
+}
+
+# 分类器规模和训练参数
+HIDDEN_UNITS = 128
+SAMPLES_PER_LABEL = 400
+TRAIN_EPOCHS = 12
+BATCH_SIZE = 64
+LEARNING_RATE = 0.05
+TRAIN_SEED = 0
+
+# 切分参数
+MIN_COMPONENT_AREA = 6  # 小于该面积（像素）的连通域视为噪点
+NOISE_AREA = 0.004  # 面积小于字高平方的该倍数的连通域（JPEG压缩留下的斑点）视为噪点
+MAX_LINE_HEIGHT_RATIO = 0.25  # 高于图片高度该比例的连通域（表格线、边框）不是字符
+SPACE_GAP = 0.6  # 字符间距超过行高的该倍数时插入空格
+DOT_SIZE = 0.35  # 宽高都小于行高的该倍数、位于行的下部的字符是小数点
+
+
+def render_text(text, font=cv2.FONT_HERSHEY_SIMPLEX, scale=1.0, thickness=2):
+    """把一行文字画成二值掩码（字符为255），返回 (掩码, 基线y坐标)
+
+    Hershey字体没有 × 和 ÷，这两个符号按 + 的大小用线段和圆点画出。
+    """
+    plus_width = cv2.getTextSize('+', font, scale, thickness)[0][0]
+    (_, digit_height), descent = cv2.getTextSize('0', font, scale, thickness)
+    margin = thickness + 2
+    widths = []
+    for char in text:
+        if char in '×÷':
+            widths.append(plus_width)
+        else:
+            widths.append(cv2.getTextSize(char, font, scale, thickness)[0][0])
+    height = digit_height + descent + 2 * margin
+    mask = np.zeros((height, sum(widths) + 2 * margin), np.uint8)
+    baseline = margin + digit_height
+
+    x = margin
+    for char, width in zip(text, widths):
+        center = (x + width // 2, baseline - digit_height // 2)
+        half = max(2, round(0.35 * digit_height))
+        if char == '×':
+            cv2.line(mask, (center[0] - half, center[1] - half), (center[0] + half, center[1] + half), 255, thickness)
+            cv2.line(mask, (center[0] - half, center[1] + half), (center[0] + half, center[1] - half), 255, thickness)
+        elif char == '÷':
+            cv2.line(mask, (center[0] - half, center[1]), (center[0] + half, center[1]), 255, thickness)
+            dot = max(1, thickness)
+            cv2.circle(mask, (center[0], center[1] - half + dot), dot, 255, -1)
+            cv2.circle(mask, (center[0], center[1] + half - dot), dot, 255, -1)
+        elif not char.isspace():
+            cv2.putText(mask, char, (x, baseline), font, scale, 255, thickness, cv2.LINE_AA)
+        x += width
+    return mask, baseline
+
+
+def normalize_glyph(mask):
+    """把一个字符的掩码归一化为28x28的浮点数组（0~1）"""
+    ys, xs = np.nonzero(mask)
+    glyph = np.zeros((GLYPH_SIZE, GLYPH_SIZE), np.float32)
+    if len(xs) == 0:
+        return glyph
+    crop = mask[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+    height, width = crop.shape
+    scale = GLYPH_BOX / max(height, width)
+    new_width = max(1, round(width * scale))
+    new_height = max(1, round(height * scale))
+    crop = cv2.resize(crop, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    top = (GLYPH_SIZE - new_height) // 2
+    left = (GLYPH_SIZE - new_width) // 2
+    glyph[top:top + new_height, left:left + new_width] = crop / 255.0
+    return glyph
+
+
+def draw_strokes(strokes, height, thickness):
+    """按STROKE_VARIANTS中的笔画画出一个字符"""
+    margin = thickness + 2
+    mask = np.zeros((height + 2 * margin, height + 2 * margin), np.uint8)
+
+    def point(x, y):
+        return round(margin + x * height), round(margin + y * height)
+
+    for stroke in strokes:
+        if stroke[0] == 'ellipse':
+            _, center, axes = stroke
+            cv2.ellipse(mask, point(*center), (round(axes[0] * height), round(axes[1] * height)),
+                        0, 0, 360, 255, thickness, cv2.LINE_AA)
+        else:
+            cv2.polylines(mask, [np.array([point(x, y) for x, y in stroke], np.int32)], False, 255,
+                          thickness, cv2.LINE_AA)
+    return mask
+
+
+def synthetic_glyph(label, rng):
+    """随机字体（或手写笔画）、粗细和仿射抖动生成一个训练样本"""
+    thickness = int(rng.integers(1, 5))
+    variants = STROKE_VARIANTS.get(label)
+    if variants and rng.random() < 0.4:
+        mask = draw_strokes(variants[rng.integers(len(variants))], int(rng.integers(28, 56)), thickness)
+    else:
+        font = GLYPH_FONTS[rng.integers(len(GLYPH_FONTS))]
+        mask, _ = render_text(label, font, rng.uniform(1.2, 2.2), thickness)
+    height, width = mask.shape
+    mask = cv2.copyMakeBorder(mask, height // 2, height // 2, width, width, cv2.BORDER_CONSTANT, value=0)
+
+    # 旋转、倾斜和横向伸缩，模拟手写的变化
+    height, width = mask.shape
+    angle = np.deg2rad(rng.uniform(-12, 12))
+    shear = rng.uniform(-0.3, 0.3)
+    stretch = rng.uniform(0.75, 1.25)
+    linear = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    linear = linear @ np.array([[stretch, shear], [0, 1]])
+    center = np.array([width / 2, height / 2])
+    matrix = np.hstack([linear, (center - linear @ center)[:, None]])
+    mask = cv2.warpAffine(mask, matrix, (width, height))
+
+    # 笔画粗细变化
+    kernel = np.ones((2, 2), np.uint8)
+    change = rng.integers(3)
+    if change == 1:
+        mask = cv2.dilate(mask, kernel)
+    elif change == 2 and np.count_nonzero(cv2.erode(mask, kernel)) > 0:
+        mask = cv2.erode(mask, kernel)
+    # 和预处理一样放大两倍后自适应二值化：粗笔画会变成空心轮廓，训练样本里也要有
+    gray = cv2.resize(255 - mask, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    return normalize_glyph(255 - binary)
+
+
+def synthetic_dataset(samples_per_label=SAMPLES_PER_LABEL, seed=TRAIN_SEED):
+    """生成训练集，返回 (X, y)，X为 (N, 784)"""
+    rng = np.random.default_rng(seed)
+    features = []
+    targets = []
+    for index, label in enumerate(GLYPH_LABELS):
+        for _ in range(samples_per_label):
+            features.append(synthetic_glyph(label, rng).ravel())
+            targets.append(index)
+    return np.array(features, np.float32), np.array(targets)
+
+
+class GlyphClassifier:
+    """单隐层的字符分类器，纯NumPy推理，只需要CPU"""
+
+    def __init__(self, w1, b1, w2, b2):
+        self.w1 = w1
+        self.b1 = b1
+        self.w2 = w2
+        self.b2 = b2
+
+    @classmethod
+    def train(cls, samples_per_label=SAMPLES_PER_LABEL, epochs=TRAIN_EPOCHS, seed=TRAIN_SEED):
+        """用合成的字符样本训练（小批量动量SGD），固定随机种子，结果可复现"""
+        features, targets = synthetic_dataset(samples_per_label, seed)
+        rng = np.random.default_rng(seed)
+        inputs = features.shape[1]
+        w1 = (rng.standard_normal((inputs, HIDDEN_UNITS)) * np.sqrt(2 / inputs)).astype(np.float32)
+        b1 = np.zeros(HIDDEN_UNITS, np.float32)
+        w2 = (rng.standard_normal((HIDDEN_UNITS, len(GLYPH_LABELS))) * np.sqrt(2 / HIDDEN_UNITS)).astype(np.float32)
+        b2 = np.zeros(len(GLYPH_LABELS), np.float32)
+        params = [w1, b1, w2, b2]
+        velocity = [np.zeros_like(param) for param in params]
+        onehot = np.eye(len(GLYPH_LABELS), dtype=np.float32)[targets]
+
+        for epoch in range(epochs):
+            order = rng.permutation(len(features))
+            rate = LEARNING_RATE * (0.5 ** (epoch // 4))
+            for start in range(0, len(order), BATCH_SIZE):
+                batch = order[start:start + BATCH_SIZE]
+                x = features[batch]
+                hidden = np.maximum(x @ w1 + b1, 0)
+                probs = softmax(hidden @ w2 + b2)
+                d_logits = (probs - onehot[batch]) / len(batch)
+                d_hidden = (d_logits @ w2.T) * (hidden > 0)
+                grads = [x.T @ d_hidden, d_hidden.sum(axis=0), hidden.T @ d_logits, d_logits.sum(axis=0)]
+                for param, step, grad in zip(params, velocity, grads):
+                    step *= 0.9
+                    step -= rate * grad
+                    param += step
+        logger.debug("字符分类器训练完成: %d个样本", len(features))
+        return cls(w1, b1, w2, b2)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['w1'], data['b1'], data['w2'], data['b2'])
+
+    def save(self, path):
+        np.savez_compressed(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2)
+
+    def predict(self, glyphs):
+        """glyphs为 (N, 28, 28)，返回 (字符列表, 置信度数组0~1)"""
+        if len(glyphs) == 0:
+            return [], np.zeros(0, np.float32)
+        x = np.asarray(glyphs, np.float32).reshape(len(glyphs), -1)
+        probs = softmax(np.maximum(x @ self.w1 + self.b1, 0) @ self.w2 + self.b2)
+        best = probs.argmax(axis=1)
+        return [GLYPH_LABELS[i] for i in best], probs[np.arange(len(best)), best]
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+_default_classifier = None
+_default_lock = threading.Lock()
+
+
+def default_classifier():
+    """进程内共享的分类器，第一次使用时训练（约几秒）"""
+    global _default_classifier
+    with _default_lock:
+        if _default_classifier is None:
+            _default_classifier = GlyphClassifier.train()
+        return _default_classifier
+
+
+class GlyphRecognizer:
+    """连通域切分 + 字符分类的手写识别后端，输出与Tesseract后端相同的OCRLine"""
+
+    def __init__(self, classifier=None):
+        self.classifier = classifier  # 为None时使用共享的默认分类器
+
+    def recognize(self, binary):
+        """binary为预处理后的二值图（白底黑字），返回按顶部坐标排序的OCRLine列表"""
+        classifier = self.classifier or default_classifier()
+        ink = (binary < 128).astype(np.uint8)
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+        max_height = MAX_LINE_HEIGHT_RATIO * binary.shape[0]
+        components = [
+            (stats[i, cv2.CC_STAT_LEFT], stats[i, cv2.CC_STAT_TOP],
+             stats[i, cv2.CC_STAT_LEFT] + stats[i, cv2.CC_STAT_WIDTH],
+             stats[i, cv2.CC_STAT_TOP] + stats[i, cv2.CC_STAT_HEIGHT], i)
+            for i in range(1, count)
+            if stats[i, cv2.CC_STAT_AREA] >= MIN_COMPONENT_AREA and stats[i, cv2.CC_STAT_HEIGHT] <= max_height
+        ]
+        if not components:
+            return []
+        min_area = NOISE_AREA * char_height(components) ** 2
+        components = [c for c in components if stats[c[4], cv2.CC_STAT_AREA] >= min_area]
+
+        lines = []
+        for row in group_rows(components):
+            lines.extend(self.read_row(row, labels, classifier))
+        lines.sort(key=lambda line: line.top)
+        return lines
+
+    def read_row(self, row, labels, classifier):
+        """识别同一行的字符，间距很大的地方拆成不同的行（两栏排版）"""
+        glyphs = merge_glyphs(row)
+        top = min(glyph[1] for glyph in glyphs)
+        bottom = max(glyph[3] for glyph in glyphs)
+        line_height = max(1, bottom - top)
+
+        # 小数点按位置判断，其余字符交给分类器
+        samples = []
+        for left, glyph_top, right, glyph_bottom, ids in glyphs:
+            if not is_dot(left, glyph_top, right, glyph_bottom, top, line_height):
+                crop = np.isin(labels[glyph_top:glyph_bottom, left:right], ids).astype(np.uint8) * 255
+                samples.append(normalize_glyph(crop))
+        chars, probs = classifier.predict(samples)
+        chars = iter(zip(chars, probs))
+
+        lines = []
+        segment = []
+        previous_right = None
+        for left, glyph_top, right, glyph_bottom, ids in glyphs:
+            gap = 0 if previous_right is None else left - previous_right
+            if segment and gap > COLUMN_GAP * line_height:
+                lines.append(make_line(segment))
+                segment = []
+            if is_dot(left, glyph_top, right, glyph_bottom, top, line_height):
+                char, prob = '.', None
+            else:
+                char, prob = next(chars)
+            segment.append((char, prob, gap > SPACE_GAP * line_height, left, glyph_top, right, glyph_bottom))
+            previous_right = right
+        lines.append(make_line(segment))
+        return lines
+
+
+def char_height(components):
+    """估计字高：运算符、圆点和噪点的连通域往往比数字还多，只看较高的那些连通域"""
+    heights = np.array([c[3] - c[1] for c in components])
+    return float(np.median(heights[heights >= 0.5 * np.percentile(heights, 95)]))
+
+
+def group_rows(components):
+    """按纵向位置把连通域分成行
+
+    先用较高的连通域（数字、括号）确定各行的纵向范围，再把较矮的部分（运算符、
+    ÷ 和 ? 的圆点、小数点）归入纵向上最接近的行，避免它们自成一行。
+    """
+    if not components:
+        return []
+    height = char_height(components)
+    tall = [c for c in components if c[3] - c[1] >= 0.6 * height]
+    short = [c for c in components if c[3] - c[1] < 0.6 * height]
+
+    rows = []
+    for component in sorted(tall, key=lambda c: (c[1] + c[3]) / 2):
+        center = (component[1] + component[3]) / 2
+        for row in rows:
+            if row['top'] <= center <= row['bottom']:
+                row['components'].append(component)
+                row['top'] = min(row['top'], component[1])
+                row['bottom'] = max(row['bottom'], component[3])
+                break
+        else:
+            rows.append({'top': component[1], 'bottom': component[3], 'components': [component]})
+
+    for component in short:
+        center = (component[1] + component[3]) / 2
+        best = None
+        for row in rows:
+            margin = 0.4 * (row['bottom'] - row['top'])
+            if row['top'] - margin <= center <= row['bottom'] + margin:
+                distance = abs(center - (row['top'] + row['bottom']) / 2)
+                if best is None or distance < best[0]:
+                    best = (distance, row)
+        if best is None:
+            rows.append({'top': component[1], 'bottom': component[3], 'components': [component]})
+        else:
+            best[1]['components'].append(component)
+    return [sorted(row['components']) for row in rows]
+
+
+def merge_glyphs(components):
+    """横向重叠的连通域合并为一个字符（如 = 的两横、÷ 的横线和圆点）"""
+    glyphs = []
+    for left, top, right, bottom, index in components:
+        if glyphs:
+            g_left, g_top, g_right, g_bottom, ids = glyphs[-1]
+            overlap = min(right, g_right) - max(left, g_left)
+            if overlap > 0.5 * min(right - left, g_right - g_left):
+                glyphs[-1] = (min(left, g_left), min(top, g_top), max(right, g_right), max(bottom, g_bottom),
+                              ids + [index])
+                continue
+        glyphs.append((left, top, right, bottom, [index]))
+    return glyphs
+
+
+def is_dot(left, top, right, bottom, line_top, line_height):
+    """宽高都很小且位于行下部的字符是小数点"""
+    size = DOT_SIZE * line_height
+    return right - left <= size and bottom - top <= size and (top + bottom) / 2 > line_top + 0.7 * line_height
+
+
+def make_line(segment):
+    """把一段字符组成OCRLine，置信度为分类器概率的平均值（0~100）"""
+    text = ''.join((' ' if spaced and i else '') + char
+                   for i, (char, _, spaced, _, _, _, _) in enumerate(segment))
+    probs = [prob for _, prob, _, _, _, _, _ in segment if prob is not None]
+    confidence = float(np.mean(probs)) * 100 if probs else 0.0
+    return OCRLine(
+        text, confidence,
+        int(min(item[3] for item in segment)), int(min(item[4] for item in segment)),
+        int(max(item[5] for item in segment)), int(max(item[6] for item in segment))
+    )
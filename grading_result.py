@@ -0,0 +1,183 @@
+from expression_parser import BinaryOp, Negate, Number
+from numeric import format_number
+
+# 识别文本的来源
+PROVENANCE_OCR = 'ocr'  # 真实识别结果
+PROVENANCE_MOCK = 'mock'  # 模拟文本（仅用于演示）
+PROVENANCE_ERROR = 'error'  # 批改出错，没有结果
+
+# 每道题的批改状态
+STATUS_CORRECT = 'correct'  # 正确
+STATUS_WRONG = 'wrong'  # 错误
+STATUS_UNANSWERED = 'unanswered'  # 未作答
+STATUS_INVALID = 'invalid'  # 题目有误，无法计算
+STATUS_REVIEW = 'review'  # 识别置信度低，交给老师复核
+
+
+def expression_numbers(node):
+    """按书写顺序列出表达式中的数字"""
+    if isinstance(node, Number):
+        return [node.value]
+    if isinstance(node, Negate):
+        if isinstance(node.operand, Number):
+            return [-node.operand.value]
+        return expression_numbers(node.operand)
+    return expression_numbers(node.left) + expression_numbers(node.right)
+
+
+class ProblemRecord:
+    """一道题的批改记录"""
+
+    def __init__(self, number, expression, detected=None, expected=None, status=STATUS_UNANSWERED,
+                 confidence=None, bbox=None, answer_bbox=None):
+        self.number = number  # 题号，从1开始
+        self.expression = expression  # 题目的表达式树
+        self.detected = detected  # 识别出的学生答案，未作答为None
+        self.expected = expected  # 计算出的正确答案，无法计算为None
+        self.status = status  # STATUS_*
+        self.confidence = confidence  # 识别置信度（0~100），没有时为None
+        self.bbox = bbox  # 题目在图片中的位置 (left, top, right, bottom)
+        self.answer_bbox = answer_bbox  # 答案在图片中的位置
+
+    @property
+    def op(self):
+        """最外层的运算符，如 "3 + 4 × 2" 为 '+'；单个数字为None"""
+        return self.expression.op if isinstance(self.expression, BinaryOp) else None
+
+    @property
+    def operands(self):
+        """题目中的数字（按书写顺序）"""
+        return expression_numbers(self.expression)
+
+    @property
+    def expression_text(self):
+        return str(self.expression)
+
+    def render(self):
+        """批改结果文本"""
+        expected = format_number(self.expected) if self.expected is not None else '无法计算'
+        if self.status == STATUS_CORRECT:
+            return f"第{self.number}题: ✓ 正确！"
+        if self.status == STATUS_WRONG:
+            return f"第{self.number}题: ✗ 错误，正确答案是 {expected}"
+        if self.status == STATUS_INVALID:
+            return f"第{self.number}题: 题目有误，无法计算"
+        if self.status == STATUS_REVIEW:
+            detected = format_number(self.detected) if self.detected is not None else '未识别'
+            return (f"第{self.number}题: ⚠ 识别置信度低({self.confidence:.0f}%)，"
+                    f"请老师复核（识别答案 {detected}，计算结果 {expected}）")
+        return f"第{self.number}题: 未作答，正确答案是 {expected}"
+
+    def to_dict(self):
+        """保存用的字典，数字统一转为文本以保留分数和小数"""
+        return {
+            'number': self.number,
+            'expression': self.expression_text,
+            'op': self.op,
+            'operands': [format_number(value) for value in self.operands],
+            'detected': None if self.detected is None else format_number(self.detected),
+            'expected': None if self.expected is None else format_number(self.expected),
+            'status': self.status,
+            'confidence': None if self.confidence is None else round(self.confidence, 1),
+            'bbox': None if self.bbox is None else list(self.bbox),
+            'answer_bbox': None if self.answer_bbox is None else list(self.answer_bbox)
+        }
+
+
+class GradingResult:
+    """一次手写作业批改的结果 - 界面显示、统计和保存都直接使用其中的逐题记录"""
+
+    def __init__(self, problems=None, answers=None, engine_status=None, provenance=None,
+                 fallback_reason=None, geometry=None, trace=None, error=None, page=None,
+                 peak_memory=None, lines=None):
+        self.problems = problems or []  # ProblemRecord 列表
+        self.answers = answers or []  # 识别出的全部答案（按识别顺序）
+        self.engine_status = engine_status  # 识别引擎状态
+        self.provenance = provenance  # 识别文本的来源（PROVENANCE_*）
+        self.fallback_reason = fallback_reason  # 使用模拟文本的原因
+        self.geometry = geometry  # 几何校正信息
+        self.trace = trace  # 阶段耗时（开启追踪时）
+        self.error = error  # 出错时的错误信息
+        self.page = page  # 在多页文档中的页码（从1开始），单张图片为None
+        self.peak_memory = peak_memory  # 预处理缓冲区峰值（字节）
+        self.lines = lines or []  # 识别出的原始文本行（评估识别准确率用）
+
+    @classmethod
+    def failed(cls, error, engine_status=None):
+        """批改出错时的结果"""
+        return cls(engine_status=engine_status, provenance=PROVENANCE_ERROR, error=str(error))
+
+    def count(self, status):
+        return sum(1 for record in self.problems if record.status == status)
+
+    @property
+    def is_real(self):
+        """是否为真实识别的结果（只有真实结果才应计入成绩）"""
+        return self.provenance == PROVENANCE_OCR
+
+    @property
+    def total(self):
+        return len(self.problems)
+
+    @property
+    def correct_count(self):
+        return self.count(STATUS_CORRECT)
+
+    @property
+    def graded_count(self):
+        """已自动判分的题数（不含需要复核的题）"""
+        return self.total - self.count(STATUS_REVIEW)
+
+    @property
+    def accuracy(self):
+        return self.correct_count / self.graded_count * 100 if self.graded_count else 0.0
+
+    @property
+    def review_needed(self):
+        """需要老师复核的题号"""
+        return [record.number for record in self.problems if record.status == STATUS_REVIEW]
+
+    @property
+    def confidences(self):
+        return [None if record.confidence is None else round(record.confidence, 1)
+                for record in self.problems]
+
+    @property
+    def detected_problems(self):
+        """识别出的题目文本"""
+        if self.error is not None:
+            return f"处理失败: {self.error}"
+        if not self.problems:
+            return "未检测到题目"
+        return "\n".join(f"{record.expression_text} = ?" for record in self.problems)
+
+    @property
+    def detected_answers(self):
+        """识别出的答案文本"""
+        if self.error is not None:
+            return "无法识别"
+        if not self.answers:
+            return "未检测到答案"
+        return "\n".join(format_number(answer) for answer in self.answers)
+
+    @property
+    def grading_results(self):
+        """逐题批改结果文本"""
+        if self.error is not None:
+            return f"批改失败: {self.error}"
+        if not self.problems:
+            return "未检测到有效的数学题目"
+        return "\n".join(record.render() for record in self.problems)
+
+    def to_dict(self):
+        """保存用的字典"""
+        return {
+            'page': self.page,
+            'provenance': self.provenance,
+            'engine_status': self.engine_status,
+            'total_problems': self.total,
+            'correct_answers': self.correct_count,
+            'accuracy': self.accuracy,
+            'review_needed': self.review_needed,
+            'problems': [record.to_dict() for record in self.problems]
+        }
@@ -0,0 +1,82 @@
+from bisect import bisect_left, bisect_right
+
+# 以题目行高为单位的距离限制
+MAX_RIGHT_GAP = 8.0  # 同一行中答案与题目右端的最大距离
+MAX_BELOW_GAP = 2.5  # 答案写在题目下方时的最大距离
+BELOW_PENALTY = 0.5  # 同样的距离下优先选择同一行的答案
+
+# 两行在纵向重叠超过较矮一行高度的该比例时视为同一行
+SAME_ROW_OVERLAP = 0.5
+
+
+def overlap(start_a, end_a, start_b, end_b):
+    """两个区间的重叠长度"""
+    return max(0, min(end_a, end_b) - max(start_a, start_b))
+
+
+def placement_cost(problem, answer):
+    """答案相对题目位置的代价，越小越可能是这道题的答案；位置不可能时返回None
+
+    答案可以在同一行的右侧（等号后面），也可以在同一列的下方。
+    """
+    height = max(1, problem.bottom - problem.top)
+    min_height = max(1, min(height, answer.bottom - answer.top))
+
+    if overlap(problem.top, problem.bottom, answer.top, answer.bottom) >= SAME_ROW_OVERLAP * min_height:
+        gap = answer.left - problem.right
+        if -height <= gap <= MAX_RIGHT_GAP * height:
+            return max(gap, 0) / height
+        return None
+
+    gap = answer.top - problem.bottom
+    if -SAME_ROW_OVERLAP * height <= gap <= MAX_BELOW_GAP * height:
+        if overlap(problem.left, problem.right, answer.left, answer.right) > 0:
+            return max(gap, 0) / height + BELOW_PENALTY
+    return None
+
+
+def align_answers(problem_lines, answer_lines):
+    """按版面位置把答案分配给题目，返回每道题对应的答案下标（没有答案为None）
+
+    题目和答案在同一行识别出来时直接配对；其余题目在纵向窗口内（按顶部坐标二分查找）
+    寻找同一行右侧或同一列下方的答案，所有候选按代价排序后贪心分配，每个答案只用一次。
+    整体为 O(n log n)，两栏排版时不同栏的答案因为横向不重叠不会被错配。
+    任何一行缺少位置信息时退回按顺序配对。
+    """
+    if any(line.bbox is None for line in problem_lines) or any(line.bbox is None for line in answer_lines):
+        return [i if i < len(answer_lines) else None for i in range(len(problem_lines))]
+
+    assignment = [None] * len(problem_lines)
+    used = set()
+
+    # 同一行中的 "题目 = 答案"
+    inline = {}
+    for j, line in enumerate(answer_lines):
+        inline.setdefault(line, j)
+    for i, line in enumerate(problem_lines):
+        j = inline.get(line)
+        if j is not None and j not in used:
+            assignment[i] = j
+            used.add(j)
+
+    free = sorted((line.top, j) for j, line in enumerate(answer_lines) if j not in used)
+    tops = [top for top, _ in free]
+
+    candidates = []
+    for i, problem in enumerate(problem_lines):
+        if assignment[i] is not None:
+            continue
+        height = max(1, problem.bottom - problem.top)
+        start = bisect_left(tops, problem.top - height)
+        end = bisect_right(tops, problem.bottom + MAX_BELOW_GAP * height)
+        for _, j in free[start:end]:
+            cost = placement_cost(problem, answer_lines[j])
+            if cost is not None:
+                candidates.append((cost, i, j))
+
+    candidates.sort()
+    for cost, i, j in candidates:
+        if assignment[i] is None and j not in used:
+            assignment[i] = j
+            used.add(j)
+    return assignment
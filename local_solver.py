@@ -0,0 +1,216 @@
+import re
+
+
+class LocalMathSolver:
+    """本地算术解题引擎 - 为四则运算题生成竖式计算步骤，无需联网"""
+
+    # 支持的运算符写法（含中文和全角符号）
+    OPERATOR_MAP = {
+        '+': '+', '＋': '+', '加': '+', '加上': '+',
+        '-': '-', '－': '-', '减': '-', '减去': '-',
+        '*': '*', '×': '*', 'x': '*', 'X': '*', '＊': '*', '乘': '*', '乘以': '*',
+        '/': '/', '÷': '/', '／': '/', '除以': '/'
+    }
+
+    OPERATOR_SYMBOLS = {'+': '+', '-': '-', '*': '×', '/': '÷'}
+
+    # 匹配 "37 × 24" 形式的算式，长的运算符写法放前面优先匹配
+    EXPRESSION_PATTERN = re.compile(
+        r'(\d+)\s*(加上|减去|乘以|除以|[+＋加\-－减*×xX＊乘/÷／])\s*(\d+)'
+    )
+
+    # 算式之外允许出现的"纯计算"提问用语，剩余内容为空时才视为本地可解
+    FILLER_PATTERN = re.compile(
+        r'用竖式|列竖式|竖式|怎么算|如何算|怎么做|怎么计算|如何计算|等于多少|等于几|'
+        r'是多少|得多少|结果|请问|计算|算一下|帮我算|帮我|一下|求|的|呢|吗|啊|呀|'
+        r'[=＝?？。，,.!！:：\s]'
+    )
+
+    POSITION_NAMES = ['个位', '十位', '百位', '千位', '万位', '十万位', '百万位', '千万位', '亿位']
+
+    def parse_question(self, question):
+        """从问题中提取算式，返回 (a, op, b)，无法识别时返回None"""
+        if not question:
+            return None
+
+        matches = self.EXPRESSION_PATTERN.findall(question)
+        if len(matches) != 1:
+            # 没有算式或包含多个算式（多步运算）交给AI处理
+            return None
+
+        a, op, b = matches[0]
+        return int(a), self.OPERATOR_MAP[op], int(b)
+
+    def can_solve(self, question):
+        """判断问题是否为可以本地解答的纯计算题"""
+        if self.parse_question(question) is None:
+            return False
+
+        residue = self.EXPRESSION_PATTERN.sub('', question, count=1)
+        residue = self.FILLER_PATTERN.sub('', residue)
+        return residue == ''
+
+    def solve(self, question):
+        """解答计算题，返回 (success, 解题步骤文本)"""
+        parsed = self.parse_question(question)
+        if parsed is None:
+            return False, "无法识别题目中的算式"
+
+        a, op, b = parsed
+        if op == '+':
+            return True, self.explain_addition(a, b)
+        elif op == '-':
+            return True, self.explain_subtraction(a, b)
+        elif op == '*':
+            return True, self.explain_multiplication(a, b)
+        else:
+            return True, self.explain_division(a, b)
+
+    def position_name(self, index):
+        """数位名称，index从0（个位）开始"""
+        if index < len(self.POSITION_NAMES):
+            return self.POSITION_NAMES[index]
+        return f"第{index + 1}位"
+
+    def format_column(self, top, bottom, symbol, result, partials=None):
+        """排出竖式，数字右对齐"""
+        rows = [str(top), str(bottom), str(result)] + [str(p) for p in (partials or [])]
+        width = max(len(r) for r in rows) + 2
+
+        lines = [f"  {str(top).rjust(width)}",
+                 f"{symbol} {str(bottom).rjust(width)}",
+                 "  " + "-" * width]
+        if partials:
+            for shift, partial in enumerate(partials):
+                lines.append(f"  {(str(partial) + ' ' * shift).rjust(width)}")
+            lines.append("  " + "-" * width)
+        lines.append(f"  {str(result).rjust(width)}")
+        return "\n".join(lines)
+
+    def explain_addition(self, a, b):
+        """加法竖式：从个位加起，满十进一"""
+        steps = []
+        digits_a = str(a)[::-1]
+        digits_b = str(b)[::-1]
+        carry = 0
+
+        for i in range(max(len(digits_a), len(digits_b))):
+            da = int(digits_a[i]) if i < len(digits_a) else 0
+            db = int(digits_b[i]) if i < len(digits_b) else 0
+            total = da + db + carry
+            step = f"{self.position_name(i)}：{da} + {db}"
+            if carry:
+                step += f" + {carry}（进位）"
+            step += f" = {total}，写 {total % 10}"
+            carry = total // 10
+            if carry:
+                step += f"，向{self.position_name(i + 1)}进 {carry}"
+            steps.append(step)
+
+        if carry:
+            steps.append(f"{self.position_name(len(steps))}：写下进位 {carry}")
+
+        result = a + b
+        return self.build_explanation(a, b, '+', result, steps)
+
+    def explain_subtraction(self, a, b):
+        """减法竖式：从个位减起，不够减向高位借一"""
+        if a < b:
+            # 被减数小于减数时，先算 b - a 再取负
+            text = self.explain_subtraction(b, a)
+            return (f"{a} 比 {b} 小，先计算 {b} - {a}，结果再加负号。\n\n"
+                    f"{text}\n\n所以 {a} - {b} = {a - b}")
+
+        steps = []
+        digits_a = str(a)[::-1]
+        digits_b = str(b)[::-1]
+        borrow = 0
+
+        for i in range(len(digits_a)):
+            raw = int(digits_a[i])
+            da = raw - borrow
+            db = int(digits_b[i]) if i < len(digits_b) else 0
+            step = f"{self.position_name(i)}："
+            if borrow:
+                step += f"{raw} 被低位借走 1，"
+            if da < db:
+                step += (f"不够减 {db}，向{self.position_name(i + 1)}借 1，"
+                         f"{da + 10} - {db} = {da + 10 - db}")
+                borrow = 1
+            else:
+                step += f"{da} - {db} = {da - db}"
+                borrow = 0
+            steps.append(step)
+
+        result = a - b
+        return self.build_explanation(a, b, '-', result, steps)
+
+    def explain_multiplication(self, a, b):
+        """乘法竖式：用第二个数的每一位去乘第一个数，再把部分积相加"""
+        steps = []
+        partials = []
+        digits_b = str(b)[::-1]
+
+        for i, digit in enumerate(digits_b):
+            d = int(digit)
+            partial = a * d
+            partials.append(partial)
+            step = f"用{self.position_name(i)}的 {d} 乘 {a}：{a} × {d} = {partial}"
+            if i > 0:
+                step += f"，末位对齐{self.position_name(i)}（相当于 {partial * 10 ** i}）"
+            steps.append(step)
+
+        result = a * b
+        if len(partials) > 1:
+            terms = " + ".join(str(p * 10 ** i) for i, p in enumerate(partials))
+            steps.append(f"把部分积相加：{terms} = {result}")
+            return self.build_explanation(a, b, '*', result, steps, partials)
+
+        return self.build_explanation(a, b, '*', result, steps)
+
+    def explain_division(self, a, b):
+        """除法竖式（长除法）：从高位起逐位试商"""
+        if b == 0:
+            return f"{a} ÷ 0 没有意义：除数不能为0。"
+
+        steps = []
+        quotient_digits = []
+        remainder = 0
+
+        for i, digit in enumerate(str(a)):
+            current = remainder * 10 + int(digit)
+            q = current // b
+            remainder = current - q * b
+            if quotient_digits or q:
+                quotient_digits.append(str(q))
+            if i == 0:
+                step = f"看被除数第1位 {current}"
+            else:
+                step = f"落下 {digit}，得到 {current}"
+            step += f"：{current} ÷ {b} 商 {q}，{q} × {b} = {q * b}，余 {remainder}"
+            steps.append(step)
+
+        quotient = a // b
+        lines = [f"竖式计算：{a} ÷ {b}", ""]
+        lines.append("计算步骤：")
+        lines.extend(f"{n}. {s}" for n, s in enumerate(steps, 1))
+        lines.append("")
+        if remainder:
+            lines.append(f"答案：{a} ÷ {b} = {quotient} …… {remainder}")
+            lines.append(f"验算：{quotient} × {b} + {remainder} = {a}")
+        else:
+            lines.append(f"答案：{a} ÷ {b} = {quotient}")
+            lines.append(f"验算：{quotient} × {b} = {a}")
+        return "\n".join(lines)
+
+    def build_explanation(self, a, b, op, result, steps, partials=None):
+        """组合竖式和分步说明"""
+        symbol = self.OPERATOR_SYMBOLS[op]
+        lines = [f"竖式计算：{a} {symbol} {b}", ""]
+        lines.append(self.format_column(a, b, symbol, result, partials))
+        lines.append("")
+        lines.append("计算步骤：")
+        lines.extend(f"{n}. {s}" for n, s in enumerate(steps, 1))
+        lines.append("")
+        lines.append(f"答案：{a} {symbol} {b} = {result}")
+        return "\n".join(lines)
@@ -1,11 +1,30 @@
 import sys
-import json
 import os
+import time
+import logging
 from PyQt6.QtWidgets import QApplication, QMessageBox, QFileDialog, QPushButton, QCheckBox, QRadioButton, QSpinBox, QLabel
 from PyQt6.QtCore import QTimer, Qt
 from PyQt6.QtGui import QPixmap
 from new_ui import MainApplication
-from random import randint, choice
+from local_solver import LocalMathSolver
+from conversation_store import ConversationStore
+from answer_checker import check_answers, STATUS_CORRECT as CHECK_CORRECT, STATUS_MISSING as CHECK_MISSING
+from problem_generator import generate_problem, generate_operands, format_problem
+from numeric import answers_equal, format_number, parse_number
+from expression_parser import parse_expression, evaluate
+from grading_result import (
+    GradingResult, ProblemRecord, PROVENANCE_MOCK, STATUS_CORRECT, STATUS_WRONG
+)
+from practice_session import PracticeSession
+from skill_model import ADAPTIVE, DIFFICULTY_RATINGS, SkillModel
+from review_queue import ReviewQueue, answer_quality
+from problem_sampler import ProblemSampler, generate_problem_set, new_seed
+from pages import is_document
+import user_storage
+from app_logging import get_logger, configure_logging
+
+logger = get_logger('ui')
+storage_logger = get_logger('storage')
 
 # 导入OCR相关模块
 try:
@@ -13,7 +32,7 @@ try:
     OCR_AVAILABLE = True
 except ImportError:
     OCR_AVAILABLE = False
-    print("警告: OCR模块未能正确导入，手写批改功能将使用模拟模式")
+    logger.warning("OCR模块未能正确导入，手写批改功能将使用模拟模式")
 
 # 添加AI助手导入
 try:
@@ -21,7 +40,7 @@ try:
     AI_AVAILABLE = True
 except ImportError:
     AI_AVAILABLE = False
-    print("警告: AI助手模块未能正确导入，AI功能将不可用")
+    logger.warning("AI助手模块未能正确导入，AI功能将不可用")
 
 class MathPracticeSystem(MainApplication):
     """数学练习系统 - 整合Game.py逻辑和前端UI"""
@@ -30,6 +49,7 @@ class MathPracticeSystem(MainApplication):
         super().__init__()
         # 初始化数据文件路径
         self.data_file = 'user_data.json'
+        self.conversation_file = 'ai_conversations.jsonl'
         self.current_user = None
         self.current_answers = []
         self.timer = QTimer(self)
@@ -37,20 +57,34 @@ class MathPracticeSystem(MainApplication):
         self.time_elapsed = 0
 
         # 基础练习相关变量
-        self.practice_history = []  # 存储练习历史 [(problem, answer, user_answer), ...]
+        self.practice_history = PracticeSession()  # 存储练习历史（题目、答案、用户答案、是否计分）
+        self.problem_ratings = []  # 每道题出题时的难度评分（与练习历史一一对应，复习题为None）
         self.current_problem_index = -1  # 当前题目索引
         self.basic_score = 0  # 基础练习得分
         self.basic_correct = 0  # 基础练习正确数
         self.basic_total = 0  # 基础练习总题数
-        self.problem_scored = []  # 记录每题是否已计分
         self.basic_start_time = 0  # 基础练习开始时间
         self.basic_timer = QTimer(self)  # 基础练习计时器
         self.basic_timer.timeout.connect(self.update_basic_timer)
+        self.problem_shown_at = None  # 当前题目显示的时刻，用于计算答题用时
 
         # 计时练习相关变量
         self.timed_score = 0  # 得分
         self.timed_correct = 0  # 正确数
         self.timed_total = 0  # 总题数
+        self.timed_operands = []  # 每道题的 (a, op, b, answer)
+        self.timed_ratings = []  # 每道题出题时的难度评分
+        self.timed_difficulty = 'medium'
+        self.timed_operations = None
+        self.timed_number_format = 'integer'
+        self.timed_seed = None  # 本套题的种子，自适应难度时为None
+
+        # 自适应难度：当前用户在每种运算上的能力估计（未登录时只在本次运行中有效）
+        self.skill_model = SkillModel()
+        # 错题复习队列（未登录时只在本次运行中有效）
+        self.review_queue = ReviewQueue()
+        # 按 (难度, 运算) 缓存的不重复抽题器，长时间练习时题目空间用完之前不会出重复的题
+        self.problem_samplers = {}
 
         # OCR相关变量
         self.ocr_grader = None
@@ -59,15 +93,20 @@ class MathPracticeSystem(MainApplication):
         # AI助手相关变量
         self.ai_assistant = None
         self.ai_worker = None
+        self.ai_session = None  # 多轮辅导会话
+        self.last_ai_usage = None  # 最近一次AI调用的token用量
         self.api_key_file = 'deepseek_api_key.txt'
 
+        # 本地解题引擎（计算题无需调用AI）
+        self.local_solver = LocalMathSolver()
+
         # 初始化OCR批改器
         if OCR_AVAILABLE:
             try:
                 self.ocr_grader = OCRGrader()
-                print("OCR批改器初始化成功")
+                logger.info("OCR批改器初始化成功")
             except Exception as e:
-                print(f"OCR批改器初始化失败: {e}")
+                logger.error("OCR批改器初始化失败: %s", e)
                 self.ocr_grader = None
 
         # 初始化AI助手
@@ -75,11 +114,14 @@ class MathPracticeSystem(MainApplication):
             try:
                 self.ai_assistant = AIAssistant()
                 self.load_api_key()
-                print("AI助手初始化成功")
+                logger.info("AI助手初始化成功")
             except Exception as e:
-                print(f"AI助手初始化失败: {e}")
+                logger.error("AI助手初始化失败: %s", e)
                 self.ai_assistant = None
 
+        # 初始化AI对话记录存储（与成绩数据分开保存）
+        self.conversation_store = ConversationStore(self.conversation_file)
+
         # 初始化用户数据
         self.load_user_data()
 
@@ -94,37 +136,35 @@ class MathPracticeSystem(MainApplication):
                     api_key = f.read().strip()
                     if api_key and self.ai_assistant:
                         self.ai_assistant.set_api_key(api_key)
-                        print("已加载保存的API密钥")
+                        storage_logger.info("已加载保存的API密钥")
         except Exception as e:
-            print(f"加载API密钥失败: {e}")
+            storage_logger.error("加载API密钥失败: %s", e)
 
     def save_api_key(self, api_key):
         """保存API密钥"""
         try:
             with open(self.api_key_file, 'w', encoding='utf-8') as f:
                 f.write(api_key)
-            print("API密钥已保存")
+            storage_logger.info("API密钥已保存")
         except Exception as e:
-            print(f"保存API密钥失败: {e}")
+            storage_logger.error("保存API密钥失败: %s", e)
 
     def load_user_data(self):
         """加载用户数据"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    self.user_data = json.load(f)
-            except:
-                self.user_data = {}
-        else:
-            self.user_data = {}
+        self.user_data = user_storage.load_user_data(self.data_file)
+
+        # 旧版把AI对话记录保存在用户数据中，迁移到独立的对话存储
+        if self.conversation_store.migrate_from_user_data(self.user_data):
+            self.save_user_data()
 
     def save_user_data(self):
         """保存用户数据"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.user_data, f, ensure_ascii=False, indent=4)
+            if self.current_user:
+                self.user_data[self.current_user]['review_queue'] = self.review_queue.to_text()
+            user_storage.save_user_data(self.data_file, self.user_data)
         except Exception as e:
-            print(f"保存用户数据失败: {e}")
+            storage_logger.error("保存用户数据失败: %s", e)
 
     def setup_connections(self):
         """设置所有按钮连接"""
@@ -270,60 +310,64 @@ class MathPracticeSystem(MainApplication):
             easy_radio = self.basic_practice_window.findChild(QRadioButton, 'easy_radio')
             medium_radio = self.basic_practice_window.findChild(QRadioButton, 'medium_radio')
             hard_radio = self.basic_practice_window.findChild(QRadioButton, 'hard_radio')
+            adaptive_radio = self.basic_practice_window.findChild(QRadioButton, 'adaptive_radio')
 
             if easy_radio and easy_radio.isChecked():
                 return 'easy'
             elif hard_radio and hard_radio.isChecked():
                 return 'hard'
+            elif adaptive_radio and adaptive_radio.isChecked():
+                return ADAPTIVE
             else:
                 return 'medium'  # 默认中等难度
         except:
             return 'medium'
 
+    def get_selected_number_format(self):
+        """获取用户选择的数字形式（problem_generator.NUMBER_FORMATS 之一）"""
+        return self.get_number_format(self.basic_practice_window, '')
+
+    def get_number_format(self, window, prefix):
+        """读取窗口中数字形式单选按钮的选择，默认整数"""
+        for number_format in ('decimal', 'fraction'):
+            radio = window.findChild(QRadioButton, f'{prefix}{number_format}_radio')
+            if radio and radio.isChecked():
+                return number_format
+        return 'integer'
+
     def generate_problem(self, difficulty='medium', operations=None):
         """生成单个数学题（改进版）"""
-        if operations is None:
-            operations = ['+', '-', '*', '/']
+        return generate_problem(difficulty, operations)
+
+    def generate_operands(self, difficulty, operations=None, number_format='integer'):
+        """出一道题，返回 (a, op, b, ans)；自适应难度按当前用户各运算的评分决定数字范围
+
+        固定难度的整数题不放回地抽题，题目空间用完之前不会重复；小数题和分数题随机生成。
+        """
+        if difficulty == ADAPTIVE:
+            return self.skill_model.generate_operands(operations, number_format)
+        if number_format != 'integer':
+            return generate_operands(difficulty, operations, number_format)
+        key = (difficulty, tuple(operations or ()))
+        if key not in self.problem_samplers:
+            self.problem_samplers[key] = ProblemSampler(difficulty, operations)
+        return self.problem_samplers[key].draw()
+
+    def problem_rating(self, difficulty, op):
+        """出题时这道题的难度评分：固定难度取该难度的评分，自适应难度取学生出题时的评分"""
+        if difficulty == ADAPTIVE:
+            return self.skill_model.rating(op)
+        return DIFFICULTY_RATINGS.get(difficulty)
+
+    def record_skill(self, op, correct, seconds, problem_rating):
+        """用一次作答更新能力估计；problem_rating 为出题时记录的难度评分，为None时按学生当前评分计算期望"""
+        self.skill_model.record(op, correct, seconds, problem_rating)
+        if self.current_user:
+            self.user_data[self.current_user]['skills'] = self.skill_model.to_dict()
 
-        # 随机选择运算符
-        op = choice(operations)
-        fdict = {'+': '+', '-': '-', '*': '*', '/': '/'}
-
-        a, b, ans = 0, 0, 0
-
-        # 根据难度调整数字范围
-        if difficulty == 'easy':
-            max_num = 20
-            max_mul = 10
-        elif difficulty == 'medium':
-            max_num = 50
-            max_mul = 20
-        else:  # hard
-            max_num = 100
-            max_mul = 30
-
-        if op == '/':  # 除法确保结果为整数
-            b = randint(1, max_mul)
-            ans = randint(1, 10)
-            a = b * ans
-        else:
-            if op == '*':  # 乘法
-                a = randint(1, max_mul)
-                b = randint(1, max_mul)
-                ans = a * b
-            else:  # 加法或减法
-                a = randint(1, max_num)
-                b = randint(1, max_num)
-                if op == '+':
-                    ans = a + b
-                elif op == '-':
-                    # 确保减法结果为正数
-                    if a < b:
-                        a, b = b, a
-                    ans = a - b
-
-        problem = f'{a} {fdict[op]} {b} = ?'
-        return problem, ans
+    def record_review(self, a, op, b, answer, correct, seconds):
+        """答错的题加入复习队列，复习到的题按作答质量重新排期（随用户数据一起保存）"""
+        self.review_queue.record(a, op, b, answer, answer_quality(op, correct, seconds), time.time())
 
     def generate_multiple_problems(self, count=10):
         """生成多个数学题（来自Game.py）"""
@@ -339,12 +383,12 @@ class MathPracticeSystem(MainApplication):
         """显示基础练习界面"""
         self.stacked_widget.setCurrentWidget(self.basic_practice_window)
         # 重置练习状态
-        self.practice_history = []
+        self.practice_history = PracticeSession()
+        self.problem_ratings = []
         self.current_problem_index = -1
         self.basic_score = 0
         self.basic_correct = 0
         self.basic_total = 0
-        self.problem_scored = []
         self.basic_start_time = 0
 
         # 重置计时器显示
@@ -368,12 +412,12 @@ class MathPracticeSystem(MainApplication):
     def start_basic_practice(self):
         """开始基础练习"""
         # 重置状态
-        self.practice_history = []
+        self.practice_history = PracticeSession()
+        self.problem_ratings = []
         self.current_problem_index = -1
         self.basic_score = 0
         self.basic_correct = 0
         self.basic_total = 0
-        self.problem_scored = []
 
         # 开始计时
         self.basic_start_time = 0
@@ -404,18 +448,19 @@ class MathPracticeSystem(MainApplication):
             user_input = self.basic_practice_window.answer_input.text().strip()
             if user_input:
                 try:
-                    user_answer = int(user_input)
-                    problem, answer, _ = self.practice_history[self.current_problem_index]
-                    self.practice_history[self.current_problem_index] = (problem, answer, user_answer)
+                    user_answer = parse_number(user_input)
+                    self.practice_history.set_user_answer(self.current_problem_index, user_answer)
                 except ValueError:
                     pass
 
         # 如果当前不是最后一题，直接显示下一题
         if self.current_problem_index < len(self.practice_history) - 1:
             self.current_problem_index += 1
-            problem, answer, user_answer = self.practice_history[self.current_problem_index]
-            self.current_answers = [answer]
-            self.basic_practice_window.question_label.setText(problem)
+            index = self.current_problem_index
+            user_answer = self.practice_history.get_user_answer(index)
+            self.current_answers = [self.practice_history.correct_answer(index)]
+            self.basic_practice_window.question_label.setText(self.practice_history.problem_text(index))
+            self.problem_shown_at = time.monotonic()
 
             # 显示之前保存的答案
             if user_answer is not None:
@@ -425,16 +470,22 @@ class MathPracticeSystem(MainApplication):
 
             self.basic_practice_window.answer_input.setFocus()
         else:
-            # 生成新题目
-            operations = self.get_selected_operations()
-            difficulty = self.get_selected_difficulty()
-            problem, answer = self.generate_problem(difficulty, operations)
+            # 有到期的错题时先复习，否则生成新题目
+            review = self.review_queue.pop_due(time.time())
+            if review is not None:
+                a, op, b, answer = review
+                rating = None  # 复习题不知道原来的难度
+            else:
+                operations = self.get_selected_operations()
+                difficulty = self.get_selected_difficulty()
+                a, op, b, answer = self.generate_operands(difficulty, operations, self.get_selected_number_format())
+                rating = self.problem_rating(difficulty, op)
 
             self.current_answers = [answer]
-            self.practice_history.append((problem, answer, None))
-            self.problem_scored.append(False)  # 新题目未计分
-            self.current_problem_index = len(self.practice_history) - 1
-            self.basic_practice_window.question_label.setText(problem)
+            self.current_problem_index = self.practice_history.append(a, op, b, answer)  # 新题目未计分
+            self.problem_ratings.append(rating)
+            self.basic_practice_window.question_label.setText(format_problem(a, op, b))
+            self.problem_shown_at = time.monotonic()
             self.basic_practice_window.answer_input.clear()
             self.basic_practice_window.answer_input.setFocus()
 
@@ -451,31 +502,39 @@ class MathPracticeSystem(MainApplication):
             return
 
         try:
-            user_answer = int(user_answer)
+            user_answer = parse_number(user_answer)
             correct_answer = self.current_answers[0]
+            is_correct = answers_equal(user_answer, correct_answer)
 
-            # 更新历史记录中的用户答案
+            # 更新历史记录中的用户答案（超出记录范围的答案不保存）
             if self.current_problem_index < len(self.practice_history):
-                problem, answer, _ = self.practice_history[self.current_problem_index]
-                self.practice_history[self.current_problem_index] = (problem, answer, user_answer)
+                try:
+                    self.practice_history.set_user_answer(self.current_problem_index, user_answer)
+                except ValueError:
+                    pass
 
             # 只有当这道题还未计分时才计分
-            if self.current_problem_index < len(self.problem_scored) and not self.problem_scored[self.current_problem_index]:
-                self.problem_scored[self.current_problem_index] = True
+            if (self.current_problem_index < len(self.practice_history)
+                    and not self.practice_history.is_scored(self.current_problem_index)):
+                self.practice_history.mark_scored(self.current_problem_index)
                 self.basic_total += 1
+                a, op, b, _ = self.practice_history.problem(self.current_problem_index)
+                seconds = time.monotonic() - self.problem_shown_at if self.problem_shown_at else None
+                self.record_skill(op, is_correct, seconds, self.problem_ratings[self.current_problem_index])
+                self.record_review(a, op, b, correct_answer, is_correct, seconds)
 
-                if user_answer == correct_answer:
+                if is_correct:
                     self.basic_correct += 1
                     self.basic_score += 10  # 每题10分
 
                 self.update_basic_score_display()
 
-            if user_answer == correct_answer:
+            if is_correct:
                 # 创建成功消息框
                 msg = QMessageBox()
                 msg.setIcon(QMessageBox.Icon.Information)
                 msg.setWindowTitle('太棒了！')
-                msg.setText(f'回答正确！✨\n\n答案确实是 {correct_answer}')
+                msg.setText(f'回答正确！✨\n\n答案确实是 {format_number(correct_answer)}')
                 msg.setStyleSheet("""
                     QMessageBox {
                         background-color: #E8F5E9;
@@ -495,7 +554,7 @@ class MathPracticeSystem(MainApplication):
                 msg = QMessageBox()
                 msg.setIcon(QMessageBox.Icon.Warning)
                 msg.setWindowTitle('再试一次！')
-                msg.setText(f'答案不对哦 😊\n\n正确答案是：{correct_answer}\n你的答案是：{user_answer}')
+                msg.setText(f'答案不对哦 😊\n\n正确答案是：{format_number(correct_answer)}\n你的答案是：{user_answer}')
                 msg.setStyleSheet("""
                     QMessageBox {
                         background-color: #FFEBEE;
@@ -573,16 +632,33 @@ class MathPracticeSystem(MainApplication):
             easy_radio = self.timed_practice_window.findChild(QRadioButton, 'timed_easy_radio')
             medium_radio = self.timed_practice_window.findChild(QRadioButton, 'timed_medium_radio')
             hard_radio = self.timed_practice_window.findChild(QRadioButton, 'timed_hard_radio')
+            adaptive_radio = self.timed_practice_window.findChild(QRadioButton, 'timed_adaptive_radio')
 
             if easy_radio and easy_radio.isChecked():
                 return 'easy'
             elif hard_radio and hard_radio.isChecked():
                 return 'hard'
+            elif adaptive_radio and adaptive_radio.isChecked():
+                return ADAPTIVE
             else:
                 return 'medium'  # 默认中等难度
         except:
             return 'medium'
 
+    def get_timed_number_format(self):
+        """获取计时练习用户选择的数字形式"""
+        return self.get_number_format(self.timed_practice_window, 'timed_')
+
+    def get_timed_seed(self):
+        """试卷编号：填写了就按编号出题（纯十进制数字按整数处理），留空则生成新的编号"""
+        try:
+            text = self.timed_practice_window.seed_input.text().strip()
+        except AttributeError:
+            text = ''
+        if not text:
+            return new_seed()
+        return int(text) if text.isdecimal() else text
+
     def start_timed_practice(self):
         """开始计时练习"""
         # 获取用户设置
@@ -595,6 +671,7 @@ class MathPracticeSystem(MainApplication):
 
         operations = self.get_timed_selected_operations()
         difficulty = self.get_timed_selected_difficulty()
+        number_format = self.get_timed_number_format()
 
         # 重置得分
         self.timed_score = 0
@@ -602,12 +679,19 @@ class MathPracticeSystem(MainApplication):
         self.timed_total = question_count
         self.update_timed_score_display()
 
-        # 生成题目
-        problems, answers = self.generate_multiple_problems_with_settings(question_count, difficulty, operations)
+        # 生成题目：固定难度按试卷编号出题，同一编号的题目完全相同；自适应难度取决于各人的评分，不使用编号
+        seed = None if difficulty == ADAPTIVE else self.get_timed_seed()
+        problems, answers, self.timed_operands = self.generate_multiple_problems_with_settings(
+            question_count, difficulty, operations, seed, number_format)
         self.current_answers = answers
+        self.timed_ratings = [self.problem_rating(difficulty, op) for _, op, _, _ in self.timed_operands]
+        self.timed_difficulty = difficulty
+        self.timed_operations = operations
+        self.timed_number_format = number_format
+        self.timed_seed = seed
 
         # 显示题目
-        question_text = ""
+        question_text = f"试卷编号：{seed}\n" if seed is not None else ""
         for i, problem in enumerate(problems, 1):
             question_text += f"{i}. {problem}\n"
 
@@ -619,15 +703,24 @@ class MathPracticeSystem(MainApplication):
         self.time_elapsed = 0
         self.timer.start(1000)  # 每秒更新一次
 
-    def generate_multiple_problems_with_settings(self, count=10, difficulty='medium', operations=None):
-        """根据设置生成多个数学题"""
+    def generate_multiple_problems_with_settings(self, count=10, difficulty='medium', operations=None, seed=None,
+                                                 number_format='integer'):
+        """根据设置生成多个数学题，返回 (题目文本列表, 答案列表, 每道题的 (a, op, b, answer))
+
+        给出seed时按种子生成整套题，相同的种子和设置得到相同的题目。
+        """
+        if seed is not None:
+            generated = generate_problem_set(seed, difficulty, operations, count, number_format)
+        else:
+            generated = [self.generate_operands(difficulty, operations, number_format) for _ in range(count)]
         problems = []
         answers = []
-        for _ in range(count):
-            problem, answer = self.generate_problem(difficulty, operations)
-            problems.append(problem)
+        operands = []
+        for a, op, b, answer in generated:
+            problems.append(format_problem(a, op, b))
             answers.append(answer)
-        return problems, answers
+            operands.append((a, op, b, answer))
+        return problems, answers, operands
 
     def update_timer(self):
         """更新计时器显示"""
@@ -645,51 +738,44 @@ class MathPracticeSystem(MainApplication):
         # 停止计时
         self.timer.stop()
 
-        # 获取用户答案
+        # 获取用户答案并整体批改
         answer_text = self.timed_practice_window.answer_area.toPlainText()
-        user_answers = answer_text.strip().split('\n')
-
-        # 检查答案
-        correct_count = 0
-        result_text = "批改结果：\n\n"
-        
-        question_count = self.timed_practice_window.question_count_spinbox.value()
-
-        for i in range(question_count):
-            if i < len(user_answers):
-                try:
-                    user_answer = int(user_answers[i].strip())
-                    if user_answer == self.current_answers[i]:
-                        result_text += f"第{i + 1}题：✓ 正确\n"
-                        correct_count += 1
-                    else:
-                        result_text += f"第{i + 1}题：✗ 错误，正确答案是 {self.current_answers[i]}\n"
-                except:
-                    result_text += f"第{i + 1}题：✗ 答案格式错误，正确答案是 {self.current_answers[i]}\n"
-            else:
-                result_text += f"第{i + 1}题：✗ 未作答，正确答案是 {self.current_answers[i]}\n"
+        check_result = check_answers(answer_text, self.current_answers)
 
         # 计算成绩
-        score = correct_count * 10
+        score = check_result.score
+        correct_count = check_result.correct_count
         self.timed_score = score
         self.timed_correct = correct_count
         self.update_timed_score_display()
 
         time_str = self.timed_practice_window.timer_display.text()
-        result_text += f"\n总分：{score}分 ({correct_count}/10题正确)"
-        result_text += f"\n用时：{time_str}"
+
+        # 逐题更新能力估计和错题复习队列；计时练习只知道总用时，按平均每题用时计算，没做到的题不计
+        seconds = self.time_elapsed / check_result.total if check_result.total else None
+        for (_, status, _, _), (a, op, b, answer), rating in zip(
+                check_result.items(), self.timed_operands, self.timed_ratings):
+            if status != CHECK_MISSING:
+                self.record_skill(op, status == CHECK_CORRECT, seconds, rating)
+                self.record_review(a, op, b, answer, status == CHECK_CORRECT, seconds)
 
         # 保存成绩
         if self.current_user:
-            self.user_data[self.current_user]['scores']['timed_practice'].append({
+            record = {
                 'score': score,
                 'time': time_str,
-                'correct': correct_count
-            })
+                'correct': correct_count,
+                'total': check_result.total
+            }
+            # 只保存种子和出题设置，用 generate_problem_set 即可重新生成整套题
+            if self.timed_seed is not None:
+                record.update(seed=self.timed_seed, difficulty=self.timed_difficulty, operations=self.timed_operations,
+                              number_format=self.timed_number_format)
+            self.user_data[self.current_user]['scores']['timed_practice'].append(record)
             self.save_user_data()
 
-        # 昲示结果
-        QMessageBox.information(self, '练习完成', result_text)
+        # 显示结果
+        QMessageBox.information(self, '练习完成', check_result.render_report(time_str))
 
         # 清空答案
         self.current_answers = []
@@ -706,6 +792,12 @@ class MathPracticeSystem(MainApplication):
 
             if username in self.user_data and self.user_data[username]['password'] == password:
                 self.current_user = username
+                self.skill_model = SkillModel.from_dict(self.user_data[username].get('skills'))
+                try:
+                    self.review_queue = ReviewQueue.from_text(self.user_data[username].get('review_queue'))
+                except ValueError as e:
+                    storage_logger.warning("复习队列数据无效，已重置: %s", e)
+                    self.review_queue = ReviewQueue()
                 self.stacked_widget.setCurrentWidget(self.main_menu_window)
                 QMessageBox.information(self, '登录成功', f'欢迎回来，{username}！')
                 # 清空输入框
@@ -761,11 +853,14 @@ class MathPracticeSystem(MainApplication):
             reply = QMessageBox.question(self, '确认', '确定要退出登录吗？')
             if reply == QMessageBox.StandardButton.Yes:
                 self.current_user = None
+                self.skill_model = SkillModel()
+                self.review_queue = ReviewQueue()
+                self.ai_session = None
                 self.login_window.username.clear()
                 self.login_window.password.clear()
                 self.stacked_widget.setCurrentWidget(self.login_window)
         except Exception as e:
-            print(f"退出登录时出错: {e}")
+            logger.error("退出登录时出错: %s", e)
 
     def back_to_main_menu(self):
         """返回主菜单"""
@@ -775,15 +870,20 @@ class MathPracticeSystem(MainApplication):
                 self.timer.stop()
             if self.basic_timer.isActive():
                 self.basic_timer.stop()
+            # 未提交的练习中更新过的能力估计和复习队列也要保存
+            if self.current_user:
+                self.save_user_data()
             self.stacked_widget.setCurrentWidget(self.main_menu_window)
         except Exception as e:
-            print(f"返回主菜单时出错: {e}")
+            logger.error("返回主菜单时出错: %s", e)
 
     def mock_get_ai_help(self):
         """模拟获取AI帮助"""
         try:
             question = self.ai_guide_window.question_input.toPlainText()
-            if question:
+            if question and self.local_solver.can_solve(question):
+                self.show_local_solution(question)
+            elif question:
                 self.ai_guide_window.ai_answer.setPlainText(
                     "AI智能解答（示例）：\n\n"
                     "根据您的问题，我为您提供以下解答：\n\n"
@@ -834,23 +934,7 @@ class MathPracticeSystem(MainApplication):
             )
 
     def get_ai_help(self):
-        """获取AI帮助 - 真实功能"""
-        if not AI_AVAILABLE or not self.ai_assistant:
-            QMessageBox.warning(self, '功能不可用', 'AI助手功能暂不可用，请检查系统配置')
-            return
-
-        # 检查API密钥
-        is_valid, message = self.ai_assistant.validate_api_key()
-        if not is_valid:
-            reply = QMessageBox.question(
-                self, '需要配置API密钥',
-                f'{message}\n\n是否现在配置API密钥？',
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-            )
-            if reply == QMessageBox.StandardButton.Yes:
-                self.show_ai_config()
-            return
-
+        """获取AI帮助 - 计算题由本地引擎解答，概念题调用AI"""
         # 获取用户输入
         try:
             problem_type = self.ai_guide_window.problem_type.currentText()
@@ -868,6 +952,27 @@ class MathPracticeSystem(MainApplication):
             QMessageBox.warning(self, '问题太短', '请输入更详细的问题描述')
             return
 
+        # 纯计算题直接本地生成竖式步骤，不需要网络和API密钥
+        if self.local_solver.can_solve(user_question):
+            self.show_local_solution(user_question)
+            return
+
+        if not AI_AVAILABLE or not self.ai_assistant:
+            QMessageBox.warning(self, '功能不可用', 'AI助手功能暂不可用，请检查系统配置')
+            return
+
+        # 检查API密钥
+        is_valid, message = self.ai_assistant.validate_api_key()
+        if not is_valid:
+            reply = QMessageBox.question(
+                self, '需要配置API密钥',
+                f'{message}\n\n是否现在配置API密钥？',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                self.show_ai_config()
+            return
+
         # 显示处理中状态
         self.ai_guide_window.ai_answer.setPlainText("🤔 AI正在思考您的问题...\n\n请稍候，这可能需要几秒钟时间。")
 
@@ -877,18 +982,57 @@ class MathPracticeSystem(MainApplication):
             get_help_btn.setEnabled(False)
             get_help_btn.setText('AI思考中...')
 
+        # 题目类型或难度变化时开始新的会话，否则在原会话中继续追问
+        if (self.ai_session is None or self.ai_session.problem_type != problem_type
+                or self.ai_session.difficulty != difficulty):
+            self.ai_session = self.ai_assistant.start_session(problem_type, difficulty)
+        self.last_ai_usage = None
+
         # 创建并启动AI工作线程
-        self.ai_worker = AIWorker(self.ai_assistant, problem_type, difficulty, user_question)
+        self.ai_worker = AIWorker(self.ai_assistant, problem_type, difficulty, user_question,
+                                  session=self.ai_session)
+        self.ai_worker.usage_ready.connect(self.handle_ai_usage)
         self.ai_worker.response_ready.connect(self.handle_ai_response)
         self.ai_worker.progress_update.connect(self.update_ai_progress)
         self.ai_worker.start()
 
+    def show_local_solution(self, question):
+        """显示本地解题引擎给出的竖式步骤"""
+        success, solution = self.local_solver.solve(question)
+        if not success:
+            self.ai_guide_window.ai_answer.setPlainText(f"❌ 本地解答失败\n\n{solution}")
+            return
+
+        formatted_response = f"🧮 本地解答（竖式计算）\n\n{solution}\n\n" + "="*50 + "\n💡 如果还有疑问，请继续提问！"
+        self.ai_guide_window.ai_answer.setPlainText(formatted_response)
+
+        # 保存对话记录
+        if self.current_user:
+            self.save_ai_conversation(question, solution)
+
     def update_ai_progress(self, status_message):
         """更新AI处理进度"""
         current_text = self.ai_guide_window.ai_answer.toPlainText()
         if "AI正在思考" in current_text:
             self.ai_guide_window.ai_answer.setPlainText(f"🤔 {status_message}\n\n请稍候，这可能需要几秒钟时间。")
 
+    def handle_ai_usage(self, usage):
+        """记录AI调用的token用量"""
+        self.last_ai_usage = usage
+
+    def format_ai_usage(self):
+        """生成token用量说明"""
+        if not self.last_ai_usage:
+            return ""
+        usage = self.last_ai_usage
+        text = f"\n📊 本次用量: 提示 {usage['prompt_tokens']} tokens / 回答 {usage['completion_tokens']} tokens"
+        if self.ai_session:
+            total = self.ai_session.total_usage()
+            text += f"（本次会话累计 {total['total_tokens']} tokens，共 {total['calls']} 次提问）"
+        if usage.get('truncated'):
+            text += "\n⚠️ 回答达到长度上限被截断，可以追问\"请继续\""
+        return text
+
     def handle_ai_response(self, success, response):
         """处理AI响应"""
         # 恢复按钮状态
@@ -900,6 +1044,7 @@ class MathPracticeSystem(MainApplication):
         if success:
             # 格式化AI回答
             formatted_response = f"🤖 AI智能解答\n\n{response}\n\n" + "="*50 + "\n💡 如果还有疑问，请继续提问！"
+            formatted_response += self.format_ai_usage()
             self.ai_guide_window.ai_answer.setPlainText(formatted_response)
 
             # 保存对话记录
@@ -942,29 +1087,19 @@ class MathPracticeSystem(MainApplication):
     def save_ai_conversation(self, question, answer):
         """保存AI对话记录"""
         try:
-            if 'ai_conversations' not in self.user_data[self.current_user]:
-                self.user_data[self.current_user]['ai_conversations'] = []
-
-            conversation = {
-                'timestamp': self.get_current_timestamp(),
-                'question': question,
-                'answer': answer,
-                'problem_type': self.ai_guide_window.problem_type.currentText(),
-                'difficulty': self.ai_guide_window.difficulty.currentText()
-            }
-
-            self.user_data[self.current_user]['ai_conversations'].append(conversation)
-
-            # 只保留最近50条对话
-            if len(self.user_data[self.current_user]['ai_conversations']) > 50:
-                self.user_data[self.current_user]['ai_conversations'] = \
-                    self.user_data[self.current_user]['ai_conversations'][-50:]
-
-            self.save_user_data()
-            print(f"已保存用户 {self.current_user} 的AI对话记录")
+            # 对话存储只保留每个用户最近50条记录，追加时不会改写成绩数据
+            self.conversation_store.append(
+                self.current_user,
+                question,
+                answer,
+                self.ai_guide_window.problem_type.currentText(),
+                self.ai_guide_window.difficulty.currentText(),
+                self.get_current_timestamp()
+            )
+            storage_logger.debug("已保存用户 %s 的AI对话记录", self.current_user)
 
         except Exception as e:
-            print(f"保存AI对话记录失败: {e}")
+            storage_logger.error("保存AI对话记录失败: %s", e)
 
     def clear_canvas(self):
         """清空画布"""
@@ -975,7 +1110,7 @@ class MathPracticeSystem(MainApplication):
             self.handwriting_window.correction_result.clear()
             self.current_image_path = None
         except Exception as e:
-            print(f"清空画布时出错: {e}")
+            logger.error("清空画布时出错: %s", e)
 
     def update_timed_score_display(self):
         """更新计时练习得分显示"""
@@ -994,17 +1129,17 @@ class MathPracticeSystem(MainApplication):
             user_input = self.basic_practice_window.answer_input.text().strip()
             if user_input:
                 try:
-                    user_answer = int(user_input)
-                    problem, answer, _ = self.practice_history[self.current_problem_index]
-                    self.practice_history[self.current_problem_index] = (problem, answer, user_answer)
+                    user_answer = parse_number(user_input)
+                    self.practice_history.set_user_answer(self.current_problem_index, user_answer)
                 except ValueError:
                     pass
             
             # 移动到上一题
             self.current_problem_index -= 1
-            problem, answer, user_answer = self.practice_history[self.current_problem_index]
-            self.current_answers = [answer]
-            self.basic_practice_window.question_label.setText(problem)
+            index = self.current_problem_index
+            user_answer = self.practice_history.get_user_answer(index)
+            self.current_answers = [self.practice_history.correct_answer(index)]
+            self.basic_practice_window.question_label.setText(self.practice_history.problem_text(index))
 
             # 显示之前保存的答案
             if user_answer is not None:
@@ -1018,7 +1153,7 @@ class MathPracticeSystem(MainApplication):
 
     def submit_basic_practice(self):
         """提交基础练习"""
-        if not self.practice_history:
+        if len(self.practice_history) == 0:
             QMessageBox.warning(self, '提示', '还没有开始练习')
             return
         
@@ -1027,9 +1162,8 @@ class MathPracticeSystem(MainApplication):
             user_input = self.basic_practice_window.answer_input.text().strip()
             if user_input:
                 try:
-                    user_answer = int(user_input)
-                    problem, answer, _ = self.practice_history[self.current_problem_index]
-                    self.practice_history[self.current_problem_index] = (problem, answer, user_answer)
+                    user_answer = parse_number(user_input)
+                    self.practice_history.set_user_answer(self.current_problem_index, user_answer)
                 except ValueError:
                     pass
         
@@ -1042,15 +1176,17 @@ class MathPracticeSystem(MainApplication):
         correct_count = 0
         result_text = "基础练习结果：\n\n"
         
-        for i, (problem, correct_answer, user_answer) in enumerate(self.practice_history, 1):
+        for i, expression, correct_answer, user_answer in self.practice_history.items():
+            is_correct = answers_equal(user_answer, correct_answer)
+            correct_answer = format_number(correct_answer)
             if user_answer is not None:
-                if user_answer == correct_answer:
-                    result_text += f"第{i}题: ✓ 正确 ({problem.replace(' = ?', '')} = {correct_answer})\n"
+                if is_correct:
+                    result_text += f"第{i + 1}题: ✓ 正确 ({expression} = {correct_answer})\n"
                     correct_count += 1
                 else:
-                    result_text += f"第{i}题: ✗ 错误 ({problem.replace(' = ?', '')} = {correct_answer}，你的答案: {user_answer})\n"
+                    result_text += f"第{i + 1}题: ✗ 错误 ({expression} = {correct_answer}，你的答案: {user_answer})\n"
             else:
-                result_text += f"第{i}题: - 未作答 ({problem.replace(' = ?', '')} = {correct_answer})\n"
+                result_text += f"第{i + 1}题: - 未作答 ({expression} = {correct_answer})\n"
         
         # 计算统计信息
         if total_problems > 0:
@@ -1079,7 +1215,8 @@ class MathPracticeSystem(MainApplication):
                     'total': total_problems,
                     'accuracy': accuracy,
                     'time': time_str,
-                    'timestamp': self.get_current_timestamp()
+                    'timestamp': self.get_current_timestamp(),
+                    'session': self.practice_history.to_text()  # 紧凑的练习记录，可用于回放
                 })
                 self.save_user_data()
         
@@ -1087,12 +1224,12 @@ class MathPracticeSystem(MainApplication):
         QMessageBox.information(self, '练习完成', result_text)
         
         # 重置状态
-        self.practice_history = []
+        self.practice_history = PracticeSession()
+        self.problem_ratings = []
         self.current_problem_index = -1
         self.basic_score = 0
         self.basic_correct = 0
         self.basic_total = 0
-        self.problem_scored = []
         self.update_basic_score_display()
 
     def show_handwriting(self):
@@ -1119,7 +1256,7 @@ class MathPracticeSystem(MainApplication):
             self,
             "选择手写作业图片",
             "",
-            "图片文件 (*.png *.jpg *.jpeg *.bmp *.gif);;所有文件 (*.*)"
+            "图片文件 (*.png *.jpg *.jpeg *.bmp *.gif);;多页文档 (*.tif *.tiff *.pdf);;所有文件 (*.*)"
         )
 
         if file_path:
@@ -1150,6 +1287,13 @@ class MathPracticeSystem(MainApplication):
                 status_text = f"图片已加载: {os.path.basename(file_path)}\n点击'开始批改'进行识别..."
                 self.handwriting_window.recognition_result.setPlainText(status_text)
                 self.handwriting_window.correction_result.clear()
+            elif is_document(file_path):
+                # PDF等无法直接预览的多页文档，批改时逐页渲染
+                self.handwriting_window.canvas.setText(f"多页文档\n{os.path.basename(file_path)}")
+                self.handwriting_window.canvas.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                status_text = f"文档已加载: {os.path.basename(file_path)}\n点击'开始批改'逐页识别..."
+                self.handwriting_window.recognition_result.setPlainText(status_text)
+                self.handwriting_window.correction_result.clear()
             else:
                 QMessageBox.warning(self, '上传失败', '无法加载所选图片文件！请确保文件格式正确。')
                 self.current_image_path = None
@@ -1174,11 +1318,15 @@ class MathPracticeSystem(MainApplication):
         
         # 处理OCR批改
         try:
+            if self.ocr_grader and is_document(self.current_image_path):
+                logger.info("逐页批改多页文档...")
+                self.display_document_results(self.perform_document_correction())
+                return
             if self.ocr_grader:
-                print("使用真实OCR进行识别...")
+                logger.info("使用真实OCR进行识别...")
                 result = self.perform_real_ocr_correction()
             else:
-                print("使用模拟OCR进行演示...")
+                logger.info("使用模拟OCR进行演示...")
                 result = self.perform_mock_ocr_correction()
             
             # 显示结果
@@ -1193,84 +1341,100 @@ class MathPracticeSystem(MainApplication):
     def perform_real_ocr_correction(self):
         """执行真实的OCR批改"""
         try:
-            print(f"=== 开始真实OCR处理 ===")
-            print(f"图片路径: {self.current_image_path}")
-            print(f"图片存在: {os.path.exists(self.current_image_path)}")
+            logger.debug("开始真实OCR处理，图片路径: %s", self.current_image_path)
             
             if not os.path.exists(self.current_image_path):
                 raise Exception(f"图片文件不存在: {self.current_image_path}")
             
             # 显示图片信息
-            try:
-                file_size = os.path.getsize(self.current_image_path)
-                print(f"图片大小: {file_size} bytes")
-            except Exception as e:
-                print(f"获取图片大小失败: {e}")
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    file_size = os.path.getsize(self.current_image_path)
+                    logger.debug("图片大小: %d bytes", file_size)
+                except Exception as e:
+                    logger.warning("获取图片大小失败: %s", e)
             
             # 调用OCR批改器
-            print("调用OCR批改器...")
+            logger.debug("调用OCR批改器...")
             result = self.ocr_grader.grade_homework(self.current_image_path)
             
             # 验证结果
-            if not result:
-                raise Exception("OCR返回空结果")
-                
-            if not isinstance(result, dict):
+            if not isinstance(result, GradingResult):
                 raise Exception(f"OCR返回结果类型错误: {type(result)}")
             
-            # 检查必要的键
-            required_keys = ["detected_problems", "detected_answers", "grading_results"]
-            for key in required_keys:
-                if key not in result:
-                    result[key] = f"缺少 {key} 数据"
-            
-            print(f"OCR处理完成，返回结果: {len(str(result))} 字符")
+            logger.debug("OCR处理完成")
             return result
             
         except Exception as e:
-            error_msg = f"真实OCR处理失败: {e}"
-            print(error_msg)
-            print("自动回退到模拟模式")
-            return self.perform_mock_ocr_correction()
+            # 不再回退到模拟结果，避免学生的作业被按演示题目批改
+            logger.error("真实OCR处理失败: %s", e)
+            raise
+
+    def perform_document_correction(self):
+        """逐页批改多页文档，每批改完一页刷新一次进度"""
+        results = []
+        for result in self.ocr_grader.grade_document(self.current_image_path):
+            results.append(result)
+            self.handwriting_window.correction_result.setPlainText(f"正在批改中...已完成 {len(results)} 页")
+            QApplication.processEvents()
+        return results
+
+    def display_document_results(self, results):
+        """按页显示多页文档的批改结果，真实识别的页面逐页保存"""
+        recognition_text = "=== 识别结果 ===\n"
+        correction_text = "=== 批改结果 ===\n"
+        total_count = 0
+        correct_count = 0
+        for result in results:
+            recognition_text += f"\n--- 第{result.page}页 ---\n"
+            correction_text += f"\n--- 第{result.page}页 ---\n"
+            if not result.is_real:
+                reason = result.fallback_reason or "未能完成真实识别"
+                recognition_text += f"⚠ {reason}，本页结果不会保存。\n"
+                correction_text += "（演示数据，不是真实批改结果）\n"
+            recognition_text += result.detected_problems + "\n"
+            correction_text += result.grading_results + "\n"
+            if result.review_needed:
+                numbers = "、".join(str(n) for n in result.review_needed)
+                correction_text += f"⚠ 第{numbers}题识别置信度低，请老师复核。\n"
+            if result.total > 0:
+                correction_text += f"本页正确率: {result.accuracy:.1f}%\n"
+            total_count += result.total
+            correct_count += result.correct_count
+            if self.current_user and result.is_real:
+                self.save_handwriting_record(result)
+
+        self.handwriting_window.recognition_result.setPlainText(recognition_text)
+        self.handwriting_window.correction_result.setPlainText(correction_text)
+        QMessageBox.information(
+            self, '批改完成',
+            f'文档批改完成！\n\n共 {len(results)} 页，识别到 {total_count} 道题目\n正确 {correct_count} 道题目'
+        )
 
     def perform_mock_ocr_correction(self):
         """执行模拟的OCR批改（用于演示和错误回退）"""
-        print("=== 使用模拟OCR模式 ===")
+        logger.info("使用模拟OCR模式")
         
         # 根据上传的图片提供相应的模拟结果
-        sample_problems = [
-            "9 + 3 = ?",
-            "10 - 4 = ?", 
-            "7 × 9 = ?",
-            "6 ÷ 3 = ?",
-            "20 + 15 = ?"
-        ]
-        
-        sample_answers = ["12", "6", "63", "2", "35"]
-        correct_answers = [12, 6, 63, 2, 35]
+        sample_problems = ["9 + 3", "10 - 4", "7 × 9", "6 ÷ 3", "20 + 15"]
         
         # 模拟用户答案（有些对有些错）
         user_answers = [12, 6, 42, 2, 35]  # 第3题故意答错
         
-        # 构建识别结果
-        detected_problems = "\n".join(sample_problems)
-        detected_answers = "\n".join(sample_answers)
-        
-        # 构建批改结果
-        grading_results = []
-        for i, (correct, user) in enumerate(zip(correct_answers, user_answers)):
-            if correct == user:
-                grading_results.append(f"第{i+1}题: ✓ 正确！")
-            else:
-                grading_results.append(f"第{i+1}题: ✗ 错误，正确答案是 {correct}")
+        records = []
+        for i, (text, user) in enumerate(zip(sample_problems, user_answers)):
+            expression = parse_expression(text)
+            correct = evaluate(expression)
+            status = STATUS_CORRECT if correct == user else STATUS_WRONG
+            records.append(ProblemRecord(i + 1, expression, user, correct, status))
         
-        result = {
-            "detected_problems": detected_problems,
-            "detected_answers": detected_answers,
-            "grading_results": "\n".join(grading_results)
-        }
+        result = GradingResult(
+            records, user_answers,
+            provenance=PROVENANCE_MOCK,
+            fallback_reason="OCR模块不可用，显示的是演示数据"
+        )
         
-        print("模拟OCR完成")
+        logger.debug("模拟OCR完成")
         return result
 
     def display_ocr_results(self, result):
@@ -1279,18 +1443,20 @@ class MathPracticeSystem(MainApplication):
             # 显示识别的题目和答案
             recognition_text = "=== 识别结果 ===\n\n"
             
-            problems = result.get("detected_problems", "未检测到题目")
-            answers = result.get("detected_answers", "未检测到答案")
+            # 非真实识别的结果必须明确标出，且不计入成绩记录
+            if not result.is_real:
+                reason = result.fallback_reason or "未能完成真实识别"
+                recognition_text += f"⚠ {reason}，以下不是你的作业内容，结果不会保存。\n\n"
             
-            if problems.strip():
+            if result.problems:
                 recognition_text += "检测到的题目：\n"
-                recognition_text += problems
+                recognition_text += result.detected_problems
             else:
                 recognition_text += "检测到的题目：\n(未识别到题目，可能图片质量需要改善)"
             
-            if answers.strip():
+            if result.answers:
                 recognition_text += "\n\n检测到的答案：\n"
-                recognition_text += answers
+                recognition_text += result.detected_answers
             else:
                 recognition_text += "\n\n检测到的答案：\n(未识别到答案)"
             
@@ -1298,16 +1464,21 @@ class MathPracticeSystem(MainApplication):
             
             # 显示批改结果
             correction_text = "=== 批改结果 ===\n\n"
-            grading_results = result.get("grading_results", "批改失败")
-            correction_text += grading_results
+            if not result.is_real:
+                correction_text += "（演示数据，不是真实批改结果）\n\n"
+            correction_text += result.grading_results
+            
+            review_needed = result.review_needed
+            if review_needed:
+                numbers = "、".join(str(n) for n in review_needed)
+                correction_text += f"\n\n⚠ 第{numbers}题识别置信度低，未自动判分，请老师复核。"
             
             # 统计正确率
-            grading_lines = grading_results.split('\n') if grading_results else []
-            correct_count = sum(1 for line in grading_lines if '✓' in line or '正确' in line)
-            total_count = len([line for line in grading_lines if line.strip() and '第' in line])
+            correct_count = result.correct_count
+            total_count = result.total
+            accuracy = result.accuracy
             
             if total_count > 0:
-                accuracy = (correct_count / total_count) * 100
                 correction_text += f"\n\n=== 统计信息 ===\n"
                 correction_text += f"总题数: {total_count}\n"
                 correction_text += f"正确数: {correct_count}\n"
@@ -1333,9 +1504,9 @@ class MathPracticeSystem(MainApplication):
             
             self.handwriting_window.correction_result.setPlainText(correction_text)
             
-            # 保存批改记录
-            if self.current_user:
-                self.save_handwriting_record(result, correct_count, total_count)
+            # 保存批改记录（只保存真实识别的结果）
+            if self.current_user and result.is_real:
+                self.save_handwriting_record(result)
             
             # 显示完成消息
             if total_count > 0:
@@ -1348,31 +1519,27 @@ class MathPracticeSystem(MainApplication):
             QMessageBox.information(self, '批改完成', completion_msg)
             
         except Exception as e:
-            print(f"显示结果时出错: {e}")
+            logger.error("显示结果时出错: %s", e)
             QMessageBox.warning(self, '显示错误', f'显示批改结果时出现问题：{str(e)}')
 
-    def save_handwriting_record(self, result, correct_count, total_count):
-        """保存手写批改记录"""
+    def save_handwriting_record(self, result):
+        """保存手写批改记录（逐题记录）"""
         try:
             if 'handwriting_records' not in self.user_data[self.current_user]:
                 self.user_data[self.current_user]['handwriting_records'] = []
             
             record = {
                 'timestamp': self.get_current_timestamp(),
-                'image_path': os.path.basename(self.current_image_path) if self.current_image_path else 'unknown',
-                'total_problems': total_count,
-                'correct_answers': correct_count,
-                'accuracy': (correct_count / total_count * 100) if total_count > 0 else 0,
-                'detected_problems': result.get("detected_problems", ""),
-                'grading_results': result.get("grading_results", "")
+                'image_path': os.path.basename(self.current_image_path) if self.current_image_path else 'unknown'
             }
+            record.update(result.to_dict())
             
             self.user_data[self.current_user]['handwriting_records'].append(record)
             self.save_user_data()
-            print(f"已保存用户 {self.current_user} 的手写批改记录")
+            storage_logger.debug("已保存用户 %s 的手写批改记录", self.current_user)
             
         except Exception as e:
-            print(f"保存手写批改记录失败: {e}")
+            storage_logger.error("保存手写批改记录失败: %s", e)
 
     def get_current_timestamp(self):
         """获取当前时间戳"""
@@ -1380,7 +1547,8 @@ class MathPracticeSystem(MainApplication):
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 if __name__ == '__main__':
+    configure_logging()
     app = QApplication(sys.argv)
     system = MathPracticeSystem()
     system.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class MemoryLimitError(Exception):
+    """预处理所需的缓冲区超过了内存上限"""
+
+
+class MemoryBudget:
+    """一次批改任务的图像缓冲区记账
+
+    每个工作线程使用自己的OCRGrader，因此上限就是单个工作线程的内存上限。
+    track/release 记录当前仍然存活的缓冲区，peak 为本次任务的峰值（字节）。
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit  # 字节数，为None时不限制
+        self.live = {}
+        self.current = 0
+        self.peak = 0
+
+    def reset(self):
+        """开始新的一次任务"""
+        self.live = {}
+        self.current = 0
+        self.peak = 0
+
+    def available(self):
+        """距上限还能分配的字节数，不限制时为None"""
+        if self.limit is None:
+            return None
+        return self.limit - self.current
+
+    def check(self, nbytes, name):
+        if self.limit is not None and self.current + nbytes > self.limit:
+            raise MemoryLimitError(
+                f"分配 {name}（{nbytes / 2**20:.1f}MB）将超过内存上限 {self.limit / 2**20:.1f}MB，"
+                f"当前已使用 {self.current / 2**20:.1f}MB"
+            )
+
+    def track(self, name, array):
+        """登记一个已分配的缓冲区，同名的旧缓冲区视为已释放"""
+        self.release(name)
+        self.check(array.nbytes, name)
+        self.live[name] = array.nbytes
+        self.current += array.nbytes
+        self.peak = max(self.peak, self.current)
+        return array
+
+    def empty(self, name, shape, dtype=np.uint8):
+        """先检查上限再分配缓冲区"""
+        self.release(name)
+        self.check(int(np.prod(shape)) * np.dtype(dtype).itemsize, name)
+        return self.track(name, np.empty(shape, dtype))
+
+    def release(self, name):
+        self.current -= self.live.pop(name, 0)
@@ -422,10 +422,12 @@ class BasicPracticeWindow(QWidget):
         self.easy_radio = QRadioButton('简单 (1-20)')
         self.medium_radio = QRadioButton('中等 (1-50)')
         self.hard_radio = QRadioButton('困难 (1-100)')
+        self.adaptive_radio = QRadioButton('自适应 (按答题情况调整)')
         
         self.easy_radio.setObjectName('easy_radio')
         self.medium_radio.setObjectName('medium_radio')
         self.hard_radio.setObjectName('hard_radio')
+        self.adaptive_radio.setObjectName('adaptive_radio')
         
         # 默认选择中等难度
         self.medium_radio.setChecked(True)
@@ -433,6 +435,7 @@ class BasicPracticeWindow(QWidget):
         difficulty_layout.addWidget(self.easy_radio)
         difficulty_layout.addWidget(self.medium_radio)
         difficulty_layout.addWidget(self.hard_radio)
+        difficulty_layout.addWidget(self.adaptive_radio)
         difficulty_group.setLayout(difficulty_layout)
 
         # 题型选择
@@ -461,6 +464,26 @@ class BasicPracticeWindow(QWidget):
         operation_layout.addWidget(self.divide_checkbox)
         operation_group.setLayout(operation_layout)
 
+        # 数字形式选择
+        number_format_group = QGroupBox('数字形式')
+        number_format_layout = QVBoxLayout()
+        
+        self.integer_radio = QRadioButton('整数')
+        self.decimal_radio = QRadioButton('小数 (一位小数)')
+        self.fraction_radio = QRadioButton('分数 (除法可以除不尽)')
+        
+        self.integer_radio.setObjectName('integer_radio')
+        self.decimal_radio.setObjectName('decimal_radio')
+        self.fraction_radio.setObjectName('fraction_radio')
+        
+        # 默认整数
+        self.integer_radio.setChecked(True)
+        
+        number_format_layout.addWidget(self.integer_radio)
+        number_format_layout.addWidget(self.decimal_radio)
+        number_format_layout.addWidget(self.fraction_radio)
+        number_format_group.setLayout(number_format_layout)
+
         # 开始练习按钮
         start_practice_btn = QPushButton('开始练习')
         start_practice_btn.setObjectName('start_basic_btn')
@@ -499,6 +522,7 @@ class BasicPracticeWindow(QWidget):
         left_layout.addWidget(self.timer_label)
         left_layout.addWidget(difficulty_group)
         left_layout.addWidget(operation_group)
+        left_layout.addWidget(number_format_group)
         left_layout.addWidget(start_practice_btn)
         left_layout.addWidget(self.score_label)
         left_layout.addStretch()
@@ -802,8 +826,18 @@ class TimedPracticeWindow(QWidget):
         time_layout.addWidget(time_label)
         time_layout.addWidget(self.time_limit_spinbox)
 
+        # 试卷编号：同一个编号生成同一套题，留空则随机出题
+        seed_layout = QHBoxLayout()
+        seed_label = QLabel('试卷编号:')
+        self.seed_input = QLineEdit()
+        self.seed_input.setObjectName('seed_input')
+        self.seed_input.setPlaceholderText('留空则随机出题')
+        seed_layout.addWidget(seed_label)
+        seed_layout.addWidget(self.seed_input)
+
         settings_layout.addLayout(count_layout)
         settings_layout.addLayout(time_layout)
+        settings_layout.addLayout(seed_layout)
         settings_group.setLayout(settings_layout)
 
         # 难度选择
@@ -813,10 +847,12 @@ class TimedPracticeWindow(QWidget):
         self.timed_easy_radio = QRadioButton('简单 (1-20)')
         self.timed_medium_radio = QRadioButton('中等 (1-50)')
         self.timed_hard_radio = QRadioButton('困难 (1-100)')
+        self.timed_adaptive_radio = QRadioButton('自适应 (按答题情况调整)')
         
         self.timed_easy_radio.setObjectName('timed_easy_radio')
         self.timed_medium_radio.setObjectName('timed_medium_radio')
         self.timed_hard_radio.setObjectName('timed_hard_radio')
+        self.timed_adaptive_radio.setObjectName('timed_adaptive_radio')
         
         # 默认选择中等难度
         self.timed_medium_radio.setChecked(True)
@@ -824,6 +860,7 @@ class TimedPracticeWindow(QWidget):
         timed_difficulty_layout.addWidget(self.timed_easy_radio)
         timed_difficulty_layout.addWidget(self.timed_medium_radio)
         timed_difficulty_layout.addWidget(self.timed_hard_radio)
+        timed_difficulty_layout.addWidget(self.timed_adaptive_radio)
         timed_difficulty_group.setLayout(timed_difficulty_layout)
 
         # 题型选择
@@ -852,6 +889,26 @@ class TimedPracticeWindow(QWidget):
         timed_operation_layout.addWidget(self.timed_divide_checkbox)
         timed_operation_group.setLayout(timed_operation_layout)
 
+        # 数字形式选择
+        timed_number_format_group = QGroupBox('数字形式')
+        timed_number_format_layout = QVBoxLayout()
+        
+        self.timed_integer_radio = QRadioButton('整数')
+        self.timed_decimal_radio = QRadioButton('小数 (一位小数)')
+        self.timed_fraction_radio = QRadioButton('分数 (除法可以除不尽)')
+        
+        self.timed_integer_radio.setObjectName('timed_integer_radio')
+        self.timed_decimal_radio.setObjectName('timed_decimal_radio')
+        self.timed_fraction_radio.setObjectName('timed_fraction_radio')
+        
+        # 默认整数
+        self.timed_integer_radio.setChecked(True)
+        
+        timed_number_format_layout.addWidget(self.timed_integer_radio)
+        timed_number_format_layout.addWidget(self.timed_decimal_radio)
+        timed_number_format_layout.addWidget(self.timed_fraction_radio)
+        timed_number_format_group.setLayout(timed_number_format_layout)
+
         # 得分显示
         self.score_label = QLabel('得分: 0 / 正确: 0 / 总题数: 0')
         self.score_label.setFont(QFont('Microsoft YaHei', 11))
@@ -870,6 +927,7 @@ class TimedPracticeWindow(QWidget):
         left_layout.addWidget(settings_group)
         left_layout.addWidget(timed_difficulty_group)
         left_layout.addWidget(timed_operation_group)
+        left_layout.addWidget(timed_number_format_group)
         left_layout.addWidget(self.score_label)
         left_layout.addStretch()
         left_panel.setLayout(left_layout)
@@ -0,0 +1,85 @@
+import re
+from decimal import Decimal
+from fractions import Fraction
+
+# 合法的小数写法（不接受科学计数法、inf、nan）
+DECIMAL_PATTERN = re.compile(r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)')
+
+# 循环小数的答案至少要写到几位小数才按四舍五入判对
+DEFAULT_MIN_PLACES = 2
+
+
+def parse_number(text):
+    """解析用户答案：整数返回int，小数返回Decimal（保留书写的位数），分数返回Fraction
+
+    支持 "12"、"-3"、"3.5"、"1/2"，无法解析时抛出ValueError。
+    """
+    text = text.strip()
+    try:
+        return int(text)  # 快速路径：绝大多数答案是整数
+    except ValueError:
+        pass
+
+    if '/' in text:
+        numerator, _, denominator = text.partition('/')
+        denominator = int(denominator)
+        if denominator == 0:
+            raise ValueError(f"分母不能为0: {text!r}")
+        return normalize(Fraction(int(numerator), denominator))
+
+    if DECIMAL_PATTERN.fullmatch(text) is None:
+        raise ValueError(f"无法识别的数字: {text!r}")
+    return Decimal(text)
+
+
+def normalize(value):
+    """转换为精确值：整数值返回int，其余返回Fraction"""
+    if type(value) is int:
+        return value
+    value = Fraction(value)
+    if value.denominator == 1:
+        return value.numerator
+    return value
+
+
+def is_terminating(value):
+    """分数能否写成有限小数（分母只含因子2和5）"""
+    denominator = Fraction(value).denominator
+    for factor in (2, 5):
+        while denominator % factor == 0:
+            denominator //= factor
+    return denominator == 1
+
+
+def answers_equal(actual, expected, min_places=DEFAULT_MIN_PLACES):
+    """比较答案：0.5 与 1/2 相等；标准答案是循环小数时，
+    写到至少min_places位并正确四舍五入的小数也判为正确（如 1/3 写成 0.33）。
+    """
+    if actual is None or expected is None:
+        return False
+    if type(actual) is int and type(expected) is int:
+        return actual == expected
+
+    exact_actual = Fraction(actual)
+    exact_expected = Fraction(expected)
+    if exact_actual == exact_expected:
+        return True
+
+    if isinstance(actual, Decimal) and not is_terminating(exact_expected):
+        places = -actual.as_tuple().exponent
+        if places >= min_places:
+            return abs(exact_actual - exact_expected) <= Fraction(1, 2 * 10 ** places)
+    return False
+
+
+def format_number(value):
+    """显示答案：整数原样，有限小数写成小数，其余写成最简分数"""
+    if type(value) is int:
+        return str(value)
+    value = normalize(value)
+    if type(value) is int:
+        return str(value)
+    if is_terminating(value):
+        text = format(Decimal(value.numerator) / Decimal(value.denominator), 'f')
+        return text.rstrip('0').rstrip('.') if '.' in text else text
+    return f'{value.numerator}/{value.denominator}'
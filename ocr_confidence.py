@@ -0,0 +1,153 @@
+from collections import namedtuple
+
+
+class OCRLine(namedtuple('OCRLine', 'text confidence left top right bottom')):
+    """识别出的一行文本及其在图片中的位置；confidence为0~100
+
+    模拟文本等没有识别信息的行，置信度和坐标都为None。
+    """
+    __slots__ = ()
+
+    @property
+    def bbox(self):
+        """(left, top, right, bottom)，没有坐标时为None"""
+        if self.top is None:
+            return None
+        return self.left, self.top, self.right, self.bottom
+
+
+def text_line(text):
+    """没有置信度和坐标的纯文本行"""
+    return OCRLine(text, None, None, None, None, None)
+
+
+class LinesForLog:
+    """日志参数：行列表在日志真正输出时才格式化为 [(文本, 置信度), ...]
+
+    limit限制显示的行数；with_confidence=False 时只显示文本。
+    """
+    __slots__ = ('lines', 'limit', 'with_confidence')
+
+    def __init__(self, lines, limit=None, with_confidence=True):
+        self.lines = lines
+        self.limit = limit
+        self.with_confidence = with_confidence
+
+    def __repr__(self):
+        lines = self.lines[:self.limit]
+        if not self.with_confidence:
+            return repr([line.text for line in lines])
+        return repr([(line.text, None if line.confidence is None else round(line.confidence))
+                     for line in lines])
+
+
+# 低于该置信度的题目不自动批改，交给老师复核
+REVIEW_THRESHOLD = 60.0
+
+# 同一行中词间距超过行高的该倍数时视为不同栏
+COLUMN_GAP = 3.0
+
+# 投票时丢弃高度超过所有候选行高度中位数该倍数的行（psm 7/8 把整页当成一行时会出现）
+TALL_LINE_FACTOR = 2.0
+
+
+def lines_from_data(data):
+    """把 pytesseract.image_to_data(output_type=DICT) 的逐词结果合并成行
+
+    行置信度为各词置信度按字符数加权的平均值，结果按行的顶部坐标排序。
+    同一行中相邻两词的间距超过 COLUMN_GAP 倍行高时拆成两段，两栏排版的题目因此各自成行。
+    """
+    grouped = {}
+    for i, word in enumerate(data['text']):
+        word = word.strip()
+        conf = float(data['conf'][i])
+        if not word or conf < 0:
+            continue  # conf为-1的是页、块、段落等非文字行
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        left = data['left'][i]
+        top = data['top'][i]
+        grouped.setdefault(key, []).append(
+            (left, top, left + data['width'][i], top + data['height'][i], word, conf))
+
+    lines = []
+    for words in grouped.values():
+        words.sort()
+        height = max(word[3] for word in words) - min(word[1] for word in words)
+        segment = [words[0]]
+        for word in words[1:]:
+            if word[0] - segment[-1][2] > COLUMN_GAP * max(1, height):
+                lines.append(merge_words(segment))
+                segment = []
+            segment.append(word)
+        lines.append(merge_words(segment))
+    lines.sort(key=lambda line: line.top)
+    return lines
+
+
+def merge_words(words):
+    """把同一段的词合并成一行"""
+    chars = sum(len(word[4]) for word in words)
+    return OCRLine(
+        ' '.join(word[4] for word in words),
+        sum(word[5] * len(word[4]) for word in words) / chars,
+        min(word[0] for word in words),
+        min(word[1] for word in words),
+        max(word[2] for word in words),
+        max(word[3] for word in words)
+    )
+
+
+def vote_lines(candidates, normalize=None):
+    """多个配置的识别结果按行投票
+
+    candidates为每个配置识别出的行列表。先丢弃跨越多行的候选（高度超过中位数的 TALL_LINE_FACTOR 倍），
+    再按纵向位置（以及横向是否重叠）把各配置的行聚成同一物理行，
+    同一行中文本相同（经normalize后）的候选累加置信度，得票最高的文本胜出。
+    行置信度 = 胜出文本的置信度之和 / 在这一行识别出文字的配置数，因此只有这些配置一致且各自有把握时才会高；
+    没有识别出这一行的配置（例如只识别单行、单词的配置）不拉低置信度。
+    """
+    if normalize is None:
+        normalize = lambda text: ' '.join(text.split())
+
+    heights = sorted(line.bottom - line.top for lines in candidates for line in lines)
+    max_height = TALL_LINE_FACTOR * heights[len(heights) // 2] if heights else 0
+    entries = sorted(
+        ((line.top + line.bottom) / 2, index, line)
+        for index, lines in enumerate(candidates) for line in lines
+        if line.bottom - line.top <= max_height
+    )
+
+    clusters = []
+    open_clusters = []  # 纵向上仍可能接收新行的簇
+    for center, index, line in entries:
+        open_clusters = [cluster for cluster in open_clusters if center <= cluster['bottom']]
+        # 两栏排版时同一高度有多行，还要求横向重叠才算同一物理行
+        cluster = next((cluster for cluster in open_clusters
+                        if line.left < cluster['right'] and cluster['left'] < line.right), None)
+        if cluster is None:
+            cluster = {'bottom': line.bottom, 'left': line.left, 'right': line.right, 'lines': {}}
+            clusters.append(cluster)
+            open_clusters.append(cluster)
+        # 每个配置在同一行只保留置信度最高的候选
+        previous = cluster['lines'].get(index)
+        if previous is None or line.confidence > previous.confidence:
+            cluster['lines'][index] = line
+
+    voted = []
+    for cluster in clusters:
+        tally = {}
+        voters = 0
+        for line in cluster['lines'].values():
+            key = normalize(line.text)
+            if not key:
+                continue
+            voters += 1
+            total, best = tally.get(key, (0.0, None))
+            if best is None or line.confidence > best.confidence:
+                best = line
+            tally[key] = (total + line.confidence, best)
+        if not tally:
+            continue
+        total, best = max(tally.values(), key=lambda item: item[0])
+        voted.append(best._replace(confidence=total / voters))
+    return voted
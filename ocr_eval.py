@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from app_logging import LOG_LEVEL_ENV, configure_logging
+from expression_parser import ExpressionError, parse_expression
+from synthetic_worksheets import WorksheetSample, synthetic_samples
+
+# 示例图片的标注在 test_img/labels.json
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_img')
+LABELS_FILE = 'labels.json'
+
+PERCENTILES = (50, 90, 99)
+
+
+def load_corpus(directory):
+    """读取目录中 labels.json 标注的作业图片
+
+    labels.json 为列表，每项包含 image（相对目录的文件名）、lines（每行文字）、
+    problems（每道题的 expression、answer、status，可选 solution）。
+    """
+    with open(os.path.join(directory, LABELS_FILE), encoding='utf-8') as f:
+        entries = json.load(f)
+    return [WorksheetSample.from_dict(entry, os.path.join(directory, entry['image'])) for entry in entries]
+
+
+def line_key(grader, text):
+    """比较文本行时忽略空格和OCR易混淆字符"""
+    return ''.join(grader.normalize_text(text).split())
+
+
+def count_line_matches(grader, expected, recognized):
+    """标注行中被原样识别出来的行数（按多重集合匹配，不要求顺序）"""
+    remaining = Counter(line_key(grader, text) for text in recognized)
+    matched = 0
+    for text in expected:
+        key = line_key(grader, text)
+        if remaining[key] > 0:
+            remaining[key] -= 1
+            matched += 1
+    return matched
+
+
+def count_grading_matches(sample, result):
+    """批改状态与标注一致的题数：按表达式找到对应的批改记录，状态相同才算对"""
+    records = list(result.problems)
+    matched = 0
+    for problem in sample.problems:
+        try:
+            node = parse_expression(problem.expression)
+        except ExpressionError:
+            continue
+        for i, record in enumerate(records):
+            if record.expression == node:
+                matched += record.status == problem.status
+                del records[i]
+                break
+    return matched
+
+
+def stage_durations(trace):
+    """一次批改中各阶段（含嵌套的子阶段）按名称累计的耗时（毫秒）"""
+    totals = {}
+    for span in trace or []:
+        totals[span['name']] = totals.get(span['name'], 0.0) + span['duration_ms']
+    return totals
+
+
+def warm_up(grader, samples):
+    """先识别一张样本（不计时）：手写识别后端第一次使用时才训练分类器，不能算进批改耗时"""
+    from OCR import BACKEND_GLYPH
+    if samples and grader.backend == BACKEND_GLYPH:
+        grader.extract_lines(grader.preprocess_image(samples[0].image))
+
+
+def evaluate(grader, samples):
+    """用grader批改所有样本，返回评估报告（dict）
+
+    grader 需要开启追踪（trace=True）才有分阶段耗时。计时前先预热（见 warm_up）。
+    """
+    samples = list(samples)
+    warm_up(grader, samples)
+    lines_total = lines_matched = 0
+    problems_total = problems_matched = 0
+    provenance = Counter()
+    stages = {}
+    failures = []
+
+    for sample in samples:
+        start = time.perf_counter()
+        result = grader.grade_homework(sample.image)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        provenance[result.provenance] += 1
+        stages.setdefault('total', []).append(elapsed)
+        for name, duration in stage_durations(result.trace).items():
+            stages.setdefault(name, []).append(duration)
+
+        # 模拟文本不是这张图片的内容，不能算识别正确
+        recognized = result.lines if result.is_real else []
+        matched_lines = count_line_matches(grader, sample.lines, recognized)
+        matched_problems = count_grading_matches(sample, result) if result.is_real else 0
+        lines_total += len(sample.lines)
+        lines_matched += matched_lines
+        problems_total += len(sample.problems)
+        problems_matched += matched_problems
+        if matched_problems < len(sample.problems):
+            failures.append({'name': sample.name, 'expected': sample.lines, 'recognized': result.lines,
+                             'provenance': result.provenance, 'error': result.error})
+
+    return {
+        'samples': sum(provenance.values()),
+        'provenance': dict(provenance),
+        'line_accuracy': lines_matched / lines_total if lines_total else 0.0,
+        'grading_accuracy': problems_matched / problems_total if problems_total else 0.0,
+        'latency_ms': {
+            name: {f'p{p}': float(np.percentile(values, p)) for p in PERCENTILES}
+            for name, values in stages.items()
+        },
+        'failures': failures
+    }
+
+
+def format_report(report):
+    """评估报告的文本形式"""
+    lines = [
+        f"样本数: {report['samples']}  来源: {report['provenance']}",
+        f"逐行识别准确率: {report['line_accuracy']:.1%}",
+        f"批改准确率: {report['grading_accuracy']:.1%}",
+        "",
+        f"{'阶段':<20}" + ''.join(f"{f'p{p}(ms)':>12}" for p in PERCENTILES)
+    ]
+    latency = report['latency_ms']
+    for name in sorted(latency, key=lambda name: -latency[name]['p50']):
+        lines.append(f"{name:<20}" + ''.join(f"{latency[name][f'p{p}']:>12.1f}" for p in PERCENTILES))
+    if report['failures']:
+        lines.append("")
+        lines.append(f"未完全批改正确的样本 {len(report['failures'])} 个，例如 {report['failures'][0]['name']}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='评估手写批改的准确率和各阶段耗时')
+    parser.add_argument('--backend', default='tesseract', help='识别后端：tesseract 或 glyph')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='带 labels.json 的图片目录，传空字符串则不使用')
+    parser.add_argument('--synthetic', type=int, default=20, help='额外生成的合成作业数量')
+    parser.add_argument('--seed', type=int, default=0, help='合成作业的随机种子')
+    parser.add_argument('--max-rotation', type=float, default=5.0, help='合成作业整页旋转的最大角度（度）')
+    parser.add_argument('--max-noise', type=float, default=0.0, help='合成作业高斯噪声标准差的上限（灰度级）')
+    parser.add_argument('--json', help='把完整报告（含失败样本）写入该JSON文件')
+    args = parser.parse_args(argv)
+
+    # 逐张批改的INFO日志太多，默认只显示警告
+    configure_logging(os.environ.get(LOG_LEVEL_ENV, 'WARNING'))
+    from OCR import OCRGrader
+    grader = OCRGrader(debug_image_path=None, trace=True, backend=args.backend)
+
+    samples = load_corpus(args.corpus) if args.corpus else []
+    samples += list(synthetic_samples(args.synthetic, seed=args.seed, max_rotation=args.max_rotation,
+                                       max_noise=args.max_noise))
+    report = evaluate(grader, samples)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import os
+import shutil
+import subprocess
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from app_logging import get_logger
+
+logger = get_logger('ocr')
+
+# 多页TIFF用Pillow逐帧解码（pytesseract本身也依赖Pillow）
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# PDF优先用PyMuPDF渲染，没有时调用poppler的pdftoppm
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+PDF_EXTENSIONS = ('.pdf',)
+DOCUMENT_EXTENSIONS = TIFF_EXTENSIONS + PDF_EXTENSIONS
+
+PDF_DPI = 200  # PDF渲染分辨率，和常见扫描仪设置一致
+RENDER_TIMEOUT = 60  # 渲染单页的超时时间（秒）
+
+
+class PageError(Exception):
+    """文档无法拆分或渲染成页面"""
+
+
+class Page(namedtuple('Page', 'number image')):
+    """文档中的一页：number从1开始，image为灰度图（numpy数组）"""
+    __slots__ = ()
+
+
+def is_document(path):
+    """是否为可能包含多页的文档（TIFF或PDF）"""
+    return os.path.splitext(path)[1].lower() in DOCUMENT_EXTENSIONS
+
+
+def pdf_renderer():
+    """可用的PDF渲染器：'pymupdf'、'pdftoppm'，都没有时为None"""
+    if PYMUPDF_AVAILABLE:
+        return 'pymupdf'
+    if shutil.which('pdftoppm') and shutil.which('pdfinfo'):
+        return 'pdftoppm'
+    return None
+
+
+def page_count(path):
+    """文档页数，普通图片为1"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTENSIONS:
+        renderer = pdf_renderer()
+        if renderer == 'pymupdf':
+            with fitz.open(path) as document:
+                return document.page_count
+        if renderer == 'pdftoppm':
+            return pdfinfo_pages(path)
+        raise PageError("没有可用的PDF渲染器，请安装PyMuPDF或poppler-utils")
+    if ext in TIFF_EXTENSIONS and PIL_AVAILABLE:
+        with Image.open(path) as image:
+            return getattr(image, 'n_frames', 1)
+    return 1
+
+
+def iter_pages(path, dpi=PDF_DPI):
+    """逐页读取文档，每次只解码一页，返回Page的生成器
+
+    多页TIFF按帧解码，PDF逐页渲染；其他格式当作单页图片。
+    调用方处理完一页再取下一页，整份文档的内存占用保持在一页左右。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PDF_EXTENSIONS:
+        yield from iter_pdf_pages(path, dpi)
+    elif ext in TIFF_EXTENSIONS and PIL_AVAILABLE:
+        yield from iter_tiff_pages(path)
+    else:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise PageError(f"图片解码失败: {path}")
+        yield Page(1, image)
+
+
+def iter_tiff_pages(path):
+    """多页TIFF：用seek逐帧解码"""
+    try:
+        with Image.open(path) as image:
+            for index in range(getattr(image, 'n_frames', 1)):
+                image.seek(index)
+                yield Page(index + 1, np.asarray(image.convert('L')))
+    except (OSError, EOFError) as e:
+        raise PageError(f"TIFF解码失败: {path}: {e}") from e
+
+
+def iter_pdf_pages(path, dpi=PDF_DPI):
+    """PDF：用本地渲染器逐页渲染成灰度图"""
+    renderer = pdf_renderer()
+    if renderer is None:
+        raise PageError("没有可用的PDF渲染器，请安装PyMuPDF或poppler-utils")
+    logger.debug("使用 %s 渲染PDF: %s", renderer, path)
+
+    if renderer == 'pymupdf':
+        with fitz.open(path) as document:
+            for index, pdf_page in enumerate(document):
+                pixmap = pdf_page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+                rows = np.frombuffer(pixmap.samples, np.uint8).reshape(pixmap.height, pixmap.stride)
+                yield Page(index + 1, rows[:, :pixmap.width].copy())
+        return
+
+    for number in range(1, pdfinfo_pages(path) + 1):
+        yield Page(number, render_pdf_page(path, number, dpi))
+
+
+def pdfinfo_pages(path):
+    """用pdfinfo读取PDF页数"""
+    output = run_tool(['pdfinfo', path]).decode('utf-8', 'replace')
+    for line in output.splitlines():
+        if line.startswith('Pages:'):
+            return int(line.split(':', 1)[1])
+    raise PageError(f"无法读取PDF页数: {path}")
+
+
+def render_pdf_page(path, number, dpi=PDF_DPI):
+    """用pdftoppm把一页渲染成灰度图（PGM直接输出到标准输出，不落盘）"""
+    data = run_tool(['pdftoppm', '-f', str(number), '-l', str(number), '-r', str(dpi), '-gray', path])
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise PageError(f"PDF第{number}页渲染失败: {path}")
+    return image
+
+
+def run_tool(command):
+    try:
+        completed = subprocess.run(command, capture_output=True, timeout=RENDER_TIMEOUT, check=True)
+    except (OSError, subprocess.SubprocessError) as e:
+        raise PageError(f"{command[0]} 执行失败: {e}") from e
+    return completed.stdout
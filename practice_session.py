@@ -0,0 +1,171 @@
+import base64
+import struct
+import sys
+from array import array
+from decimal import Decimal
+from fractions import Fraction
+
+from numeric import format_number, normalize
+from problem_generator import format_problem
+
+# 运算符编码
+OPERATORS = ['+', '-', '*', '/']
+OP_CODES = {op: code for code, op in enumerate(OPERATORS)}
+
+# 未作答的占位值
+NO_ANSWER = -2 ** 31
+# 列中能保存的最大值
+MAX_VALUE = 2 ** 31 - 1
+
+# 用户答案不是小数时 user_places 列的值
+NOT_DECIMAL = -1
+
+# 序列化格式：魔数 + 题目数量，之后依次是各列的小端字节
+HEADER = struct.Struct('<4sI')
+MAGIC = b'MPS2'
+
+
+def split_number(value):
+    """把 int、Decimal 或 Fraction 拆成最简的 (分子, 分母)"""
+    value = Fraction(value)
+    return value.numerator, value.denominator
+
+
+class PracticeSession:
+    """基础练习记录 - 用并列的 array('i') 列紧凑保存每道题
+
+    列：a, b, answer（正确答案）, user_answer（用户答案，未作答为NO_ANSWER）各自带一列分母（*_den），
+    整数题的分母都是1；op（运算符编码）；user_places（用户写的小数位数，不是小数时为NOT_DECIMAL，
+    用于还原 "0.33" 这样的写法）；scored（是否已计分）。
+    """
+
+    COLUMNS = ('a', 'a_den', 'b', 'b_den', 'op', 'answer', 'answer_den',
+               'user_answer', 'user_den', 'user_places', 'scored')
+
+    def __init__(self):
+        for name in self.COLUMNS:
+            setattr(self, name, array('i'))
+
+    def __len__(self):
+        return len(self.a)
+
+    def append(self, a, op, b, answer):
+        """添加一道题（数字可以是 int、Decimal 或 Fraction），返回题目序号"""
+        values = split_number(a) + split_number(b) + split_number(answer)
+        if not all(NO_ANSWER < value <= MAX_VALUE for value in values):
+            raise ValueError(f"题目数字超出范围: {a} {op} {b} = {answer}")
+        self.a.append(values[0])
+        self.a_den.append(values[1])
+        self.b.append(values[2])
+        self.b_den.append(values[3])
+        self.op.append(OP_CODES[op])
+        self.answer.append(values[4])
+        self.answer_den.append(values[5])
+        self.user_answer.append(NO_ANSWER)
+        self.user_den.append(1)
+        self.user_places.append(NOT_DECIMAL)
+        self.scored.append(0)
+        return len(self.a) - 1
+
+    def operator(self, index):
+        """第index题的运算符"""
+        return OPERATORS[self.op[index]]
+
+    def problem(self, index):
+        """第index题的 (a, op, b, answer)，整数值为int，其余为Fraction"""
+        return (normalize(Fraction(self.a[index], self.a_den[index])), self.operator(index),
+                normalize(Fraction(self.b[index], self.b_den[index])), self.correct_answer(index))
+
+    def correct_answer(self, index):
+        """第index题的正确答案，整数值为int，其余为Fraction"""
+        return normalize(Fraction(self.answer[index], self.answer_den[index]))
+
+    def problem_text(self, index):
+        """题目文本，如 "3 + 4 = ?" """
+        a, op, b, _ = self.problem(index)
+        return format_problem(a, op, b)
+
+    def expression_text(self, index):
+        """不带 "= ?" 的算式文本，如 "3 + 4" """
+        a, op, b, _ = self.problem(index)
+        return f'{format_number(a)} {op} {format_number(b)}'
+
+    def get_user_answer(self, index):
+        """用户答案，未作答时返回None；小数按书写的位数还原为Decimal"""
+        value = self.user_answer[index]
+        if value == NO_ANSWER:
+            return None
+        places = self.user_places[index]
+        if places != NOT_DECIMAL:
+            return Decimal(value).scaleb(-places)
+        return normalize(Fraction(value, self.user_den[index]))
+
+    def set_user_answer(self, index, value):
+        """记录用户答案（int、Decimal 或 Fraction），超出范围时抛出ValueError"""
+        if value is None:
+            self.user_answer[index] = NO_ANSWER
+            return
+        if isinstance(value, Decimal):
+            places = max(0, -value.as_tuple().exponent)
+            numerator, denominator = int(value.scaleb(places)), 10 ** places
+        elif isinstance(value, (int, Fraction)):
+            places = NOT_DECIMAL
+            numerator, denominator = split_number(value)
+        else:
+            raise ValueError(f"无法记录的答案: {value!r}")
+        if not (NO_ANSWER < numerator <= MAX_VALUE and denominator <= MAX_VALUE):
+            raise ValueError(f"答案超出范围: {value}")
+        self.user_answer[index] = numerator
+        self.user_den[index] = denominator
+        self.user_places[index] = places
+
+    def is_scored(self, index):
+        return bool(self.scored[index])
+
+    def mark_scored(self, index):
+        self.scored[index] = 1
+
+    def items(self):
+        """逐题返回 (题目序号, 算式文本, 正确答案, 用户答案)"""
+        for i in range(len(self)):
+            yield i, self.expression_text(i), self.correct_answer(i), self.get_user_answer(i)
+
+    def to_bytes(self):
+        """序列化为紧凑的字节串"""
+        parts = [HEADER.pack(MAGIC, len(self))]
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            if sys.byteorder == 'big':
+                column = array('i', column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """从字节串还原练习记录"""
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("不是有效的练习记录数据")
+
+        session = cls()
+        itemsize = session.a.itemsize
+        offset = HEADER.size
+        for name in cls.COLUMNS:
+            column = getattr(session, name)
+            column.frombytes(data[offset:offset + count * itemsize])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            offset += count * itemsize
+        if len(session.a) != count or offset != len(data):
+            raise ValueError("练习记录数据长度不正确")
+        return session
+
+    def to_text(self):
+        """序列化为可以保存在JSON中的base64文本"""
+        return base64.b64encode(self.to_bytes()).decode('ascii')
+
+    @classmethod
+    def from_text(cls, text):
+        """从base64文本还原练习记录"""
+        return cls.from_bytes(base64.b64decode(text))
@@ -0,0 +1,106 @@
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+from numeric import normalize, format_number
+
+# 各难度的数字范围：(加减法最大数, 乘除法最大因数)
+DIFFICULTY_RANGES = {
+    'easy': (20, 10),
+    'medium': (50, 20),
+    'hard': (100, 30)
+}
+
+ALL_OPERATIONS = ['+', '-', '*', '/']
+
+# 题目数字形式：整数（默认）、一位小数、分数（除法结果可以除不尽）
+NUMBER_FORMATS = ('integer', 'decimal', 'fraction')
+
+
+def get_number_ranges(difficulty):
+    """根据难度返回 (max_num, max_mul)，未知难度按困难处理
+
+    difficulty 也可以直接是 (max_num, max_mul)，例如自适应难度按学生评分算出的范围。
+    """
+    if isinstance(difficulty, tuple):
+        return difficulty
+    return DIFFICULTY_RANGES.get(difficulty, DIFFICULTY_RANGES['hard'])
+
+
+def generate_operands(difficulty='medium', operations=None, number_format='integer', rng=random):
+    """随机生成一道题，返回 (a, op, b, ans)
+
+    number_format为'integer'时全部是int；'decimal'时操作数和答案为一位小数（Decimal）；
+    'fraction'时除法不再保证整除，答案为最简分数（Fraction，整除时仍为int）。
+    rng 默认为全局的 random 模块，传入独立的 random.Random 即可按种子复现。
+    """
+    if operations is None:
+        operations = ALL_OPERATIONS
+    if number_format not in NUMBER_FORMATS:
+        raise ValueError(f"未知的数字形式: {number_format}")
+
+    # 随机选择运算符
+    op = rng.choice(operations)
+    max_num, max_mul = get_number_ranges(difficulty)
+
+    if number_format == 'decimal':
+        return generate_decimal_operands(op, max_num, max_mul, rng)
+
+    if op == '/':
+        b = rng.randint(1, max_mul)
+        if number_format == 'fraction':
+            a = rng.randint(1, max_num)
+            ans = normalize(Fraction(a, b))
+        else:  # 除法确保结果为整数
+            ans = rng.randint(1, 10)
+            a = b * ans
+    elif op == '*':  # 乘法
+        a = rng.randint(1, max_mul)
+        b = rng.randint(1, max_mul)
+        ans = a * b
+    else:  # 加法或减法
+        a = rng.randint(1, max_num)
+        b = rng.randint(1, max_num)
+        if op == '+':
+            ans = a + b
+        else:
+            # 确保减法结果为正数
+            if a < b:
+                a, b = b, a
+            ans = a - b
+
+    return a, op, b, ans
+
+
+def generate_decimal_operands(op, max_num, max_mul, rng=random):
+    """生成一位小数的题目，用Decimal保证结果精确"""
+    tenth = Decimal('0.1')
+    if op == '/':  # 除数为整数，商为一位小数
+        b = Decimal(rng.randint(1, max_mul))
+        ans = rng.randint(1, 100) * tenth
+        a = b * ans
+    elif op == '*':  # 一位小数乘整数
+        a = rng.randint(1, max_mul * 10) * tenth
+        b = Decimal(rng.randint(1, max_mul))
+        ans = a * b
+    else:
+        a = rng.randint(1, max_num * 10) * tenth
+        b = rng.randint(1, max_num * 10) * tenth
+        if op == '+':
+            ans = a + b
+        else:
+            if a < b:
+                a, b = b, a
+            ans = a - b
+    return a, op, b, ans
+
+
+def format_problem(a, op, b):
+    """格式化题目文本"""
+    return f'{format_number(a)} {op} {format_number(b)} = ?'
+
+
+def generate_problem(difficulty='medium', operations=None, number_format='integer', rng=random):
+    """生成单个数学题，返回 (题目文本, 答案)"""
+    a, op, b, ans = generate_operands(difficulty, operations, number_format, rng)
+    return format_problem(a, op, b), ans
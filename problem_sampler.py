@@ -0,0 +1,144 @@
+import random
+
+from problem_generator import ALL_OPERATIONS, generate_operands, get_number_ranges
+
+# 除法的商在 1~10 之间（与 generate_operands 相同）
+MAX_QUOTIENT = 10
+
+# Feistel网络的轮数，4轮已足以让相邻序号的输出看不出规律
+FEISTEL_ROUNDS = 4
+
+
+class FeistelPermutation:
+    """[0, size) 上的伪随机排列，按需计算第index个元素，只保存几个轮密钥
+
+    在不小于size的 4^k 大小的定义域上做平衡Feistel网络，结果超出范围时
+    再做一次变换（cycle walking），定义域不超过size的4倍，平均不到4次。
+    """
+
+    def __init__(self, size, rng=random):
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self.half = (bits + 1) // 2
+        self.mask = (1 << self.half) - 1
+        self.keys = [rng.getrandbits(32) for _ in range(FEISTEL_ROUNDS)]
+
+    def round_function(self, value, key):
+        value = ((value ^ key) * 0x45D9F3B) & 0xFFFFFFFF
+        value ^= value >> 16
+        return value & self.mask
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        value = index
+        while True:
+            left, right = value >> self.half, value & self.mask
+            for key in self.keys:
+                left, right = right, left ^ self.round_function(right, key)
+            value = (left << self.half) | right
+            if value < self.size:
+                return value
+
+
+class OperatorSpace:
+    """一种运算在给定数字范围内的全部（整数）题目，按序号编号"""
+
+    def __init__(self, op, max_num, max_mul):
+        self.op = op
+        if op == '+':
+            self.size = max_num * max_num
+        elif op == '-':  # 被减数不小于减数
+            self.size = max_num * (max_num + 1) // 2
+        elif op == '*':
+            self.size = max_mul * max_mul
+        else:
+            self.size = max_mul * MAX_QUOTIENT
+        self.max_num = max_num
+        self.max_mul = max_mul
+
+    def problem(self, index):
+        """第index道题，返回 (a, op, b, ans)"""
+        if self.op == '+':
+            a, b = divmod(index, self.max_num)
+            a, b = a + 1, b + 1
+            return a, '+', b, a + b
+        if self.op == '-':
+            # 按被减数分组：被减数为a的题有a道，前a-1组共 a(a-1)/2 道
+            a = int(((8 * index + 1) ** 0.5 + 1) / 2)
+            while a * (a - 1) // 2 > index:
+                a -= 1
+            while a * (a + 1) // 2 <= index:
+                a += 1
+            b = index - a * (a - 1) // 2 + 1
+            return a, '-', b, a - b
+        if self.op == '*':
+            a, b = divmod(index, self.max_mul)
+            a, b = a + 1, b + 1
+            return a, '*', b, a * b
+        b, ans = divmod(index, MAX_QUOTIENT)
+        b, ans = b + 1, ans + 1
+        return b * ans, '/', b, ans
+
+
+class ProblemSampler:
+    """不放回地抽题：每种运算的题目空间用一个Feistel排列打乱，按顺序取下一个序号
+
+    题目空间用完之前不会重复，之后换一组密钥重新开始。每次抽题先在还有剩余题目的运算中
+    等概率选一种（与 generate_operands 相同），再取该运算的下一道题。内存占用与题目空间大小无关。
+    只生成整数题。
+    """
+
+    def __init__(self, difficulty='medium', operations=None, rng=random):
+        max_num, max_mul = get_number_ranges(difficulty)
+        self.rng = rng
+        self.spaces = [OperatorSpace(op, max_num, max_mul) for op in (operations or ALL_OPERATIONS)]
+        self.reset()
+
+    def reset(self):
+        """换一组密钥，重新开始不重复的一轮"""
+        self.permutations = [FeistelPermutation(space.size, self.rng) for space in self.spaces]
+        self.drawn = [0] * len(self.spaces)
+
+    def __len__(self):
+        """题目空间的大小"""
+        return sum(space.size for space in self.spaces)
+
+    def remaining(self):
+        """本轮还没抽到的题数"""
+        return len(self) - sum(self.drawn)
+
+    def draw(self):
+        """抽一道题，返回 (a, op, b, ans)"""
+        available = [i for i, space in enumerate(self.spaces) if self.drawn[i] < space.size]
+        if not available:
+            self.reset()
+            available = range(len(self.spaces))
+        i = self.rng.choice(available)
+        index = self.permutations[i][self.drawn[i]]
+        self.drawn[i] += 1
+        return self.spaces[i].problem(index)
+
+
+def generate_problem_set(seed, difficulty='medium', operations=None, count=10, number_format='integer'):
+    """按种子生成一套题，返回 [(a, op, b, ans), ...]
+
+    相同的 (seed, difficulty, operations, count, number_format) 总是得到完全相同的一套题（运算的先后顺序不影响结果），
+    整数题在题目空间够大时套内不重复；小数题和分数题用同一个种子随机生成，不保证不重复。
+    每次调用使用独立的 random.Random，不影响全局随机数，可以在多个进程中并行生成；
+    成绩中只需保存种子即可重新生成整套题。
+    """
+    operations = [op for op in ALL_OPERATIONS if op in (operations or ALL_OPERATIONS)]
+    rng = random.Random(seed)
+    if number_format != 'integer':
+        return [generate_operands(difficulty, operations, number_format, rng) for _ in range(count)]
+    sampler = ProblemSampler(difficulty, operations, rng=rng)
+    return [sampler.draw() for _ in range(count)]
+
+
+def new_seed():
+    """为一次练习或考试生成新的种子"""
+    return random.SystemRandom().getrandbits(31)
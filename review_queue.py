@@ -0,0 +1,199 @@
+import base64
+import heapq
+import struct
+import sys
+from array import array
+
+from practice_session import OP_CODES, OPERATORS
+from skill_model import SLOW_FACTOR, TARGET_SECONDS
+
+# SM-2 参数：易度因子初始2.5、最低1.3；答对第1、2次后分别隔1天、6天，之后间隔乘以易度因子
+INITIAL_EASINESS = 2.5
+MIN_EASINESS = 1.3
+FIRST_INTERVAL = 24 * 3600
+SECOND_INTERVAL = 6 * 24 * 3600
+
+# 答错（质量低于3）的题在这么多秒后重新出现，当次练习中就能再练一遍
+RELEARN_DELAY = 10 * 60
+# 出给学生后如果没有作答，过这么久再出
+RETRY_DELAY = 5 * 60
+# 间隔超过该值的题视为已经掌握，移出队列
+GRADUATE_INTERVAL = 60 * 24 * 3600
+
+# 序列化格式：魔数 + 题数，之后依次是各列的小端字节
+HEADER = struct.Struct('<4sI')
+MAGIC = b'MRQ1'
+COLUMN_TYPES = (('a', 'i'), ('b', 'i'), ('op', 'b'), ('answer', 'i'), ('repetitions', 'H'),
+                ('easiness', 'H'), ('interval', 'I'), ('due', 'q'))
+
+
+def answer_quality(op, correct, seconds=None):
+    """把作答折算为SM-2的回答质量（0~5）：答错为1，答对按用时给3~5"""
+    if not correct:
+        return 1
+    if seconds is None:
+        return 4
+    target = TARGET_SECONDS.get(op, TARGET_SECONDS['+'])
+    if seconds <= target:
+        return 5
+    return 4 if seconds <= SLOW_FACTOR * target else 3
+
+
+class ReviewCard:
+    """一道错题的复习状态"""
+
+    __slots__ = ('answer', 'repetitions', 'easiness', 'interval', 'due')
+
+    def __init__(self, answer, repetitions=0, easiness=INITIAL_EASINESS, interval=0, due=0):
+        self.answer = answer
+        self.repetitions = repetitions  # 连续答对的次数
+        self.easiness = easiness  # 易度因子
+        self.interval = interval  # 当前复习间隔（秒）
+        self.due = due  # 下次复习的时刻（Unix时间，秒）
+
+    def review(self, quality, now):
+        """按SM-2更新复习状态"""
+        if quality < 3:
+            self.repetitions = 0
+            self.interval = RELEARN_DELAY
+        else:
+            if self.repetitions == 0:
+                self.interval = FIRST_INTERVAL
+            elif self.repetitions == 1:
+                self.interval = SECOND_INTERVAL
+            else:
+                self.interval = round(self.interval * self.easiness)
+            self.repetitions += 1
+        self.easiness = max(MIN_EASINESS, self.easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due = now + self.interval
+
+
+class ReviewQueue:
+    """一个用户的错题复习队列：按到期时间排序的小根堆，入队、出队都是 O(log n)
+
+    cards 以 (a, op, b) 为键；heap 中的 (到期时刻, 键) 在重新排期后不立即删除，
+    出队时与 cards 中的到期时刻不一致的条目直接丢弃。
+    """
+
+    def __init__(self):
+        self.cards = {}
+        self.heap = []
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __contains__(self, key):
+        return key in self.cards
+
+    def schedule(self, key, card):
+        self.cards[key] = card
+        heapq.heappush(self.heap, (card.due, key))
+        # 过期条目太多时重建堆，保持内存与题数成正比
+        if len(self.heap) > 2 * len(self.cards) + 16:
+            self.heap = [(card.due, key) for key, card in self.cards.items()]
+            heapq.heapify(self.heap)
+
+    def peek(self):
+        """最早到期的 (到期时刻, 键)，队列为空时返回None"""
+        while self.heap:
+            due, key = self.heap[0]
+            card = self.cards.get(key)
+            if card is not None and card.due == due:
+                return due, key
+            heapq.heappop(self.heap)
+        return None
+
+    def pop_due(self, now):
+        """取出一道已到期的题，返回 (a, op, b, answer)，没有到期的题时返回None
+
+        取出的题先按 RETRY_DELAY 重新排期，学生作答后由 record 按结果排期。
+        """
+        head = self.peek()
+        if head is None or head[0] > now:
+            return None
+        key = head[1]
+        card = self.cards[key]
+        card.due = now + RETRY_DELAY
+        self.schedule(key, card)
+        a, op, b = key
+        return a, op, b, card.answer
+
+    def record(self, a, op, b, answer, quality, now):
+        """记录一次作答：队列中的题按SM-2重新排期，不在队列中的题答错时加入队列
+
+        只记录操作数和答案都是整数的题，小数题和分数题不进入队列。返回这道题是否仍在队列中。
+        """
+        if not all(type(value) is int for value in (a, b, answer)):
+            return False
+        key = (a, op, b)
+        card = self.cards.get(key)
+        if card is None:
+            if quality >= 3:
+                return False
+            card = ReviewCard(answer)
+        card.review(quality, now)
+        if card.interval > GRADUATE_INTERVAL:
+            del self.cards[key]
+            return False
+        self.schedule(key, card)
+        return True
+
+    def to_bytes(self):
+        """序列化为紧凑的字节串（列存储，与练习记录相同）"""
+        columns = {name: array(typecode) for name, typecode in COLUMN_TYPES}
+        for (a, op, b), card in self.cards.items():
+            columns['a'].append(a)
+            columns['b'].append(b)
+            columns['op'].append(OP_CODES[op])
+            columns['answer'].append(card.answer)
+            columns['repetitions'].append(min(card.repetitions, 0xFFFF))
+            columns['easiness'].append(round(card.easiness * 1000))
+            columns['interval'].append(card.interval)
+            columns['due'].append(int(card.due))
+        parts = [HEADER.pack(MAGIC, len(self.cards))]
+        for name, _ in COLUMN_TYPES:
+            column = columns[name]
+            if sys.byteorder == 'big':
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """从字节串还原复习队列"""
+        if len(data) < HEADER.size:
+            raise ValueError("复习队列数据长度不正确")
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("不是有效的复习队列数据")
+
+        columns = {}
+        offset = HEADER.size
+        for name, typecode in COLUMN_TYPES:
+            column = array(typecode)
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns[name] = column
+            offset += size
+        if offset != len(data):
+            raise ValueError("复习队列数据长度不正确")
+
+        queue = cls()
+        for i in range(count):
+            key = (columns['a'][i], OPERATORS[columns['op'][i]], columns['b'][i])
+            queue.cards[key] = ReviewCard(columns['answer'][i], columns['repetitions'][i],
+                                          columns['easiness'][i] / 1000, columns['interval'][i], columns['due'][i])
+        queue.heap = [(card.due, key) for key, card in queue.cards.items()]
+        heapq.heapify(queue.heap)
+        return queue
+
+    def to_text(self):
+        """序列化为可以保存在JSON中的base64文本"""
+        return base64.b64encode(self.to_bytes()).decode('ascii')
+
+    @classmethod
+    def from_text(cls, text):
+        """从base64文本还原复习队列，text为空时返回空队列"""
+        return cls.from_bytes(base64.b64decode(text)) if text else cls()
@@ -0,0 +1,107 @@
+import math
+from random import choice
+
+from problem_generator import ALL_OPERATIONS, DIFFICULTY_RANGES, generate_operands
+
+# 选择“自适应”难度时传入的难度名
+ADAPTIVE = 'adaptive'
+
+# Elo评分：新用户从中等难度开始，评分差400表示答对的几率相差10倍
+DEFAULT_RATING = 1000.0
+ELO_SCALE = 400.0
+
+# 每次更新的步长：前几道题调整得快，答题多了以后趋于稳定
+K_START = 48.0
+K_MIN = 16.0
+K_HALF_LIFE = 20  # 答到该题数时步长降到 K_START 与 K_MIN 的中间
+
+# 三个固定难度对应的评分，按固定难度出的题也参与更新
+DIFFICULTY_RATINGS = {'easy': 800.0, 'medium': 1000.0, 'hard': 1200.0}
+
+# 数字范围随评分变化：在固定难度之间按对数插值，两端按相同的斜率外推并截断
+MIN_RANGES = (5, 3)
+MAX_RANGES = (1000, 100)
+
+# 每种运算答对的目标用时（秒）；超过目标后得分逐渐降低，用时达到 SLOW_FACTOR 倍时只得 SLOW_SCORE
+TARGET_SECONDS = {'+': 5.0, '-': 6.0, '*': 6.0, '/': 8.0}
+SLOW_FACTOR = 3.0
+SLOW_SCORE = 0.5
+
+
+def answer_score(op, correct, seconds=None):
+    """把一次作答折算为0~1的得分：答错为0，按时答对为1，答得慢的对题在 SLOW_SCORE 到1之间"""
+    if not correct:
+        return 0.0
+    if seconds is None:
+        return 1.0
+    target = TARGET_SECONDS.get(op, TARGET_SECONDS['+'])
+    overtime = (seconds - target) / (target * (SLOW_FACTOR - 1))
+    return 1.0 - (1.0 - SLOW_SCORE) * min(1.0, max(0.0, overtime))
+
+
+def expected_score(rating, problem_rating):
+    """评分为rating的学生答对评分为problem_rating的题的期望得分"""
+    return 1.0 / (1.0 + 10 ** ((problem_rating - rating) / ELO_SCALE))
+
+
+def rating_ranges(rating):
+    """评分对应的 (加减法最大数, 乘除法最大因数)"""
+    anchors = sorted((DIFFICULTY_RATINGS[name], DIFFICULTY_RANGES[name]) for name in DIFFICULTY_RATINGS)
+    # 找到评分所在（或最近）的一段，在这一段上按对数插值
+    for (low, low_ranges), (high, high_ranges) in zip(anchors, anchors[1:]):
+        if rating <= high:
+            break
+    t = (rating - low) / (high - low)
+    ranges = []
+    for lower, upper, floor, ceiling in zip(low_ranges, high_ranges, MIN_RANGES, MAX_RANGES):
+        value = math.log(lower) + t * (math.log(upper) - math.log(lower))
+        ranges.append(round(math.exp(min(math.log(ceiling), max(math.log(floor), value)))))
+    return tuple(ranges)
+
+
+class SkillModel:
+    """一个用户在每种运算上的能力估计（Elo式），每次作答 O(1) 更新
+
+    ratings[op] 为评分，counts[op] 为已记录的作答次数。
+    """
+
+    def __init__(self, ratings=None, counts=None):
+        self.ratings = dict(ratings or {})
+        self.counts = dict(counts or {})
+
+    def rating(self, op):
+        return self.ratings.get(op, DEFAULT_RATING)
+
+    def ranges(self, op):
+        """按该运算的评分出题时的数字范围"""
+        return rating_ranges(self.rating(op))
+
+    def generate_operands(self, operations=None, number_format='integer'):
+        """按各运算的当前评分出一道题，返回 (a, op, b, ans)"""
+        op = choice(operations or ALL_OPERATIONS)
+        return generate_operands(self.ranges(op), [op], number_format)
+
+    def record(self, op, correct, seconds=None, problem_rating=None):
+        """记录一次作答并更新评分，返回新的评分
+
+        problem_rating 为题目的难度评分；自适应出的题正好按学生当前评分出，默认即为当前评分。
+        """
+        rating = self.rating(op)
+        if problem_rating is None:
+            problem_rating = rating
+        count = self.counts.get(op, 0)
+        k = K_MIN + (K_START - K_MIN) * K_HALF_LIFE / (K_HALF_LIFE + count)
+        rating += k * (answer_score(op, correct, seconds) - expected_score(rating, problem_rating))
+        self.ratings[op] = rating
+        self.counts[op] = count + 1
+        return rating
+
+    def to_dict(self):
+        """保存在用户数据中的形式：{运算符: [评分, 作答次数]}"""
+        return {op: [round(self.ratings[op], 1), self.counts.get(op, 0)] for op in self.ratings}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data or {}
+        return cls({op: float(value[0]) for op, value in data.items()},
+                   {op: int(value[1]) for op, value in data.items()})
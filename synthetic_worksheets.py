@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import random
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import cv2
+import numpy as np
+
+from geometry import rotate
+from glyph_recognizer import GLYPH_FONTS, render_text
+from grading_result import STATUS_CORRECT, STATUS_UNANSWERED, STATUS_WRONG
+from numeric import format_number
+from problem_generator import generate_operands
+
+# 作业纸上印的是 × 和 ÷
+DISPLAY_OPERATORS = {'*': '×', '/': '÷'}
+
+PAGE_SIZE = (1400, 1100)  # (宽, 高)
+PAGE_MARGIN = 80
+ROW_HEIGHT = 150
+
+# 命令行中可用的字体名
+FONT_NAMES = {
+    'simplex': cv2.FONT_HERSHEY_SIMPLEX,
+    'duplex': cv2.FONT_HERSHEY_DUPLEX,
+    'complex': cv2.FONT_HERSHEY_COMPLEX,
+    'triplex': cv2.FONT_HERSHEY_TRIPLEX,
+    'plain': cv2.FONT_HERSHEY_PLAIN,
+    'script_simplex': cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+    'script_complex': cv2.FONT_HERSHEY_SCRIPT_COMPLEX,
+}
+
+# 手写抖动为1时，单个字符的最大旋转角度（度）、上下错位和间距变化（字高的倍数）
+JITTER_ANGLE = 10.0
+JITTER_OFFSET = 0.15
+JITTER_SPACING = 0.2
+
+# answer 为学生写的答案（未作答为None），solution 为正确答案
+LabelledProblem = namedtuple('LabelledProblem', 'expression answer status solution', defaults=(None,))
+
+
+class WorksheetSample:
+    """一张带标注的作业图片
+
+    lines 为图片上每一行的文字；problems 为每道题的 LabelledProblem。
+    image 可以是图片数组，也可以是图片路径。
+    """
+
+    def __init__(self, name, image, lines, problems):
+        self.name = name
+        self.image = image
+        self.lines = lines
+        self.problems = problems
+
+    @classmethod
+    def from_dict(cls, data, image):
+        problems = [LabelledProblem(item['expression'], item.get('answer'), item['status'], item.get('solution'))
+                    for item in data['problems']]
+        return cls(data.get('name', data.get('image')), image, data['lines'], problems)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'lines': self.lines,
+            'problems': [problem._asdict() for problem in self.problems]
+        }
+
+
+def problem_lines(count, difficulty='medium', wrong_rate=0.2, blank_rate=0.1, number_format='integer', rng=random):
+    """用题目生成器出题并模拟学生作答，返回 (行文字列表, LabelledProblem列表)
+
+    一部分题故意答错（答案加减一个小的偏移），一部分留空写 ?。传入 random.Random 即可复现。
+    """
+    lines = []
+    problems = []
+    for _ in range(count):
+        a, op, b, answer = generate_operands(difficulty, number_format=number_format, rng=rng)
+        expression = f'{format_number(a)} {DISPLAY_OPERATORS.get(op, op)} {format_number(b)}'
+        roll = rng.random()
+        if roll < blank_rate:
+            written, status = None, STATUS_UNANSWERED
+        elif roll < blank_rate + wrong_rate:
+            offset = rng.choice([1, 2, 10])
+            wrong = answer - offset if answer > offset and rng.random() < 0.5 else answer + offset
+            written, status = format_number(wrong), STATUS_WRONG
+        else:
+            written, status = format_number(answer), STATUS_CORRECT
+        lines.append(f'{expression} = {written if written is not None else "?"}')
+        problems.append(LabelledProblem(expression, written, status, format_number(answer)))
+    return lines, problems
+
+
+def render_handwriting(text, font, scale, thickness, jitter, rng):
+    """逐个字符画出一行文字，每个字符随机旋转、上下错位、间距不均，模拟手写
+
+    jitter 为0时与 render_text 的结果相同。返回字符为255的掩码。
+    """
+    if not jitter:
+        return render_text(text, font, scale, thickness)[0]
+    (_, digit_height), _ = cv2.getTextSize('0', font, scale, thickness)
+    pad = round(JITTER_OFFSET * jitter * digit_height) + 1
+    glyphs = []
+    for char in text:
+        mask, _ = render_text(char, font, scale, thickness)
+        if not char.isspace():
+            height, width = mask.shape
+            angle = rng.uniform(-JITTER_ANGLE, JITTER_ANGLE) * jitter
+            matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+            mask = cv2.warpAffine(mask, matrix, (width, height))
+        shift = round(rng.uniform(-1, 1) * JITTER_OFFSET * jitter * digit_height)
+        spacing = round(rng.uniform(0, 1) * JITTER_SPACING * jitter * digit_height)
+        glyphs.append((np.roll(np.pad(mask, ((pad, pad), (0, 0))), shift, axis=0), spacing))
+
+    line = np.zeros((max(mask.shape[0] for mask, _ in glyphs),
+                     sum(mask.shape[1] + spacing for mask, spacing in glyphs)), np.uint8)
+    x = 0
+    for mask, spacing in glyphs:
+        region = line[:mask.shape[0], x:x + mask.shape[1]]
+        np.maximum(region, mask, out=region)
+        x += mask.shape[1] + spacing
+    return line
+
+
+def render_worksheet(lines, font=GLYPH_FONTS[0], scale=1.5, thickness=2, rotation=0.0, noise=0.0, rng=None,
+                     jitter=0.0, blur=0.0, jpeg_quality=None):
+    """把若干行文字画成白底黑字的灰度作业图片
+
+    rotation 为整页倾斜角度（度），jitter 为手写抖动强度（0~1），blur 为高斯模糊的sigma（像素），
+    noise 为高斯噪声的标准差（灰度级），jpeg_quality 不为None时按该质量做一次JPEG压缩。
+    """
+    rng = rng or np.random.default_rng()
+    width, height = PAGE_SIZE
+    page = np.full((height, width), 255, np.uint8)
+    for row, text in enumerate(lines):
+        mask = render_handwriting(text, font, scale, thickness, jitter, rng)
+        top = PAGE_MARGIN + row * ROW_HEIGHT
+        mask = mask[:max(0, min(mask.shape[0], height - top)), :max(0, width - PAGE_MARGIN)]
+        region = page[top:top + mask.shape[0], PAGE_MARGIN:PAGE_MARGIN + mask.shape[1]]
+        region[mask >= 128] = 0
+
+    if rotation:
+        page, _ = rotate(page, rotation)
+    if blur:
+        page = cv2.GaussianBlur(page, (0, 0), blur)
+    if noise:
+        noisy = page.astype(np.float32) + rng.normal(0, noise, page.shape).astype(np.float32)
+        page = np.clip(noisy, 0, 255).astype(np.uint8)
+    if jpeg_quality is not None:
+        _, data = cv2.imencode('.jpg', page, [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)])
+        page = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+    return page
+
+
+def synthetic_sample(index, seed=0, problems_per_page=6, difficulty='medium', fonts=GLYPH_FONTS,
+                     max_rotation=5.0, max_noise=0.0, max_jitter=0.0, max_blur=0.0, jpeg_quality=None):
+    """生成第index张合成作业，字体、倾斜、抖动、模糊和噪声逐张随机变化
+
+    默认不加噪声：纯白纸面上哪怕很弱的逐像素噪声也会被CLAHE放大，二值化后满是斑点。
+    每张的随机数只由 (seed, index) 决定，多个进程分头生成的结果与顺序生成一致。
+    """
+    rng = np.random.default_rng([seed, index])
+    lines, problems = problem_lines(problems_per_page, difficulty, rng=random.Random(f'{seed}:{index}'))
+    image = render_worksheet(
+        lines, fonts[index % len(fonts)], rng.uniform(1.3, 1.8), int(rng.integers(2, 4)),
+        rotation=float(rng.uniform(-max_rotation, max_rotation)),
+        noise=float(rng.uniform(0, max_noise)),
+        rng=rng,
+        jitter=float(rng.uniform(0, max_jitter)),
+        blur=float(rng.uniform(0, max_blur)),
+        jpeg_quality=jpeg_quality
+    )
+    return WorksheetSample(f'synthetic-{index:04d}', image, lines, problems)
+
+
+def synthetic_samples(count, seed=0, **options):
+    """生成count张合成作业（参数同 synthetic_sample），返回WorksheetSample的生成器"""
+    for index in range(count):
+        yield synthetic_sample(index, seed, **options)
+
+
+def write_sample(directory, seed, options, index):
+    """生成一张合成作业写入目录，返回它在 labels.json 中的一项（在工作进程中运行）"""
+    options = dict(options)
+    jpeg_quality = options.pop('jpeg_quality', None)
+    sample = synthetic_sample(index, seed, **options)
+    if jpeg_quality is None:
+        filename, params = f'{sample.name}.png', []
+    else:
+        filename, params = f'{sample.name}.jpg', [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+    if not cv2.imwrite(os.path.join(directory, filename), sample.image, params):
+        raise OSError(f"无法写入图片: {filename}")
+    entry = sample.to_dict()
+    entry['image'] = filename
+    return entry
+
+
+def write_corpus(directory, count, seed=0, workers=None, **options):
+    """把count张合成作业写入目录，并写出与 ocr_eval.load_corpus 兼容的 labels.json
+
+    workers 为进程数，默认使用所有CPU核，为1时在当前进程中生成；
+    options 同 synthetic_sample，其中 jpeg_quality 为None时保存为PNG。返回 labels.json 的路径。
+    """
+    os.makedirs(directory, exist_ok=True)
+    write = partial(write_sample, directory, seed, options)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        entries = [write(index) for index in range(count)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            entries = list(executor.map(write, range(count), chunksize=max(1, count // (4 * workers))))
+
+    path = os.path.join(directory, 'labels.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成带标准答案的合成作业图片，用于压力测试和准确率评估')
+    parser.add_argument('directory', help='输出目录，图片和 labels.json 写在这里')
+    parser.add_argument('--count', type=int, default=100, help='生成的作业数量')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子，相同的种子生成相同的作业')
+    parser.add_argument('--workers', type=int, help='并行进程数，默认为CPU核数')
+    parser.add_argument('--problems', type=int, default=6, help='每张作业的题数')
+    parser.add_argument('--difficulty', default='medium', help='题目难度：easy、medium 或 hard')
+    parser.add_argument('--fonts', default=','.join(FONT_NAMES), help=f"逗号分隔的字体名：{', '.join(FONT_NAMES)}")
+    parser.add_argument('--max-rotation', type=float, default=5.0, help='整页倾斜的最大角度（度）')
+    parser.add_argument('--max-jitter', type=float, default=0.5, help='手写抖动强度的上限（0~1）')
+    parser.add_argument('--max-blur', type=float, default=1.0, help='高斯模糊sigma的上限（像素）')
+    parser.add_argument('--max-noise', type=float, default=0.0, help='高斯噪声标准差的上限（灰度级）')
+    parser.add_argument('--jpeg-quality', type=int, default=85, help='JPEG质量，传0则保存为PNG')
+    args = parser.parse_args(argv)
+
+    try:
+        fonts = tuple(FONT_NAMES[name.strip()] for name in args.fonts.split(','))
+    except KeyError as e:
+        parser.error(f"未知的字体: {e.args[0]}")
+    path = write_corpus(
+        args.directory, args.count, seed=args.seed, workers=args.workers,
+        problems_per_page=args.problems, difficulty=args.difficulty, fonts=fonts,
+        max_rotation=args.max_rotation, max_jitter=args.max_jitter, max_blur=args.max_blur,
+        max_noise=args.max_noise, jpeg_quality=args.jpeg_quality or None
+    )
+    print(f"已生成 {args.count} 张作业，标注见 {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from ai_assistant import AIAssistant, ChatSession, estimate_tokens, truncate_to_tokens
+
+
+def prompt_tokens(messages):
+    return sum(estimate_tokens(m["content"]) + ChatSession.MESSAGE_OVERHEAD for m in messages)
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("加法") == 2
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("3+4等于几") == 3 + 1
+
+
+def test_truncate_to_tokens_keeps_the_longest_prefix():
+    text = "什么是乘法分配律 how to use it"
+    assert truncate_to_tokens(text, 100) == text
+    for budget in range(estimate_tokens(text)):
+        truncated = truncate_to_tokens(text, budget)
+        assert text.startswith(truncated) and estimate_tokens(truncated) <= budget
+        assert estimate_tokens(text[:len(truncated) + 1]) > budget
+    assert truncate_to_tokens(text, -5) == ""
+
+
+def test_old_turns_move_into_the_summary():
+    session = ChatSession("计算", "简单", context_budget=400, summary_budget=60)
+    for i in range(10):
+        session.record(f"第{i}个问题" + "问" * 20, "回答" * 30, {})
+    messages = session.build_messages("新的问题")
+
+    assert prompt_tokens(messages) <= 400
+    assert messages[-1] == {"role": "user", "content": "新的问题"}
+    assert len(session.history) < 20 and len(session.history) % 2 == 0
+    assert session.summary and estimate_tokens(session.summary) <= 60
+    assert "之前的对话要点" in messages[0]["content"]
+
+
+def test_oversized_summary_line_is_truncated():
+    session = ChatSession("计算", "简单", summary_budget=10)
+    session.add_to_summary("很长的问题" * 20, "很长的回答" * 20)
+    assert session.summary.startswith("- 问：")
+    assert estimate_tokens(session.summary) <= 10
+
+
+def test_context_budget_is_a_hard_cap():
+    session = ChatSession("计算", "简单", context_budget=400, summary_budget=300)
+    session.record("问" * 200, "答" * 200, {})
+    messages = session.build_messages("追问" * 150)
+
+    assert prompt_tokens(messages) <= 400
+    assert session.history == []
+    assert messages[-1]["content"].startswith("追问")
+
+
+def test_history_records_the_question_that_was_sent(monkeypatch):
+    assistant = AIAssistant()
+    sent = []
+
+    def fake_chat(messages, max_tokens):
+        sent.append(messages)
+        return True, "回答", {}
+
+    monkeypatch.setattr(assistant, "call_deepseek_chat", fake_chat)
+    session = assistant.start_session("计算", "简单", context_budget=400)
+    assistant.ask(session, "追问" * 300)
+
+    question = sent[0][-1]["content"]
+    assert len(question) < 600
+    assert session.history == [{"role": "user", "content": question}, {"role": "assistant", "content": "回答"}]
+
+
+def test_total_usage_and_reset():
+    session = ChatSession("计算", "简单")
+    session.record("1+1", "2", {"prompt_tokens": 10, "completion_tokens": 2})
+    session.record("2+2", "4", {"prompt_tokens": 20, "completion_tokens": 3})
+    assert session.total_usage() == {'prompt_tokens': 30, 'completion_tokens': 5, 'total_tokens': 35, 'calls': 2}
+
+    session.reset()
+    assert session.history == [] and session.summary == "" and session.total_usage()['calls'] == 0
@@ -0,0 +1,40 @@
+from decimal import Decimal
+from fractions import Fraction
+
+from answer_checker import (check_answers, STATUS_CORRECT, STATUS_WRONG,
+                            STATUS_INVALID, STATUS_MISSING)
+
+
+def test_statuses_per_item():
+    result = check_answers("12\n\nabc\n5", [12, 3, 4, 6, 7])
+    assert list(result.statuses) == [STATUS_CORRECT, STATUS_MISSING, STATUS_INVALID,
+                                     STATUS_WRONG, STATUS_MISSING]
+    assert result.correct_count == 1
+    assert result.score == 10
+
+
+def test_report_uses_question_count():
+    key = list(range(500))
+    result = check_answers("\n".join(str(n) for n in key), key)
+    assert result.correct_count == 500
+    report = result.render_report("03:00")
+    assert "(500/500题正确)" in report
+    assert report.endswith("用时：03:00")
+
+
+def test_out_of_range_answers_are_invalid():
+    result = check_answers("99999999999999999999\n-99999999999999999999\n3\n", [1, 2, 3, 4])
+    assert list(result.statuses) == [STATUS_INVALID, STATUS_INVALID, STATUS_CORRECT, STATUS_MISSING]
+    assert "第1题：✗ 答案格式错误，正确答案是 1" in result.render_report()
+
+
+def test_decimal_and_fraction_answer_keys():
+    key = [Decimal('4.2'), Fraction(7, 3), 5, Fraction(1, 2)]
+    result = check_answers("4.20\n2.33\n5\n", key)
+    assert list(result.statuses) == [STATUS_CORRECT, STATUS_CORRECT, STATUS_CORRECT, STATUS_MISSING]
+
+    result = check_answers("4.3\n7/3\nfive\n0.5", key)
+    assert list(result.statuses) == [STATUS_WRONG, STATUS_CORRECT, STATUS_INVALID, STATUS_CORRECT]
+    report = result.render_report()
+    assert "第1题：✗ 错误，正确答案是 4.2" in report and "第3题：✗ 答案格式错误，正确答案是 5" in report
+    assert [item[2] for item in result.items()] == [Decimal('4.3'), Fraction(7, 3), None, Decimal('0.5')]
@@ -0,0 +1,54 @@
+import io
+import logging
+
+import pytest
+
+from app_logging import LOG_LEVEL_ENV, ROOT_LOGGER_NAME, configure_logging, get_logger, parse_level_spec
+
+
+@pytest.fixture(autouse=True)
+def restore_loggers():
+    names = [ROOT_LOGGER_NAME] + [f'{ROOT_LOGGER_NAME}.{name}' for name in ('ocr', 'ai', 'storage', 'ui')]
+    saved = [(logging.getLogger(name), logging.getLogger(name).level) for name in names]
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    handlers, propagate = list(root.handlers), root.propagate
+    yield
+    for logger, level in saved:
+        logger.setLevel(level)
+    root.handlers[:] = handlers
+    root.propagate = propagate
+
+
+def test_parse_level_spec():
+    assert parse_level_spec(None) == (logging.INFO, {}, [])
+    assert parse_level_spec('warning') == (logging.WARNING, {}, [])
+    assert parse_level_spec(' ERROR , ocr = debug,ai=Warning ') == (
+        logging.ERROR, {'ocr': logging.DEBUG, 'ai': logging.WARNING}, [])
+
+
+def test_invalid_parts_are_reported_and_ignored():
+    default, levels, errors = parse_level_spec('verbose,ocr=loud,orc=DEBUG,ui=DEBUG')
+    assert default == logging.INFO
+    assert levels == {'ui': logging.DEBUG}
+    assert len(errors) == 3
+    assert "'verbose'" in errors[0] and "'loud'" in errors[1] and "'orc'" in errors[2]
+
+
+def test_configure_falls_back_to_info_with_a_warning(monkeypatch):
+    monkeypatch.setenv(LOG_LEVEL_ENV, 'verbose,storage=DEBUG')
+    stream = io.StringIO()
+    root = configure_logging(stream=stream)
+
+    assert root.level == logging.INFO
+    assert get_logger('storage').level == logging.DEBUG
+    assert "WARNING" in stream.getvalue() and "'verbose'" in stream.getvalue()
+
+
+def test_repeated_configuration_keeps_one_handler():
+    configure_logging('DEBUG', stream=io.StringIO())
+    stream = io.StringIO()
+    root = configure_logging(logging.ERROR, stream=stream)
+    assert root.level == logging.ERROR
+    assert sum(getattr(h, '_mathpop_handler', False) for h in root.handlers) == 1
+    get_logger('ocr').error("识别失败")
+    assert "[mathpop.ocr] 识别失败" in stream.getvalue()
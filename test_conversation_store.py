@@ -0,0 +1,45 @@
+from conversation_store import ConversationStore
+
+
+def test_ring_buffer_keeps_latest_and_survives_reload(tmp_path):
+    path = str(tmp_path / "conversations.jsonl")
+    store = ConversationStore(path, capacity=5)
+    for i in range(23):
+        store.append("alice", f"问题{i}", "回答" * 50)
+
+    assert store.count("alice") == 5
+    assert [r["question"] for r in store.recent("alice")] == [f"问题{i}" for i in range(18, 23)]
+
+    reloaded = ConversationStore(path, capacity=5)
+    assert [r["question"] for r in reloaded.recent("alice")] == [f"问题{i}" for i in range(18, 23)]
+    assert reloaded.recent("alice", 1)[0]["answer"] == "回答" * 50
+
+
+def test_search_questions_and_answers(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.jsonl"), capacity=3)
+    store.append("alice", "什么是乘法分配律", "a × (b + c) = a × b + a × c")
+    store.append("alice", "how to add fractions", "通分后分子相加")
+    store.append("bob", "乘法分配律怎么用", "拆开再相乘")
+
+    assert [r["question"] for r in store.search("alice", "分配律")] == ["什么是乘法分配律"]
+    assert [r["question"] for r in store.search("alice", "通分")] == ["how to add fractions"]
+    assert store.search("alice", "Fractions")[0]["answer"] == "通分后分子相加"
+    assert store.search("alice", "除法") == []
+
+    # 被淘汰的记录不再出现在搜索结果中
+    for i in range(3):
+        store.append("alice", f"问题{i}", "其他")
+    assert store.search("alice", "分配律") == []
+    assert len(store.search("bob", "分配律")) == 1
+
+
+def test_migrate_from_user_data(tmp_path):
+    store = ConversationStore(str(tmp_path / "conversations.jsonl"))
+    user_data = {"alice": {"password": "x", "ai_conversations": [
+        {"timestamp": "2025-06-05 01:04:10", "question": "1+1", "answer": "2"}
+    ]}}
+
+    assert store.migrate_from_user_data(user_data)
+    assert "ai_conversations" not in user_data["alice"]
+    assert store.recent("alice")[0]["timestamp"] == "2025-06-05 01:04:10"
+    assert not store.migrate_from_user_data(user_data)
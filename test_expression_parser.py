@@ -0,0 +1,98 @@
+from fractions import Fraction
+
+import pytest
+
+from expression_parser import (
+    BinaryOp, ExpressionError, Number, evaluate, parse_expression, parse_line, unknown_characters
+)
+from OCR import OCRGrader
+
+
+def test_precedence_and_associativity():
+    assert evaluate(parse_expression("3 + 4 × 2")) == 11
+    assert evaluate(parse_expression("(3 + 4) × 2")) == 14
+    assert evaluate(parse_expression("10 - 4 - 3")) == 3
+    assert evaluate(parse_expression("24 ÷ 4 ÷ 2")) == 3
+    assert evaluate(parse_expression("[2 + 3] * {4 - 1}")) == 15
+
+
+def test_unary_minus_and_exact_division():
+    assert evaluate(parse_expression("-3 + 5")) == 2
+    assert evaluate(parse_expression("7 / 2")) == Fraction(7, 2)
+    with pytest.raises(ZeroDivisionError):
+        evaluate(parse_expression("5 / (2 - 2)"))
+
+
+def test_str_keeps_needed_parentheses():
+    assert str(parse_expression("(3 + 4) * 2")) == "(3 + 4) * 2"
+    assert str(parse_expression("8 - (3 - 1)")) == "8 - (3 - 1)"
+    assert str(parse_expression("(2 * 3) + 1")) == "2 * 3 + 1"
+
+
+def test_parse_line_kinds():
+    line = parse_line("3 + 4 × 2 = 11")
+    assert line.kind == 'complete'
+    assert line.expression == BinaryOp('+', Number(3), BinaryOp('*', Number(4), Number(2)))
+    assert evaluate(line.answer) == 11
+
+    assert parse_line("12 + 8 = ?").kind == 'question'
+    assert parse_line("12 + 8 =").kind == 'question'
+    assert parse_line("20").kind == 'answer'
+    assert parse_line("= 20").kind == 'answer'
+
+
+@pytest.mark.parametrize("text", ["3 +", "(3 + 4", "(3 + 4]", "3 4", "3 $ 4"])
+def test_invalid_expressions(text):
+    with pytest.raises(ExpressionError):
+        parse_expression(text)
+
+
+def test_non_strict_skips_noise():
+    assert evaluate(parse_expression("3 a+ 4", strict=False)) == 7
+    assert unknown_characters("3 a+ 4") == 1
+    assert unknown_characters("第1题 = ?") == 2
+
+
+@pytest.fixture(scope='module')
+def grader():
+    return OCRGrader(debug_image_path=None)
+
+
+@pytest.mark.parametrize("text", ["第1题", "Page 2", "第1-2题", "姓名：张三", "2024年5月3日"])
+def test_header_lines_are_ignored(grader, text):
+    assert grader.parse_line(grader.normalize_text(text)) is None
+
+
+def test_header_lines_do_not_become_answers(grader):
+    text = "第1题\n12 + 8 =\nPage 2\n20"
+    problems, answers = grader.parse_problems_and_answers(text)
+    assert problems == [BinaryOp('+', Number(12), Number(8))]
+    assert answers == [20]
+
+
+@pytest.mark.parametrize("text", [
+    '(' * 3000 + '1' + ')' * 3000 + '=1',
+    '-' * 3000 + '1 = 1',
+    '9' * 5000 + '=1',
+    '1 + ' * 3000 + '1 = 1',
+])
+def test_oversized_input_is_an_expression_error(grader, text):
+    with pytest.raises(ExpressionError):
+        parse_line(text)
+    assert grader.parse_line(text) is None
+
+
+def test_limits_leave_ordinary_nesting_alone():
+    assert evaluate(parse_expression('(' * 20 + '1 + 2' + ')' * 20)) == 3
+    assert evaluate(parse_expression('- - 3 + ' + '9' * 20)) == 10 ** 20 + 2
+
+
+def test_lenient_parse_only_skips_a_little_noise(grader):
+    line = grader.parse_line("3 a+ 4 = 7")
+    assert line.kind == 'complete' and evaluate(line.expression) == 7
+
+    # 噪声太多时只抢救等号前的一道题，等号后的数字才是答案
+    line = grader.parse_line("Problem 3: 3 + 4 = 7")
+    assert line.expression == BinaryOp('+', Number(3), Number(4)) and line.answer == Number(7)
+    line = grader.parse_line("1 + 2 = ? 3 + 4 = 7")
+    assert line.kind == 'question' and line.expression == BinaryOp('+', Number(1), Number(2))
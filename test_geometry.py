@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+
+from geometry import correct_geometry, downsample, estimate_skew, rotate
+
+
+def make_worksheet():
+    page = np.full((900, 1200), 255, np.uint8)
+    for i, text in enumerate(["12 + 8 = 20", "7 x 6 = 42", "35 - 9 = 26", "48 / 6 = 8"]):
+        cv2.putText(page, text, (80, 120 + i * 150), cv2.FONT_HERSHEY_SIMPLEX, 2.2, 0, 5)
+    return page
+
+
+def test_flat_scan_is_left_alone():
+    page = make_worksheet()
+    corrected, correction = correct_geometry(page)
+    assert correction.method == 'none'
+    assert corrected is page
+
+
+def test_rotated_photo_is_deskewed():
+    tilted, _ = rotate(make_worksheet(), -8)
+    corrected, correction = correct_geometry(tilted)
+    assert correction.method == 'rotate'
+    assert abs(correction.angle - 8) < 0.5
+    assert abs(estimate_skew(downsample(corrected)[0]) or 0) < 0.5
+
+
+def test_keystoned_page_is_warped_flat():
+    page = make_worksheet()
+    background = np.full((1400, 1600), 60, np.uint8)
+    source = np.float32([[0, 0], [1199, 0], [1199, 899], [0, 899]])
+    target = np.float32([[250, 200], [1350, 280], [1300, 1200], [200, 1100]])
+    matrix = cv2.getPerspectiveTransform(source, target)
+    warped = cv2.warpPerspective(page, matrix, (1600, 1400))
+    mask = cv2.warpPerspective(np.full_like(page, 255), matrix, (1600, 1400)) > 0
+    background[mask] = warped[mask]
+
+    corrected, correction = correct_geometry(background)
+    assert correction.method == 'perspective'
+    assert np.allclose(correction.quad, target, atol=6)
+    assert correction.size == (corrected.shape[1], corrected.shape[0])
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import OCR
+from glyph_recognizer import GLYPH_FONTS, GLYPH_LABELS, GlyphClassifier, GlyphRecognizer, render_text, synthetic_dataset
+
+PROBLEMS = ["12 + 8 = 20", "7 × 6 = 42", "35 - 9 = 26", "48 ÷ 6 = 8", "(3 + 4) × 2 = 14", "2.5 + 1.5 = 4"]
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    # 比默认规模小的分类器，测试中训练更快
+    return GlyphClassifier.train(samples_per_label=150, epochs=8)
+
+
+def make_page(font, lines=PROBLEMS):
+    page = np.full((1000, 1400), 255, np.uint8)
+    for i, text in enumerate(lines):
+        mask, _ = render_text(text, font, 1.5, 2)
+        height, width = mask.shape
+        page[60 + i * 150:60 + i * 150 + height, 80:80 + width][mask >= 128] = 0
+    return page
+
+
+def test_classifier_generalizes_to_unseen_samples(classifier):
+    features, targets = synthetic_dataset(samples_per_label=30, seed=99)
+    labels, probs = classifier.predict(features.reshape(-1, 28, 28))
+    accuracy = np.mean([GLYPH_LABELS[target] == label for target, label in zip(targets, labels)])
+    assert accuracy > 0.95
+    assert probs.min() >= 0 and probs.max() <= 1
+
+
+def test_save_and_load_round_trip(classifier, tmp_path):
+    path = str(tmp_path / 'glyphs.npz')
+    classifier.save(path)
+    loaded = GlyphClassifier.load(path)
+    glyphs = synthetic_dataset(samples_per_label=2, seed=5)[0].reshape(-1, 28, 28)
+    assert loaded.predict(glyphs)[0] == classifier.predict(glyphs)[0]
+
+
+@pytest.mark.parametrize('font', GLYPH_FONTS[:2] + GLYPH_FONTS[-1:])
+def test_recognizer_reads_rendered_worksheet(classifier, font):
+    lines = GlyphRecognizer(classifier).recognize(make_page(font))
+    assert [line.text.replace(' ', '') for line in lines] == [text.replace(' ', '') for text in PROBLEMS]
+    assert all(line.bbox is not None and line.confidence > 50 for line in lines)
+
+
+def test_grader_uses_glyph_backend(classifier):
+    grader = OCR.OCRGrader(debug_image_path=None, backend=OCR.BACKEND_GLYPH,
+                           recognizer=GlyphRecognizer(classifier))
+    assert grader.engine_status == OCR.ENGINE_READY
+    result = grader.grade_homework(make_page(GLYPH_FONTS[0]))
+    assert result.provenance == OCR.PROVENANCE_OCR
+    assert result.correct_count == result.total == len(PROBLEMS)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        OCR.OCRGrader(debug_image_path=None, backend='cloud')
@@ -0,0 +1,49 @@
+import json
+from fractions import Fraction
+
+from expression_parser import parse_expression
+from grading_result import (
+    GradingResult, ProblemRecord, PROVENANCE_OCR,
+    STATUS_CORRECT, STATUS_REVIEW, STATUS_UNANSWERED, STATUS_WRONG
+)
+
+
+def make_result():
+    records = [
+        ProblemRecord(1, parse_expression("3 + 4 * 2"), 11, 11, STATUS_CORRECT, 91.5, bbox=(10, 10, 200, 40)),
+        ProblemRecord(2, parse_expression("7 / 2"), 3, Fraction(7, 2), STATUS_WRONG, 88.0),
+        ProblemRecord(3, parse_expression("9 - 5"), 1, 4, STATUS_REVIEW, 42.0),
+        ProblemRecord(4, parse_expression("6 * 6"), None, 36, STATUS_UNANSWERED),
+    ]
+    return GradingResult(records, [11, 3, 1], provenance=PROVENANCE_OCR)
+
+
+def test_statistics_come_from_records():
+    result = make_result()
+    assert result.total == 4
+    assert result.correct_count == 1
+    assert result.graded_count == 3
+    assert result.review_needed == [3]
+    assert result.is_real
+
+
+def test_record_fields():
+    record = make_result().problems[0]
+    assert record.op == '+'
+    assert record.operands == [3, 4, 2]
+
+
+def test_rendering():
+    lines = make_result().grading_results.split('\n')
+    assert lines[0] == "第1题: ✓ 正确！"
+    assert lines[1] == "第2题: ✗ 错误，正确答案是 3.5"
+    assert "请老师复核" in lines[2]
+    assert lines[3] == "第4题: 未作答，正确答案是 36"
+    assert GradingResult.failed("boom").grading_results == "批改失败: boom"
+
+
+def test_to_dict_is_json_serializable():
+    data = json.loads(json.dumps(make_result().to_dict(), ensure_ascii=False))
+    assert data['total_problems'] == 4
+    assert data['problems'][1]['expected'] == '3.5'
+    assert data['problems'][0]['bbox'] == [10, 10, 200, 40]
@@ -0,0 +1,68 @@
+import numpy as np
+
+import OCR
+from grading_result import STATUS_CORRECT, STATUS_UNANSWERED
+from layout import align_answers
+from ocr_confidence import OCRLine, lines_from_data, text_line, vote_lines
+
+
+def line(text, left, top, right, bottom, confidence=90):
+    return OCRLine(text, confidence, left, top, right, bottom)
+
+
+def test_dropped_answer_does_not_shift_later_answers():
+    problems = [line('3+4=', 10, 10, 100, 30), line('9-5=', 10, 60, 100, 80), line('6x2=', 10, 110, 100, 130)]
+    answers = [line('7', 130, 10, 150, 30), line('12', 130, 110, 160, 130)]
+    assert align_answers(problems, answers) == [0, None, 1]
+
+
+def test_two_column_worksheet():
+    # 两栏：左栏 3+4=7、9-5=4；右栏 6x2=12、8/4=2，识别顺序按顶部坐标交错
+    problems = [line('3+4=', 10, 10, 100, 30), line('6x2=', 400, 12, 490, 32),
+                line('9-5=', 10, 60, 100, 80), line('8/4=', 400, 58, 490, 78)]
+    answers = [line('12', 520, 12, 550, 32), line('7', 130, 10, 150, 30),
+               line('2', 520, 58, 540, 78), line('4', 130, 60, 150, 80)]
+    assert align_answers(problems, answers) == [1, 0, 3, 2]
+
+
+def test_answer_written_below_problem():
+    problems = [line('25+17=', 10, 10, 150, 30), line('40-8=', 300, 10, 420, 30)]
+    answers = [line('32', 310, 45, 350, 65), line('42', 20, 45, 60, 65)]
+    assert align_answers(problems, answers) == [1, 0]
+
+
+def test_inline_answer_stays_with_its_line():
+    inline = line('3+4=7', 10, 10, 120, 30)
+    problems = [inline, line('9-5=', 10, 60, 100, 80)]
+    answers = [inline, line('4', 130, 60, 150, 80)]
+    assert align_answers(problems, answers) == [0, 1]
+
+
+def test_missing_geometry_falls_back_to_index():
+    problems = [text_line('3+4='), text_line('9-5='), text_line('6x2=')]
+    answers = [text_line('7'), text_line('4')]
+    assert align_answers(problems, answers) == [0, 1, None]
+
+
+def test_wide_gap_splits_line_into_columns():
+    keys = ('text', 'conf', 'block_num', 'par_num', 'line_num', 'left', 'top', 'width', 'height')
+    words = [('3+4=7', 10), ('6x2=12', 400)]
+    data = {key: [] for key in keys}
+    for word, left in words:
+        for key, value in zip(keys, (word, 90, 1, 1, 1, left, 10, 80, 20)):
+            data[key].append(value)
+    lines = lines_from_data(data)
+    assert [line.text for line in lines] == ['3+4=7', '6x2=12']
+    assert len(vote_lines([lines, lines])) == 2
+
+
+def test_grading_pairs_by_position(monkeypatch):
+    grader = OCR.OCRGrader(debug_image_path=None)
+    grader.engine_status = OCR.ENGINE_READY
+    lines = [line('3+4=', 10, 10, 100, 30), line('9-5=', 10, 60, 100, 80),
+             line('6x2=', 10, 110, 100, 130), line('7', 130, 10, 150, 30), line('12', 130, 110, 160, 130)]
+    monkeypatch.setattr(grader, 'preprocess_image', lambda path: np.zeros((10, 10), np.uint8))
+    monkeypatch.setattr(grader, 'extract_lines', lambda image: lines)
+
+    result = grader.grade_homework('unused.jpg')
+    assert [record.status for record in result.problems] == [STATUS_CORRECT, STATUS_UNANSWERED, STATUS_CORRECT]
@@ -0,0 +1,29 @@
+from local_solver import LocalMathSolver
+
+
+def test_routes_plain_arithmetic_to_local_solver():
+    solver = LocalMathSolver()
+    assert solver.can_solve("37 × 24 怎么算")
+    assert solver.can_solve("105-38等于多少？")
+    assert solver.can_solve("12 除以 5")
+    assert not solver.can_solve("什么是乘法分配律")
+    assert not solver.can_solve("为什么 3 + 4 = 7")
+    assert not solver.can_solve("3 + 4 × 2 = ?")
+
+
+def test_column_method_answers():
+    solver = LocalMathSolver()
+    cases = {
+        "37 × 24": "答案：37 × 24 = 888",
+        "105 - 38": "答案：105 - 38 = 67",
+        "25 + 17": "答案：25 + 17 = 42",
+        "987 ÷ 7": "答案：987 ÷ 7 = 141",
+        "12 ÷ 5": "答案：12 ÷ 5 = 2 …… 2",
+    }
+    for question, expected in cases.items():
+        success, text = solver.solve(question)
+        assert success
+        assert expected in text
+
+    success, text = solver.solve("5 - 9")
+    assert "5 - 9 = -4" in text
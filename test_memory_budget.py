@@ -0,0 +1,62 @@
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+import OCR
+from memory_budget import MemoryBudget, MemoryLimitError
+
+
+@pytest.fixture
+def worksheet(tmp_path):
+    page = np.full((600, 800, 3), 255, np.uint8)
+    for i, text in enumerate(["12 + 8 = 20", "7 x 6 = 42", "35 - 9 = 26"]):
+        cv2.putText(page, text, (60, 120 + i * 150), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 4)
+    path = str(tmp_path / 'worksheet.png')
+    cv2.imwrite(path, page)
+    return path
+
+
+def traced_preprocess(grader, path):
+    tracemalloc.start()
+    try:
+        binary = grader.preprocess_image(path)
+        return binary, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_budget_tracks_live_buffers_and_peak():
+    budget = MemoryBudget(limit=1000)
+    budget.empty('a', (20, 20))
+    budget.track('b', np.zeros(500, np.uint8))
+    budget.release('a')
+    assert budget.current == 500 and budget.peak == 900
+    with pytest.raises(MemoryLimitError):
+        budget.empty('c', (30, 30))
+
+
+def test_low_memory_matches_default_with_smaller_peak(worksheet):
+    default = OCR.OCRGrader(debug_image_path=None)
+    low = OCR.OCRGrader(debug_image_path=None, low_memory=True)
+    expected, default_peak = traced_preprocess(default, worksheet)
+    binary, low_peak = traced_preprocess(low, worksheet)
+
+    assert np.array_equal(binary, expected)
+    assert low.last_peak_memory < default.last_peak_memory / 2
+    assert low_peak < default_peak / 2
+
+
+def test_memory_limit_reduces_scale(worksheet):
+    grader = OCR.OCRGrader(debug_image_path=None, low_memory=True, memory_limit=2 * 2**20)
+    binary = grader.preprocess_image(worksheet)
+    assert binary.shape[1] < 1600
+    assert grader.last_peak_memory <= 2 * 2**20
+
+
+def test_memory_limit_too_small_fails_the_job(worksheet):
+    grader = OCR.OCRGrader(debug_image_path=None, low_memory=True, memory_limit=500 * 1024)
+    result = grader.grade_homework(worksheet)
+    assert result.error is not None and '内存上限' in result.error
+    assert result.peak_memory is not None
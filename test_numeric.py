@@ -0,0 +1,54 @@
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from numeric import answers_equal, format_number, normalize, parse_number
+from problem_generator import generate_operands
+
+
+def test_parse_number_forms():
+    assert parse_number("12") == 12 and type(parse_number("12")) is int
+    assert parse_number("3.5") == Decimal("3.5")
+    assert parse_number("1/2") == Fraction(1, 2)
+    assert parse_number("6/3") == 2 and type(parse_number("6/3")) is int
+    for text in ("", "abc", "1/0", "1e5", "nan"):
+        with pytest.raises(ValueError):
+            parse_number(text)
+
+
+def test_answers_equal_normalises_forms():
+    assert answers_equal(parse_number("0.5"), Fraction(1, 2))
+    assert answers_equal(parse_number("3.50"), Fraction(7, 2))
+    assert answers_equal(parse_number("6.0"), 6)
+    assert not answers_equal(parse_number("3"), Fraction(7, 2))
+    assert not answers_equal(None, 3)
+
+
+def test_repeating_decimal_tolerance():
+    third = Fraction(1, 3)
+    assert answers_equal(parse_number("0.33"), third)
+    assert answers_equal(parse_number("0.333"), third)
+    assert not answers_equal(parse_number("0.3"), third)  # 位数不够
+    assert not answers_equal(parse_number("0.34"), third)  # 四舍五入不对
+    # 有限小数必须精确
+    assert not answers_equal(parse_number("3.1"), Fraction(63, 20))
+
+
+def test_format_number():
+    assert format_number(7) == "7"
+    assert format_number(Fraction(7, 2)) == "3.5"
+    assert format_number(Fraction(1, 3)) == "1/3"
+    assert format_number(Decimal("15.0")) == "15"
+    assert normalize(Decimal("2.0")) == 2
+
+
+@pytest.mark.parametrize("number_format", ["integer", "decimal", "fraction"])
+def test_generated_answers_are_exact(number_format):
+    for _ in range(200):
+        a, op, b, ans = generate_operands('hard', None, number_format)
+        exact = {'+': Fraction(a) + Fraction(b), '-': Fraction(a) - Fraction(b),
+                 '*': Fraction(a) * Fraction(b), '/': Fraction(a) / Fraction(b)}[op]
+        assert Fraction(ans) == exact
+        if number_format == 'integer':
+            assert type(ans) is int
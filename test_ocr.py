@@ -24,17 +24,17 @@ def test_ocr_grader():
         print("OCR识别结果测试")
         print("=" * 50)
         print("检测到的题目:")
-        print(result["detected_problems"])
+        print(result.detected_problems)
         
         print("\n检测到的答案:")
-        print(result["detected_answers"])
+        print(result.detected_answers)
         
         print("\n批改结果:")
-        print(result["grading_results"])
+        print(result.grading_results)
         print("=" * 50)
         
         # 如果没有检测到题目或答案，可能是识别问题
-        if not result["detected_problems"] or not result["detected_answers"]:
+        if not result.problems or not result.answers:
             print("警告: OCR可能未能正确识别题目或答案，请检查图片质量和清晰度。")
             
     except Exception as e:
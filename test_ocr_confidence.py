@@ -0,0 +1,86 @@
+import numpy as np
+
+import OCR
+from grading_result import STATUS_REVIEW
+from ocr_confidence import LinesForLog, OCRLine, lines_from_data, text_line, vote_lines
+
+
+def make_data(rows):
+    """按 (行号, 文字, 置信度, 顶部坐标) 构造 image_to_data 的DICT输出"""
+    keys = ('text', 'conf', 'block_num', 'par_num', 'line_num', 'left', 'top', 'width', 'height')
+    data = {key: [] for key in keys}
+    # 页级别的非文字行，conf为-1
+    for key, value in zip(keys, ('', -1, 0, 0, 0, 0, 0, 800, 500)):
+        data[key].append(value)
+    for position, (line_num, word, conf, top) in enumerate(rows):
+        for key, value in zip(keys, (word, conf, 1, 1, line_num, 10 + 40 * position, top, 30, 20)):
+            data[key].append(value)
+    return data
+
+
+def test_lines_from_data_weights_confidence_by_length():
+    data = make_data([(1, '12', 90, 10), (1, '+', 30, 12), (1, '8', 90, 10), (2, '20', 80, 50)])
+    lines = lines_from_data(data)
+    assert [line.text for line in lines] == ['12 + 8', '20']
+    assert lines[0].confidence == (90 * 2 + 30 + 90) / 4
+    assert lines[1].top == 50 and lines[1].bottom == 70
+    assert lines[0].bbox == (10, 10, 120, 32)
+
+
+def test_vote_prefers_agreement_over_single_confident_config():
+    candidates = [
+        [OCRLine('7 + 1 = 8', 70, 0, 10, 100, 30)],
+        [OCRLine('7 + 1 = 8', 65, 0, 12, 100, 30)],
+        [OCRLine('7 + 7 = 8', 95, 0, 10, 100, 28)],
+    ]
+    voted = vote_lines(candidates)
+    assert len(voted) == 1
+    assert voted[0].text == '7 + 1 = 8'
+    assert voted[0].confidence == (70 + 65) / 3
+
+
+def test_low_confidence_problem_is_flagged_for_review(monkeypatch):
+    data = make_data([(1, '3+4=7', 95, 10), (2, '9-5=1', 40, 50)])
+    grader = OCR.OCRGrader(debug_image_path=None)
+    grader.engine_status = OCR.ENGINE_READY
+    monkeypatch.setattr(grader, 'preprocess_image', lambda path: np.zeros((10, 10), np.uint8))
+    monkeypatch.setattr(OCR.pytesseract, 'image_to_data', lambda *args, **kwargs: data)
+
+    result = grader.grade_homework('unused.jpg')
+    assert result.confidences == [95.0, 40.0]
+    assert result.review_needed == [2]
+    assert result.problems[1].status == STATUS_REVIEW
+    grading = result.grading_results.split('\n')
+    assert grading[0] == '第1题: ✓ 正确！'
+    assert '请老师复核' in grading[1]
+
+
+def page_rows(count, confidence=90):
+    return [OCRLine(f'{i} + 1 = {i + 1}', confidence, 10, 20 + 40 * i, 300, 45 + 40 * i) for i in range(count)]
+
+
+def test_configs_without_the_row_do_not_lower_confidence():
+    rows = page_rows(3)
+    voted = vote_lines([rows, rows, [], [], rows])
+    assert [line.text for line in voted] == [line.text for line in rows]
+    assert all(line.confidence == 90 for line in voted)
+
+    # 识别出这一行但读错的配置仍然拉低置信度
+    wrong = [row._replace(text='7 + 7 = 8') for row in rows]
+    voted = vote_lines([rows, rows, wrong])
+    assert all(line.confidence == 2 * 90 / 3 for line in voted)
+
+
+def test_full_page_candidate_does_not_swallow_rows():
+    rows = page_rows(12)
+    # psm 7 把整页识别成一行，纵向中心落在两行之间
+    full_page = OCRLine(' '.join(row.text for row in rows), 80, 0, 0, 800, 490)
+    voted = vote_lines([rows, rows, rows, [full_page], []])
+    assert [line.text for line in voted] == [line.text for line in rows]
+    assert all(line.confidence == 90 for line in voted)
+
+
+def test_lines_for_log_formats_only_when_printed():
+    lines = [OCRLine('3 + 4 = 7', 91.6, 0, 0, 10, 10), text_line('12 - 5 = ?')]
+    assert repr(LinesForLog(lines)) == repr([('3 + 4 = 7', 92), ('12 - 5 = ?', None)])
+    assert repr(LinesForLog(lines, limit=1, with_confidence=False)) == repr(['3 + 4 = 7'])
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import OCR
+
+
+@pytest.fixture
+def grader(monkeypatch):
+    grader = OCR.OCRGrader(debug_image_path=None)
+    monkeypatch.setattr(grader, 'preprocess_image', lambda path: np.zeros((10, 10), np.uint8))
+    return grader
+
+
+def test_unavailable_engine_is_reported_as_mock(grader):
+    grader.engine_status = OCR.ENGINE_NO_BINARY
+    result = grader.grade_homework('unused.jpg')
+    assert result.provenance == OCR.PROVENANCE_MOCK
+    assert result.engine_status == OCR.ENGINE_NO_BINARY
+    assert 'missing_binary' in result.fallback_reason
+    assert grader.metrics['skipped_sweeps'] == 1
+    assert grader.metrics['mock_fallbacks'] == 1
+
+
+def test_strict_mode_fails_fast(grader):
+    grader.engine_status = OCR.ENGINE_NO_BINARY
+    grader.strict = True
+    with pytest.raises(OCR.OCREngineError):
+        grader.grade_homework('unused.jpg')
+
+
+def test_repeated_sweep_failures_disable_engine(grader, monkeypatch):
+    calls = []
+
+    def broken(*args, **kwargs):
+        calls.append(1)
+        raise RuntimeError("tesseract crashed")
+
+    grader.engine_status = OCR.ENGINE_READY
+    monkeypatch.setattr(OCR.pytesseract, 'image_to_data', broken)
+    for _ in range(OCR.MAX_ENGINE_FAILURES + 2):
+        result = grader.grade_homework('unused.jpg')
+        assert result.provenance == OCR.PROVENANCE_MOCK
+
+    assert grader.engine_status == OCR.ENGINE_FAILING
+    assert grader.metrics['failed_sweeps'] == OCR.MAX_ENGINE_FAILURES
+    assert grader.metrics['skipped_sweeps'] == 2
+    # 引擎被标记为不可用后不再执行多配置识别
+    assert len(calls) == OCR.MAX_ENGINE_FAILURES * len(grader.OCR_CONFIGS)
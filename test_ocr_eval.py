@@ -0,0 +1,91 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+import glyph_recognizer
+import OCR
+from glyph_recognizer import GlyphClassifier, GlyphRecognizer
+from grading_result import STATUS_CORRECT, STATUS_UNANSWERED, STATUS_WRONG
+from ocr_eval import DEFAULT_CORPUS, count_line_matches, evaluate, format_report, load_corpus
+from synthetic_worksheets import render_worksheet, synthetic_samples
+
+
+@pytest.fixture(scope='module')
+def grader():
+    # 比默认规模小的分类器，测试中训练更快
+    classifier = GlyphClassifier.train(samples_per_label=150, epochs=8)
+    return OCR.OCRGrader(debug_image_path=None, trace=True, backend=OCR.BACKEND_GLYPH,
+                         recognizer=GlyphRecognizer(classifier))
+
+
+def test_synthetic_samples_are_reproducible():
+    first = list(synthetic_samples(3, seed=7))
+    second = list(synthetic_samples(3, seed=7))
+    assert [s.lines for s in first] == [s.lines for s in second]
+    assert all(np.array_equal(a.image, b.image) for a, b in zip(first, second))
+
+    sample = first[0]
+    assert len(sample.lines) == len(sample.problems) == 6
+    for line, problem in zip(sample.lines, sample.problems):
+        assert line.startswith(problem.expression)
+        assert problem.status in (STATUS_CORRECT, STATUS_WRONG, STATUS_UNANSWERED)
+        assert (problem.answer is None) == (problem.status == STATUS_UNANSWERED)
+        assert (problem.answer == problem.solution) == (problem.status == STATUS_CORRECT)
+
+
+def test_render_worksheet_draws_ink_on_white_page():
+    page = render_worksheet(['12 + 8 = 20'])
+    assert page.dtype == np.uint8 and page[0, 0] == 255
+    assert (page == 0).any()
+
+
+def test_example_corpus_is_labelled():
+    samples = load_corpus(DEFAULT_CORPUS)
+    assert samples and all(sample.lines and sample.problems for sample in samples)
+
+
+def test_line_matching_ignores_spacing_and_order(grader):
+    expected = ['12 + 8 = 20', '7 × 6 = 42', '7 × 6 = 42']
+    assert count_line_matches(grader, expected, ['7×6=42', '12 +8 = 20']) == 2
+
+
+def test_evaluate_reports_accuracy_and_stage_latency(grader, tmp_path):
+    samples = list(synthetic_samples(2, seed=3, max_rotation=0))
+    report = evaluate(grader, samples)
+
+    assert report['samples'] == 2 and report['provenance'] == {'ocr': 2}
+    assert report['line_accuracy'] == report['grading_accuracy'] == 1.0
+    assert report['failures'] == []
+    for stage in ('total', 'preprocess', 'extract_text'):
+        assert set(report['latency_ms'][stage]) == {'p50', 'p90', 'p99'}
+    assert '批改准确率: 100.0%' in format_report(report)
+    with open(tmp_path / 'report.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+
+
+def test_lazy_classifier_training_is_not_timed(grader, monkeypatch):
+    classifier = grader.recognizer.classifier
+    calls = []
+
+    def slow_default_classifier():
+        # 第一次调用模拟训练分类器的耗时
+        if not calls:
+            time.sleep(1.0)
+        calls.append(1)
+        return classifier
+
+    monkeypatch.setattr(glyph_recognizer, 'default_classifier', slow_default_classifier)
+    lazy = OCR.OCRGrader(debug_image_path=None, trace=True, backend=OCR.BACKEND_GLYPH, recognizer=GlyphRecognizer())
+    report = evaluate(lazy, synthetic_samples(2, seed=3, max_rotation=0))
+    assert len(calls) == 3
+    assert report['latency_ms']['total']['p99'] < 1000
+
+
+def test_mock_text_does_not_count_as_recognized():
+    grader = OCR.OCRGrader(debug_image_path=None)
+    grader.engine_status = OCR.ENGINE_NO_BINARY
+    report = evaluate(grader, list(synthetic_samples(1, seed=3)))
+    assert report['line_accuracy'] == report['grading_accuracy'] == 0.0
+    assert len(report['failures']) == 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import OCR
+import pages
+from pages import PageError, is_document, iter_pages, page_count
+
+
+def write_tiff(path, count):
+    frames = [Image.fromarray(np.full((40, 60), 40 * i, np.uint8)) for i in range(count)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+    return path
+
+
+def test_multipage_tiff_is_streamed_page_by_page(tmp_path):
+    path = write_tiff(str(tmp_path / 'class.tif'), 3)
+    assert is_document(path)
+    assert page_count(path) == 3
+
+    stream = iter_pages(path)
+    first = next(stream)
+    assert first.number == 1 and first.image.shape == (40, 60) and first.image[0, 0] == 0
+    assert [(page.number, page.image[0, 0]) for page in stream] == [(2, 40), (3, 80)]
+
+
+def test_pdf_without_renderer_raises(tmp_path, monkeypatch):
+    path = tmp_path / 'class.pdf'
+    path.write_bytes(b'%PDF-1.4\n')
+    monkeypatch.setattr(pages, 'pdf_renderer', lambda: None)
+    with pytest.raises(PageError):
+        list(iter_pages(str(path)))
+
+
+def test_grade_document_tags_results_with_page(tmp_path, monkeypatch):
+    path = write_tiff(str(tmp_path / 'class.tiff'), 2)
+    grader = OCR.OCRGrader(debug_image_path=None)
+    seen = []
+    monkeypatch.setattr(grader, 'preprocess_image', lambda image: seen.append(image.shape) or image)
+
+    results = list(grader.grade_document(path))
+    assert [result.page for result in results] == [1, 2]
+    assert seen == [(40, 60), (40, 60)]
+    assert results[1].to_dict()['page'] == 2
+
+
+def test_grade_document_reports_unreadable_file(tmp_path, monkeypatch):
+    path = tmp_path / 'class.pdf'
+    path.write_bytes(b'%PDF-1.4\n')
+    monkeypatch.setattr(pages, 'pdf_renderer', lambda: None)
+    grader = OCR.OCRGrader(debug_image_path=None)
+
+    results = list(grader.grade_document(str(path)))
+    assert len(results) == 1
+    assert results[0].page == 1 and results[0].error is not None
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from fractions import Fraction
+
+from numeric import answers_equal
+from practice_session import PracticeSession
+
+
+def test_round_trip_serialization():
+    session = PracticeSession()
+    session.append(3, '+', 4, 7)
+    session.append(20, '-', 5, 15)
+    session.append(6, '*', 7, 42)
+    session.append(12, '/', 3, 4)
+    session.set_user_answer(0, 7)
+    session.set_user_answer(2, -1)
+    session.mark_scored(0)
+
+    restored = PracticeSession.from_text(session.to_text())
+    assert len(restored) == 4
+    assert restored.problem_text(3) == "12 / 3 = ?"
+    assert list(restored.items()) == list(session.items())
+    assert restored.get_user_answer(1) is None
+    assert restored.is_scored(0) and not restored.is_scored(1)
+
+
+def test_rejects_out_of_range_answer():
+    session = PracticeSession()
+    session.append(1, '+', 1, 2)
+    try:
+        session.set_user_answer(0, 10 ** 12)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    assert session.get_user_answer(0) is None
+
+
+def test_decimal_and_fraction_problems():
+    session = PracticeSession()
+    session.append(Decimal('2.5'), '+', Decimal('1.7'), Decimal('4.2'))
+    session.append(7, '/', 3, Fraction(7, 3))
+    session.set_user_answer(0, Decimal('4.20'))
+    session.set_user_answer(1, Decimal('2.33'))
+
+    restored = PracticeSession.from_text(session.to_text())
+    assert restored.problem_text(0) == "2.5 + 1.7 = ?"
+    assert restored.problem(1) == (7, '/', 3, Fraction(7, 3))
+    assert restored.correct_answer(0) == Fraction(21, 5)
+    # 小数答案保留书写的位数，循环小数的四舍五入判断仍然有效
+    assert str(restored.get_user_answer(0)) == '4.20'
+    assert answers_equal(restored.get_user_answer(1), restored.correct_answer(1))
+    assert list(restored.items()) == list(session.items())
+
+    session.set_user_answer(1, Fraction(7, 3))
+    assert session.get_user_answer(1) == Fraction(7, 3)
+
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from problem_generator import generate_operands
+from problem_sampler import FeistelPermutation, OperatorSpace, ProblemSampler, generate_problem_set
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 17, 64, 1000, 1275])
+def test_feistel_is_a_permutation(size):
+    permutation = FeistelPermutation(size, random.Random(size))
+    assert sorted(permutation[i] for i in range(size)) == list(range(size))
+    with pytest.raises(IndexError):
+        permutation[size]
+
+
+@pytest.mark.parametrize('op', ['+', '-', '*', '/'])
+def test_operator_space_enumerates_valid_problems(op):
+    space = OperatorSpace(op, 20, 10)
+    problems = [space.problem(i) for i in range(space.size)]
+    assert len(set(problems)) == space.size
+    for a, problem_op, b, ans in problems:
+        assert problem_op == op
+        if op == '+':
+            assert 1 <= a <= 20 and 1 <= b <= 20 and ans == a + b
+        elif op == '-':
+            assert 1 <= b <= a <= 20 and ans == a - b
+        elif op == '*':
+            assert 1 <= a <= 10 and 1 <= b <= 10 and ans == a * b
+        else:
+            assert 1 <= b <= 10 and 1 <= ans <= 10 and a == b * ans
+
+
+def test_no_repeats_until_space_is_exhausted():
+    sampler = ProblemSampler('easy', ['+', '/'], rng=random.Random(0))
+    assert len(sampler) == 20 * 20 + 10 * 10
+    problems = [sampler.draw() for _ in range(len(sampler))]
+    assert len(set(problems)) == len(sampler)
+    assert sampler.remaining() == 0
+
+    # 下一轮换一组密钥重新开始
+    sampler.draw()
+    assert sampler.remaining() == len(sampler) - 1
+
+
+def test_operators_stay_balanced():
+    sampler = ProblemSampler('medium', rng=random.Random(1))
+    ops = [sampler.draw()[1] for _ in range(400)]
+    for op in '+-*/':
+        assert 70 < ops.count(op) < 130
+
+
+def test_same_seed_gives_same_sequence():
+    first = ProblemSampler('hard', rng=random.Random(5))
+    second = ProblemSampler('hard', rng=random.Random(5))
+    assert [first.draw() for _ in range(50)] == [second.draw() for _ in range(50)]
+
+
+def test_problem_set_is_determined_by_seed_and_settings():
+    exam = generate_problem_set(42, 'medium', ['*', '+'], 20)
+    assert exam == generate_problem_set(42, 'medium', ['+', '*'], 20)
+    assert len(set(exam)) == 20 and {op for _, op, _, _ in exam} <= {'+', '*'}
+    assert generate_problem_set(43, 'medium', ['*', '+'], 20) != exam
+    assert generate_problem_set(42, 'hard', ['*', '+'], 20) != exam
+    # 种子也可以是试卷编号这样的文本
+    assert generate_problem_set('期中-3班', 'easy') == generate_problem_set('期中-3班', 'easy')
+
+
+def test_seeded_generation_leaves_global_random_alone():
+    random.seed(7)
+    expected = random.random()
+    random.seed(7)
+    generate_problem_set(1, count=50)
+    first = [generate_operands('hard', number_format='decimal', rng=random.Random(3)) for _ in range(3)]
+    assert random.random() == expected
+    assert first[0] == generate_operands('hard', number_format='decimal', rng=random.Random(3))
@@ -0,0 +1,84 @@
+import pytest
+
+from review_queue import (
+    FIRST_INTERVAL, MIN_EASINESS, RELEARN_DELAY, RETRY_DELAY, SECOND_INTERVAL, ReviewQueue, answer_quality
+)
+
+NOW = 1_700_000_000
+
+
+def test_missed_problems_come_back_in_due_order():
+    queue = ReviewQueue()
+    assert not queue.record(3, '+', 4, 7, answer_quality('+', True, 2), NOW)
+    queue.record(6, '*', 7, 42, answer_quality('*', False), NOW)
+    queue.record(9, '-', 5, 4, answer_quality('-', False), NOW + 60)
+    assert len(queue) == 2 and (6, '*', 7) in queue
+
+    assert queue.pop_due(NOW) is None
+    assert queue.pop_due(NOW + RELEARN_DELAY) == (6, '*', 7, 42)
+    assert queue.pop_due(NOW + RELEARN_DELAY) is None
+    assert queue.pop_due(NOW + RELEARN_DELAY + 60) == (9, '-', 5, 4)
+
+
+def test_unanswered_review_is_retried():
+    queue = ReviewQueue()
+    queue.record(6, '*', 7, 42, 1, NOW)
+    now = NOW + RELEARN_DELAY
+    assert queue.pop_due(now) is not None
+    assert queue.pop_due(now + RETRY_DELAY) == (6, '*', 7, 42)
+
+
+def test_sm2_intervals_grow_and_lapses_reset():
+    queue = ReviewQueue()
+    key = (6, '*', 7)
+    queue.record(6, '*', 7, 42, 1, NOW)
+    now = NOW
+    intervals = []
+    for _ in range(3):
+        now = queue.cards[key].due
+        queue.record(6, '*', 7, 42, 5, now)
+        intervals.append(queue.cards[key].interval)
+    assert intervals[:2] == [FIRST_INTERVAL, SECOND_INTERVAL]
+    assert intervals[2] > SECOND_INTERVAL
+
+    queue.record(6, '*', 7, 42, 1, now)
+    card = queue.cards[key]
+    assert card.repetitions == 0 and card.interval == RELEARN_DELAY
+    for _ in range(10):
+        queue.record(6, '*', 7, 42, 1, now)
+    assert queue.cards[key].easiness == MIN_EASINESS
+
+
+def test_mastered_problems_leave_the_queue():
+    queue = ReviewQueue()
+    queue.record(6, '*', 7, 42, 1, NOW)
+    for _ in range(10):
+        if not queue.record(6, '*', 7, 42, 5, NOW):
+            break
+    assert len(queue) == 0 and queue.peek() is None
+
+
+def test_heap_stays_proportional_to_queue():
+    queue = ReviewQueue()
+    queue.record(6, '*', 7, 42, 1, NOW)
+    for i in range(200):
+        queue.record(6, '*', 7, 42, 1, NOW + i)
+    assert len(queue.heap) <= 2 * len(queue) + 16
+
+
+def test_round_trip_persistence():
+    queue = ReviewQueue()
+    queue.record(6, '*', 7, 42, 1, NOW)
+    queue.record(12, '/', 3, 4, 1, NOW + 5)
+    queue.record(12, '/', 3, 4, 4, NOW + 10)
+    queue.record(1, '+', 1, 2.5, 1, NOW)  # 非整数答案不记录
+
+    restored = ReviewQueue.from_text(queue.to_text())
+    assert set(restored.cards) == {(6, '*', 7), (12, '/', 3)}
+    card = restored.cards[(12, '/', 3)]
+    assert card.answer == 4 and card.repetitions == 1 and card.interval == FIRST_INTERVAL
+    assert restored.pop_due(NOW + RELEARN_DELAY) == (6, '*', 7, 42)
+    assert len(queue.to_bytes()) < 30 * len(queue) + 16
+    assert len(ReviewQueue.from_text(None)) == 0
+    with pytest.raises(ValueError):
+        ReviewQueue.from_text('AAAA')
@@ -0,0 +1,66 @@
+from problem_generator import DIFFICULTY_RANGES, generate_operands
+from skill_model import (
+    DEFAULT_RATING, DIFFICULTY_RATINGS, MAX_RANGES, MIN_RANGES, SkillModel, answer_score, rating_ranges
+)
+
+
+def test_fixed_difficulties_keep_their_ranges():
+    for name, rating in DIFFICULTY_RATINGS.items():
+        assert rating_ranges(rating) == DIFFICULTY_RANGES[name]
+    assert rating_ranges(DEFAULT_RATING) == DIFFICULTY_RANGES['medium']
+    assert rating_ranges(-1e6) == MIN_RANGES
+    assert rating_ranges(1e6) == MAX_RANGES
+    assert rating_ranges(900) < rating_ranges(1100)
+
+
+def test_latency_lowers_the_score_of_correct_answers():
+    assert answer_score('+', False, 1) == 0.0
+    assert answer_score('+', True) == answer_score('+', True, 2) == 1.0
+    assert 0.5 < answer_score('+', True, 8) < 1.0
+    assert answer_score('+', True, 60) == 0.5
+
+
+def test_ratings_follow_performance_per_operator():
+    model = SkillModel()
+    for _ in range(15):
+        model.record('*', True, 2)
+        model.record('/', False)
+    assert model.rating('*') > DEFAULT_RATING > model.rating('/')
+    assert model.rating('+') == DEFAULT_RATING
+    assert model.ranges('*') > DIFFICULTY_RANGES['medium'] > model.ranges('/')
+
+    # 慢慢答对的题只让评分小幅上升
+    slow = SkillModel()
+    slow.record('+', True, 14)
+    fast = SkillModel()
+    fast.record('+', True, 2)
+    assert DEFAULT_RATING < slow.rating('+') < fast.rating('+')
+
+
+def test_easy_problem_answered_correctly_barely_counts():
+    model = SkillModel()
+    model.record('+', True, 2, problem_rating=DIFFICULTY_RATINGS['easy'])
+    gain_easy = model.rating('+') - DEFAULT_RATING
+    model = SkillModel()
+    model.record('+', True, 2, problem_rating=DIFFICULTY_RATINGS['hard'])
+    assert 0 < gain_easy < model.rating('+') - DEFAULT_RATING
+
+
+def test_generated_operands_respect_the_skill_ranges():
+    model = SkillModel({'+': 700.0})
+    max_num, _ = model.ranges('+')
+    for _ in range(200):
+        a, op, b, _ = model.generate_operands(['+'])
+        assert op == '+' and 1 <= a <= max_num and 1 <= b <= max_num
+    a, op, b, ans = generate_operands((3, 2), ['*'])
+    assert a <= 2 and b <= 2 and ans == a * b
+
+
+def test_round_trip_persistence():
+    model = SkillModel()
+    model.record('-', True, 3)
+    model.record('-', False)
+    restored = SkillModel.from_dict(model.to_dict())
+    assert restored.counts == {'-': 2}
+    assert abs(restored.rating('-') - model.rating('-')) < 0.1
+    assert SkillModel.from_dict(None).ratings == {}
@@ -0,0 +1,56 @@
+import json
+
+import cv2
+import numpy as np
+
+from glyph_recognizer import render_text
+from ocr_eval import load_corpus
+from synthetic_worksheets import FONT_NAMES, main, render_handwriting, synthetic_sample, write_corpus
+
+OPTIONS = {'max_jitter': 0.5, 'max_blur': 1.0, 'jpeg_quality': 85}
+
+
+def test_handwriting_jitter_moves_characters():
+    rng = np.random.default_rng(0)
+    font = FONT_NAMES['simplex']
+    plain = render_text('12 + 8 = 20', font, 1.5, 2)[0]
+    assert np.array_equal(render_handwriting('12 + 8 = 20', font, 1.5, 2, 0.0, rng), plain)
+
+    jittered = render_handwriting('12 + 8 = 20', font, 1.5, 2, 1.0, rng)
+    assert jittered.shape != plain.shape
+    assert abs(np.count_nonzero(jittered) - np.count_nonzero(plain)) < 0.2 * np.count_nonzero(plain)
+
+
+def test_degradations_change_the_page():
+    clean = synthetic_sample(0, seed=1)
+    degraded = synthetic_sample(0, seed=1, **OPTIONS)
+    assert degraded.lines == clean.lines
+    # 模糊和JPEG压缩会产生灰色像素
+    assert np.isin(clean.image, (0, 255)).mean() > np.isin(degraded.image, (0, 255)).mean()
+
+
+def test_parallel_corpus_matches_sequential(tmp_path):
+    parallel = write_corpus(str(tmp_path / 'parallel'), 4, seed=2, workers=2, **OPTIONS)
+    sequential = write_corpus(str(tmp_path / 'sequential'), 4, seed=2, workers=1, **OPTIONS)
+    with open(parallel, encoding='utf-8') as f:
+        entries = json.load(f)
+    with open(sequential, encoding='utf-8') as f:
+        assert json.load(f) == entries
+
+    assert [entry['image'] for entry in entries] == [f'synthetic-{i:04d}.jpg' for i in range(4)]
+    for entry in entries:
+        first = cv2.imread(str(tmp_path / 'parallel' / entry['image']), cv2.IMREAD_GRAYSCALE)
+        second = cv2.imread(str(tmp_path / 'sequential' / entry['image']), cv2.IMREAD_GRAYSCALE)
+        assert np.array_equal(first, second)
+
+
+def test_cli_writes_corpus_readable_by_evaluator(tmp_path, capsys):
+    directory = str(tmp_path / 'corpus')
+    assert main([directory, '--count', '2', '--workers', '1', '--fonts', 'simplex,script_simplex',
+                 '--jpeg-quality', '0']) == 0
+    assert 'labels.json' in capsys.readouterr().out
+
+    samples = load_corpus(directory)
+    assert [sample.name for sample in samples] == ['synthetic-0000', 'synthetic-0001']
+    assert samples[0].image.endswith('.png')
+    assert all(problem.solution is not None for sample in samples for problem in sample.problems)
@@ -0,0 +1,74 @@
+import json
+import time
+
+import pytest
+
+from tracing import NULL_SPAN, Tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span('preprocess', size=3) as span:
+        span.set(scale=2)
+    assert span is NULL_SPAN
+    assert tracer.spans == [] and tracer.depth == 0
+    assert tracer.to_dict() == [] and tracer.summary() == {}
+    assert tracer.to_chrome_trace()['traceEvents'] == []
+
+
+def test_nested_spans_record_depth_and_durations():
+    tracer = Tracer(enabled=True)
+    with tracer.span('grade', image='a.jpg') as outer:
+        with tracer.span('preprocess'):
+            time.sleep(0.01)
+        with tracer.span('ocr', config='psm6') as inner:
+            inner.set(lines=4)
+    assert tracer.depth == 0
+
+    spans = tracer.to_dict()
+    assert [(s['name'], s['depth']) for s in spans] == [('grade', 0), ('preprocess', 1), ('ocr', 1)]
+    grade, preprocess, ocr = spans
+    assert preprocess['duration_ms'] >= 10
+    assert grade['duration_ms'] >= preprocess['duration_ms'] + ocr['duration_ms']
+    assert grade['start_ms'] <= preprocess['start_ms'] <= ocr['start_ms']
+    assert preprocess['start_ms'] + preprocess['duration_ms'] <= ocr['start_ms']
+    assert grade['attrs'] == {'image': 'a.jpg'} and ocr['attrs'] == {'config': 'psm6', 'lines': 4}
+    assert tracer.summary()['grade'] == pytest.approx(outer.duration_ms)
+
+
+def test_span_marks_errors_and_reset_clears():
+    tracer = Tracer(enabled=True)
+    with pytest.raises(ValueError):
+        with tracer.span('parse'):
+            raise ValueError
+    assert tracer.spans[0].attrs == {'error': 'ValueError'} and tracer.depth == 0
+
+    with tracer.span('parse'):
+        pass
+    assert len(tracer.summary()) == 1 and len(tracer.spans) == 2
+    tracer.reset()
+    assert tracer.spans == [] and tracer.to_dict() == []
+
+
+def test_chrome_trace_events(tmp_path):
+    tracer = Tracer(enabled=True)
+    with tracer.span('grade'):
+        with tracer.span('ocr', config=6):
+            pass
+
+    trace = tracer.to_chrome_trace()
+    assert trace['displayTimeUnit'] == 'ms'
+    grade, ocr = trace['traceEvents']
+    for event, span in zip((grade, ocr), sorted(tracer.spans, key=lambda s: s.start_ns)):
+        assert set(event) == {'name', 'ph', 'ts', 'dur', 'pid', 'tid', 'args'}
+        assert event['ph'] == 'X' and event['name'] == span.name
+        # ts 和 dur 以微秒为单位
+        assert event['dur'] == pytest.approx(span.duration_ms * 1e3)
+        assert event['ts'] >= 0
+    assert ocr['args'] == {'config': '6'}
+    assert grade['pid'] == ocr['pid'] and grade['tid'] == ocr['tid']
+    assert grade['ts'] <= ocr['ts'] and ocr['ts'] + ocr['dur'] <= grade['ts'] + grade['dur']
+
+    path = tmp_path / 'trace.json'
+    tracer.save_chrome_trace(str(path))
+    assert json.loads(path.read_text(encoding='utf-8')) == trace
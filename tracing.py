@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan:
+    """关闭追踪时使用的空span，进入和退出都不做任何事"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一段计时区间，使用单调时钟记录开始和结束时间"""
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+        self.end_ns = 0
+        self.depth = 0
+
+    def __enter__(self):
+        self.depth = self.tracer.depth
+        self.tracer.depth += 1
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        self.tracer.depth -= 1
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer.spans.append(self)
+        return False
+
+    def set(self, **attrs):
+        """给span附加属性"""
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self, origin_ns):
+        return {
+            'name': self.name,
+            'start_ms': (self.start_ns - origin_ns) / 1e6,
+            'duration_ms': self.duration_ms,
+            'depth': self.depth,
+            'attrs': dict(self.attrs)
+        }
+
+
+class Tracer:
+    """阶段耗时追踪器 - 默认关闭，关闭时span()直接返回空span"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.spans = []
+        self.depth = 0
+        self.origin_ns = time.perf_counter_ns()
+
+    def span(self, name, **attrs):
+        """创建一个计时区间，用法: with tracer.span('stage'): ..."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def reset(self):
+        """清空已记录的span，开始新的一次追踪"""
+        self.spans = []
+        self.depth = 0
+        self.origin_ns = time.perf_counter_ns()
+
+    def to_dict(self):
+        """按开始时间排序的span列表"""
+        spans = sorted(self.spans, key=lambda s: (s.start_ns, s.depth))
+        return [span.to_dict(self.origin_ns) for span in spans]
+
+    def summary(self):
+        """各阶段名称的累计耗时（毫秒）"""
+        totals = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def to_json(self, indent=None):
+        """导出为JSON文本"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def to_chrome_trace(self):
+        """导出为Chrome trace格式（可在 chrome://tracing 或 Perfetto 中打开）"""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = []
+        for span in sorted(self.spans, key=lambda s: (s.start_ns, s.depth)):
+            events.append({
+                'name': span.name,
+                'ph': 'X',
+                'ts': (span.start_ns - self.origin_ns) / 1e3,
+                'dur': (span.end_ns - span.start_ns) / 1e3,
+                'pid': pid,
+                'tid': tid,
+                'args': {key: str(value) for key, value in span.attrs.items()}
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path):
+        """把Chrome trace写入文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
@@ -0,0 +1,19 @@
+import json
+import os
+
+
+def load_user_data(path):
+    """从JSON文件加载用户数据，文件不存在或损坏时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_user_data(path, user_data):
+    """把用户数据写入JSON文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(user_data, f, ensure_ascii=False, indent=4)